@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+from typing import Callable, Iterable, Mapping
+
+from .html import escape
+from .output import SiteWriter
+from .search import item_title
+
+ARCHIVE_DIR = "archive"
+ARCHIVE_PAGE = "archive.html"
+PAGE_SIZE = 500
+MAX_SOURCE_LINKS = 10
+
+# Viewer for archive.html: ``#<shard>/<id>`` opens a shard and highlights a message.
+ARCHIVE_JS = r"""(function(){
+var s=document.currentScript,base=s.getAttribute("data-archive"),box=document.getElementById("archive"),
+months=document.getElementById("archive-months"),meta=null,seq=0;
+function get(p){return fetch(base+p).then(function(r){return r.ok?r.json():null})}
+function esc(t){return String(t).replace(/[&<>"]/g,function(c){
+return{"&":"&amp;","<":"&lt;",">":"&gt;",'"':"&quot;"}[c]})}
+function link(sh,label){return '<a href="#'+esc(sh[0])+'">'+label+"</a>"}
+function show(){var h=decodeURIComponent(location.hash.slice(1)),cut=h.indexOf("/"),
+name=cut<0?h:h.slice(0,cut),id=cut<0?"":h.slice(cut+1),pos=meta.shards.length-1,mine=++seq;
+if(name)pos=meta.shards.map(function(sh){return sh[0]}).indexOf(name);
+if(pos<0){box.innerHTML="<p>No archived messages here.</p>";return}
+var sh=meta.shards[pos],prev=meta.shards[pos-1],next=meta.shards[pos+1];
+get(sh[0]+".json").then(function(rows){if(mine!=seq)return;
+var pager="<p>"+(prev?link(prev,"&larr; older")+" ":"")+"<strong>"+esc(sh[1])+"</strong>"+
+(next?" "+link(next,"newer &rarr;"):"")+"</p>";
+box.innerHTML=pager+(rows||[]).map(function(r){var hit=String(r[0])==id;
+return '<div class="card" id="m-'+esc(r[0])+'"'+(hit?' style="outline:2px solid #e9b000"':"")+"><small>#"+
+esc(r[0])+" · "+esc(r[1])+" · "+esc(r[2])+"</small><br>"+esc(r[3])+"</div>"}).join("")+pager;
+var el=id&&document.getElementById("m-"+id);if(el)el.scrollIntoView()})}
+if(!box||!months)return;
+get("meta.json").then(function(m){meta=m||{shards:[]};var seen={};
+months.innerHTML=meta.shards.filter(function(sh){var first=!(sh[1] in seen);seen[sh[1]]=1;return first})
+.map(function(sh){return link(sh,esc(sh[1]))}).join(" ");show()});
+window.addEventListener("hashchange",function(){if(meta)show()})})();
+"""
+
+
+def viewer_html(script: str) -> str:
+    """Body of ``archive.html``; ``script`` is the site-relative path of ``ARCHIVE_JS``."""
+    return (
+        "<h1>Message archive</h1>\n"
+        '<p id="archive-months"></p>\n<div id="archive"></div>\n'
+        f'<script src="{escape(script)}" data-archive="{ARCHIVE_DIR}/" defer></script>'
+    )
+
+
+def source_ids(knowledge: Mapping) -> set:
+    """Message ids cited in the ``sources`` of any list item of ``knowledge``."""
+    ids = set()
+    for items in knowledge.values():
+        if isinstance(items, list):
+            for item in items:
+                if isinstance(item, Mapping):
+                    ids.update(item.get("sources") or ())
+    return ids
+
+
+class ArchiveWriter:
+    """Streams sanitized messages into month shards of static JSON.
+
+    Messages are read once, in order, and buffered only until a month ends or
+    ``page_size`` messages are collected; each buffer is written through the
+    ``SiteWriter`` as ``archive/<YYYY-MM>-<page>.json`` (``[id, ts, author, text]``
+    rows), so unchanged months are not rewritten and memory stays flat however
+    long the chat. ``archive/meta.json`` lists the shards for the viewer page.
+    Only the shard of each id in ``wanted`` (the cited sources) is remembered.
+    """
+
+    def __init__(
+        self,
+        writer: SiteWriter,
+        *,
+        sanitize: Callable[[list[str]], list[str]],
+        wanted: Iterable = (),
+        page_size: int = PAGE_SIZE,
+    ):
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        self.writer = writer
+        self.sanitize = sanitize
+        self.page_size = page_size
+        self.wanted = set(wanted)
+        self.locations: dict = {}
+        self.shards: list[list] = []
+        self.messages = 0
+        self._pages: dict[str, int] = {}
+
+    def _flush(self, month: str, rows: list[list]) -> None:
+        page = self._pages.get(month, 0)
+        self._pages[month] = page + 1
+        name = f"{month}-{page}"
+        texts = self.sanitize([text for row in rows for text in (row[2], row[3])])
+        for row, author, text in zip(rows, texts[::2], texts[1::2]):
+            row[2], row[3] = author, text
+            if row[0] in self.wanted:
+                self.locations[row[0]] = name
+        payload = json.dumps(rows, ensure_ascii=False, separators=(",", ":"))
+        self.writer.write_text(f"{ARCHIVE_DIR}/{name}.json", payload)
+        self.shards.append([name, month, len(rows)])
+
+    def write(self, messages: Iterable[Mapping]) -> dict:
+        """Write every message's shard and ``meta.json``; return the meta."""
+        month, rows = None, []
+        for m in messages:
+            key = str(m["ts"])[:7]
+            if rows and (key != month or len(rows) >= self.page_size):
+                self._flush(month, rows)
+                rows = []
+            month = key
+            rows.append([m["id"], str(m["ts"]), str(m.get("author", "")), str(m.get("text", ""))])
+            self.messages += 1
+        if rows:
+            self._flush(month, rows)
+        meta = {"messages": self.messages, "shards": self.shards}
+        payload = json.dumps(meta, ensure_ascii=False, separators=(",", ":"))
+        self.writer.write_text(f"{ARCHIVE_DIR}/meta.json", payload)
+        return meta
+
+    def link(self, message_id: object) -> str | None:
+        """Relative URL of a message in the archive viewer, if it was archived."""
+        name = self.locations.get(message_id)
+        return None if name is None else f"{ARCHIVE_PAGE}#{name}/{message_id}"
+
+    def sources_markdown(self, knowledge: Mapping) -> str:
+        """A "Sources" section linking each item of ``knowledge`` to its newest source messages."""
+        lines = []
+        for section, items in knowledge.items():
+            if not isinstance(items, list):
+                continue
+            for item in items:
+                titled = item_title(section, item) if isinstance(item, Mapping) else None
+                ids = list(item.get("sources") or ()) if titled is not None else []
+                links = [f"[#{i}]({url})" for i in ids[-MAX_SOURCE_LINKS:] if (url := self.link(i)) is not None]
+                if links:
+                    lines.append(f"- {titled[0]}: {', '.join(links)}")
+        return "\n\n## Sources\n" + "\n".join(lines) + "\n" if lines else ""
+
+    def summary(self) -> str:
+        return f"{self.messages} message(s) in {len(self.shards)} shard(s), {len(self.locations)} cited"
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import re
+
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_SUFFIXES = (".html", ".css", ".js", ".json", ".svg", ".txt")
+
+_BLOCK_TAGS = (
+    "html|head|body|header|main|nav|footer|section|div|p|ul|ol|li|h[1-6]|table|thead|tbody|tr|th|td|hr|"
+    "meta|title|link|style|script|pre|blockquote"
+)
+_AROUND_BLOCK = re.compile(rf"\s*(</?(?:{_BLOCK_TAGS})\b[^>]*>)\s*", re.I)
+_PRESERVE = re.compile(r"(<(pre|script|style|textarea)\b.*?</\2>)", re.I | re.S)
+_WS = re.compile(r"\s+")
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_PUNCT = re.compile(r"\s*([{}:;,>])\s*")
+
+
+def minify_css(css: str) -> str:
+    css = _CSS_COMMENT.sub("", css)
+    css = _CSS_PUNCT.sub(r"\1", _WS.sub(" ", css))
+    return css.replace(";}", "}").strip()
+
+
+def minify_html(page: str) -> str:
+    """Collapse whitespace; drop it entirely next to block-level tags.
+
+    Whitespace between inline elements is kept as one space so words do not run
+    together, and ``<pre>``/``<script>``/``<style>``/``<textarea>`` bodies are left as is.
+    """
+    out = []
+    for i, part in enumerate(_PRESERVE.split(page)):
+        # split() yields text, whole preserved element, tag name, text, ...
+        if i % 3 == 0:
+            out.append(_AROUND_BLOCK.sub(r"\1", _WS.sub(" ", part)))
+        elif i % 3 == 1:
+            out.append(part)
+    return "".join(out).strip()
+
+
+def fingerprint(name: str, data: bytes) -> str:
+    """``site.css`` -> ``site.<first 10 hex of sha256>.css``."""
+    stem, dot, suffix = name.rpartition(".")
+    digest = hashlib.sha256(data).hexdigest()[:10]
+    return f"{stem}.{digest}.{suffix}" if dot else f"{name}.{digest}"
+
+
+def compressed_variants(data: bytes) -> dict[str, bytes]:
+    """Precompressed siblings to write next to a file: ``{".gz": ..., ".br": ...}``.
+
+    gzip output is reproducible (mtime 0) so unchanged files hash the same; brotli is
+    added only when the optional ``brotli`` package is installed.
+    """
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return variants
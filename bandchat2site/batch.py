@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import json
+import re
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Mapping
+
+from .cache import LLMCache
+from .llm import call_llm_json, call_llm_text, get_resilience, set_resilience
+from .output import state_dir
+from .resilience import CircuitBreaker, Hedger, RateLimiter, ResilientCaller, RetryPolicy
+from .serve import BUILDERS
+from .whatsapp import load_messages
+
+DEFAULT_TITLES = {"ops": "{name} Ops Hub", "creative": "{name} Creative Hub", "public": "{name}"}
+SUMMARY_NAME = "batch-summary.json"
+
+
+@dataclass(frozen=True)
+class BandJob:
+    """One site build of a batch: a band's export through one pipeline into ``out``.
+
+    ``settings`` holds per-band overrides of build flags from the manifest (for
+    example ``secrets`` or ``redact_rules``); ``weight`` (input size in bytes) is
+    used to start the biggest builds first.
+    """
+
+    band: str
+    pipeline: str
+    messages: Path
+    out: Path
+    title: str
+    settings: Mapping = field(default_factory=dict)
+    weight: int = 0
+
+
+@dataclass
+class JobResult:
+    band: str
+    pipeline: str
+    out: str
+    ok: bool
+    seconds: float
+    written: int = 0
+    llm_calls: int = 0
+    cached: int = 0
+    error: str = ""
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "band"
+
+
+def load_manifest(path: str | Path, *, out_root: str | Path = "sites") -> list[BandJob]:
+    """Jobs from a JSON manifest, biggest input first.
+
+    The manifest is a list of bands, or ``{"defaults": {...}, "bands": [...]}``.
+    Each band needs ``name`` and ``messages`` (``.json``, ``.jsonl`` or WhatsApp
+    ``.txt``); ``pipelines`` (default all three), ``out`` (default
+    ``<out_root>/<slug>``, one subfolder per pipeline) and ``titles`` (per
+    pipeline) are optional. Any other key overrides the build flag of that name
+    for the band. Relative paths are resolved against the manifest's folder.
+    """
+    path = Path(path)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    defaults, bands = ({}, data) if isinstance(data, list) else (data.get("defaults", {}), data.get("bands", []))
+    jobs = []
+    for entry in bands:
+        entry = {**defaults, **entry}
+        if "name" not in entry or "messages" not in entry:
+            raise ValueError(f"{path}: every band needs 'name' and 'messages': {entry!r}")
+        name = entry.pop("name")
+        messages = path.parent / entry.pop("messages")
+        out = path.parent / entry.pop("out") if "out" in entry else Path(out_root) / _slug(name)
+        titles = entry.pop("titles", {})
+        pipelines = entry.pop("pipelines", list(BUILDERS))
+        unknown = sorted(set(pipelines) - set(BUILDERS))
+        if unknown:
+            raise ValueError(f"{path}: unknown pipeline(s) {unknown} for {name!r}; expected some of {sorted(BUILDERS)}")
+        for key in ("secrets", "redact_rules"):
+            if entry.get(key):
+                entry[key] = str(path.parent / entry[key])
+        weight = messages.stat().st_size if messages.exists() else 0
+        for pipeline in pipelines:
+            title = titles.get(pipeline) or DEFAULT_TITLES[pipeline].format(name=name)
+            jobs.append(BandJob(name, pipeline, messages, out / pipeline, title, dict(entry), weight))
+    return sorted(jobs, key=lambda job: -job.weight)
+
+
+def init_worker(limiter: RateLimiter | None, retries: int, hedge_percentile: float | None) -> None:
+    hedger = Hedger(percentile=hedge_percentile) if hedge_percentile else None
+    policy = RetryPolicy(attempts=max(1, retries + 1))
+    set_resilience(ResilientCaller(policy, breaker=CircuitBreaker(), hedger=hedger, limiter=limiter))
+
+
+def run_job(
+    job: BandJob,
+    options_for: Callable[[BandJob], dict],
+    *,
+    model: str | None,
+    cache_dir: str | Path,
+    llm_text=call_llm_text,
+    llm_json=call_llm_json,
+) -> JobResult:
+    """Build one site; any exception is reported in the result instead of raised."""
+    started = time.perf_counter()
+    calls_before = get_resilience().calls
+    cache = LLMCache(cache_dir)
+    result = JobResult(job.band, job.pipeline, str(job.out), ok=False, seconds=0.0)
+    options: dict = {}
+    try:
+        options = options_for(job)
+        BUILDERS[job.pipeline](
+            load_messages(job.messages),
+            job.out,
+            title=job.title,
+            model=model,
+            llm_text=llm_text,
+            llm_json=llm_json,
+            cache=cache,
+            **options,
+        )
+        result.ok = True
+        result.written = len(options["writer"].written) if "writer" in options else 0
+    except Exception as exc:
+        result.error = f"{type(exc).__name__}: {exc}"
+        log = state_dir(job.out) / "batch-error.log"
+        log.parent.mkdir(parents=True, exist_ok=True)
+        log.write_text(traceback.format_exc(), encoding="utf-8")
+    finally:
+        if options.get("store") is not None:
+            options["store"].close()
+    result.seconds = time.perf_counter() - started
+    result.llm_calls = get_resilience().calls - calls_before
+    result.cached = cache.hits
+    return result
+
+
+def run_batch(
+    jobs: Iterable[BandJob],
+    options_for: Callable[[BandJob], dict],
+    *,
+    model: str | None = None,
+    cache_dir: str | Path = ".bandchat2site/llm-cache",
+    workers: int = 8,
+    per_minute: float | None = None,
+    retries: int = 4,
+    hedge_percentile: float | None = None,
+    llm_text=call_llm_text,
+    llm_json=call_llm_json,
+    progress: Callable[[JobResult], None] | None = None,
+) -> list[JobResult]:
+    """Run every job on a pool of ``workers`` processes; return results in job order.
+
+    Workers are started once and reused, so interpreter start-up and the API
+    client are paid per worker rather than per band. All workers share one LLM
+    cache directory and one :class:`RateLimiter` of ``per_minute`` requests, and
+    a failing band only fails its own jobs. ``options_for`` and the LLM callables
+    must be picklable (module-level functions or ``functools.partial`` of them).
+    """
+    jobs = list(jobs)
+    limiter = RateLimiter(per_minute) if per_minute else None
+    results: list[JobResult | None] = [None] * len(jobs)
+    with ProcessPoolExecutor(
+        max_workers=max(1, min(workers, len(jobs) or 1)),
+        initializer=init_worker,
+        initargs=(limiter, retries, hedge_percentile),
+    ) as pool:
+        futures = {
+            pool.submit(
+                run_job, job, options_for, model=model, cache_dir=cache_dir, llm_text=llm_text, llm_json=llm_json
+            ): i
+            for i, job in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:  # the worker itself died (e.g. killed or out of memory)
+                job = jobs[i]
+                result = JobResult(job.band, job.pipeline, str(job.out), ok=False, seconds=0.0, error=repr(exc))
+            results[i] = result
+            if progress is not None:
+                progress(result)
+    return [result for result in results if result is not None]
+
+
+def format_summary(results: list[JobResult]) -> str:
+    """Plain-text table of a batch run, one row per band and pipeline."""
+    header = ("band", "pipeline", "status", "seconds", "written", "llm calls", "cached", "error")
+    rows = [
+        (r.band, r.pipeline, "ok" if r.ok else "FAILED", f"{r.seconds:.1f}", str(r.written), str(r.llm_calls),
+         str(r.cached), r.error[:80])
+        for r in results
+    ]
+    widths = [max(len(row[i]) for row in [header, *rows]) for i in range(len(header))]
+    lines = ["  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in [header, *rows]]
+    lines.insert(1, "  ".join("-" * width for width in widths))
+    failed = sum(1 for r in results if not r.ok)
+    lines.append(f"{len(results) - failed} of {len(results)} site(s) built, {failed} failed")
+    return "\n".join(lines)
+
+
+def write_summary(results: list[JobResult], path: str | Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps([asdict(r) for r in results], ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
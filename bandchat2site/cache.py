@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any
+
+from .llm import DEFAULT_MODEL
+from .output import write_atomic
+
+
+class LLMCache:
+    """On-disk cache of LLM responses keyed by a hash of everything sent to the model.
+
+    Unchanged chunks and unchanged page inputs hit the cache, so rebuilding after a
+    chat grows only pays for the new tail. Entries are one JSON file each under
+    ``<dir>/<key[:2]>/<key>.json`` and are written atomically, so several processes
+    can share one cache directory.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(kind: str, model: str | None, *parts: Any) -> str:
+        payload = json.dumps([kind, model or DEFAULT_MODEL, *parts], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def get(self, key: str) -> Any | None:
+        try:
+            value = json.loads(self._path(key).read_text(encoding="utf-8"))["value"]
+        except (FileNotFoundError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        write_atomic(self._path(key), json.dumps({"value": value}, ensure_ascii=False).encode("utf-8"))
+
+    def wrap_json(self, llm_json):
+        """Cached version of an ``llm_json(system, user, schema, *, model, name)`` callable."""
+
+        def cached_llm_json(system_prompt, user_prompt, schema, *, model=None, name="response"):
+            key = self.key("json", model, system_prompt, user_prompt, schema)
+            value = self.get(key)
+            if value is None:
+                value = llm_json(system_prompt, user_prompt, schema, model=model, name=name)
+                self.put(key, value)
+            return value
+
+        return cached_llm_json
+
+    def wrap_text(self, llm_text):
+        """Cached version of an ``llm_text(system, user, *, model)`` callable."""
+
+        def cached_llm_text(system_prompt, user_prompt, *, model=None):
+            key = self.key("text", model, system_prompt, user_prompt)
+            value = self.get(key)
+            if value is None:
+                value = llm_text(system_prompt, user_prompt, model=model)
+                self.put(key, value)
+            return value
+
+        return cached_llm_text
+
+    def summary(self) -> str:
+        return f"{self.hits} cached, {self.misses} fetched"
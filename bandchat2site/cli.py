@@ -1,53 +1,564 @@
 from __future__ import annotations
 
 import argparse
+import importlib
 import json
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
 
-from .creative import build_creative_site
-from .ops import build_ops_site
-from .public import build_public_site
-from .whatsapp import export_messages_json
+if TYPE_CHECKING:  # pragma: no cover
+    from .batch import BandJob, JobResult
+    from .redact import Redactor
+    from .scrub import SecretScrubber
 
+# Subcommands import what they need when they run: ``parse-whatsapp`` must not pay for
+# the pipelines, the HTTP server or the OpenAI SDK (see benchmarks/bench_startup.py).
+PIPELINES = ("ops", "creative", "public")
 
-def _load_messages(path: str | Path) -> list[dict]:
-    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+def _redactor(pipeline: str, args: argparse.Namespace) -> "Redactor":
+    from .messages import build_redactor
+    from .redact import load_rules
+
+    extra = load_rules(args.redact_rules) if args.redact_rules else []
+    return build_redactor(pipeline, extra)
+
+
+def _scrubber(args: argparse.Namespace) -> "SecretScrubber | None":
+    from .scrub import SecretScrubber
+
+    return SecretScrubber.from_file(args.secrets) if args.secrets else None
+
+
+def _site_options(pipeline: str, args: argparse.Namespace, out: Path) -> dict:
+    from .dates import DateResolver
+    from .links import LinkExtractor
+    from .normalize import Normalizer
+    from .output import SiteWriter
+    from .prefilter import build_prefilter
+    from .schema import SchemaGuard
+    from .split import ChunkSplitter
+    from .store import KnowledgeStore
+
+    return {
+        "redactor": _redactor(pipeline, args),
+        "scrubber": _scrubber(args),
+        "writer": SiteWriter(out, optimize=args.optimize, precompress=args.precompress),
+        "prune": args.prune,
+        "resume": getattr(args, "resume", False),
+        "prefilter": build_prefilter(pipeline, args.prefilter_threshold) if args.prefilter else None,
+        "normalizer": Normalizer() if args.normalize else None,
+        "reduce_mode": args.reduce,
+        "fanout": args.fanout,
+        "store": KnowledgeStore(args.store) if args.store else None,
+        "band": args.band,
+        "search": args.search,
+        "archive": args.archive,
+        "guard": SchemaGuard(repairs=args.schema_repairs),
+        "splitter": ChunkSplitter(),
+        "max_chars": _single(args.max_chars, "--max-chars"),
+        "min_gap_minutes": _single(args.min_gap_minutes, "--min-gap-minutes"),
+        "media": _media(pipeline, args),
+        "links": LinkExtractor() if args.local_links else None,
+        "dates": DateResolver(today=args.today, dayfirst=args.day_first) if args.resolve_dates else None,
+    }
+
+
+@contextmanager
+def _opened(options: dict) -> Iterator[dict]:
+    """``options`` for one build; closes the knowledge store they opened when it is done."""
+    try:
+        yield options
+    finally:
+        if options["store"] is not None:
+            options["store"].close()
+
+
+def _media(pipeline: str, args: argparse.Namespace):  # noqa: ANN202
+    if not args.copy_recordings or pipeline != "creative":
+        return None
+    export = str(getattr(args, "messages", None) or args.input)
+    if not export.lower().endswith(".zip"):
+        raise SystemExit(f"❌ --copy-recordings needs a WhatsApp export with media (.zip), not {export}")
+    from .media import MediaLibrary
+
+    return MediaLibrary(export)
+
+
+def _int_list(text: str) -> list[int]:
+    """``"12000,24000"`` -> ``[12000, 24000]``; several values are compared by ``--dry-run``."""
+    try:
+        return [int(value) for value in text.split(",") if value.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated integers, got {text!r}") from None
+
+
+def _iso_date(text: str):  # noqa: ANN202
+    from datetime import date
+
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a date as YYYY-MM-DD, got {text!r}") from None
+
+
+def _single(values: list[int] | None, flag: str) -> int | None:
+    if not values:
+        return None
+    if len(values) > 1:
+        raise SystemExit(f"❌ {flag} takes several values only with --dry-run")
+    return values[0]
+
+
+# Build flags that apply to a whole batch or daemon run, so a band cannot override them.
+_RUN_FLAGS = frozenset({"model", "retries", "hedge_percentile"})
+
+
+def _band_settings() -> frozenset[str]:
+    """Build flags a manifest band or queued job may set for its own sites."""
+    parser = argparse.ArgumentParser(add_help=False)
+    _add_build_flags(parser)
+    return frozenset(vars(parser.parse_args([]))) - _RUN_FLAGS
+
+
+def _batch_options(args: argparse.Namespace, job: "BandJob") -> dict:
+    unknown = sorted(set(job.settings) - _band_settings())
+    if unknown:
+        raise ValueError(f"Unknown setting(s) {', '.join(unknown)} for {job.band!r}; expected per-band build flags")
+    band_args = argparse.Namespace(**{**vars(args), "band": job.band, "messages": str(job.messages), **job.settings})
+    return _site_options(job.pipeline, band_args, job.out)
+
+
+def _configure_llm(args: argparse.Namespace) -> None:
+    from .llm import set_resilience
+    from .resilience import CircuitBreaker, Hedger, ResilientCaller, RetryPolicy
+
+    hedger = Hedger(percentile=args.hedge_percentile) if args.hedge_percentile else None
+    set_resilience(
+        ResilientCaller(RetryPolicy(attempts=max(1, args.retries + 1)), breaker=CircuitBreaker(), hedger=hedger)
+    )
+
+
+def _report(options: dict) -> None:
+    from .llm import get_resilience
+
+    hits = ", ".join(f"{name}={count}" for name, count in options["redactor"].stats().items())
+    print(f"🔒 Redaction hits: {hits}")
+    print(f"📝 Output: {options['writer'].summary()}")
+    if options["normalizer"] is not None:
+        print(f"🧹 Normalized: {options['normalizer'].summary()}")
+    if options["prefilter"] is not None:
+        print(f"🔎 Prefilter: {options['prefilter'].summary()}")
+    if options["media"] is not None:
+        print(f"🎧 Media: {options['media'].summary()}")
+    if options["links"] is not None:
+        print(f"🔗 Links: {options['links'].summary()}")
+    if options["dates"] is not None:
+        print(f"📅 Dates: {options['dates'].summary()}")
+    print(f"🧾 Schema: {options['guard'].summary()}")
+    print(f"✂️  Chunks: {options['splitter'].summary()}")
+    print(f"🤖 LLM: {get_resilience().summary()}")
 
 
 def _add_common_flags(parser: argparse.ArgumentParser) -> None:
-    parser.add_argument("--messages", required=True, help="Path to messages.json [{id,ts,author,text}]")
+    parser.add_argument(
+        "--messages",
+        required=True,
+        help="Path to messages.json [{id,ts,author,text}], a followed messages.jsonl or a WhatsApp .txt export",
+    )
     parser.add_argument("--out", default=None, help="Output directory")
     parser.add_argument("--title", default=None, help="Site title override")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted build from its journal (same inputs, prompts and model only)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only print the plan: model calls, tokens, cache hits, time and cost (no API calls, nothing written)",
+    )
+    parser.add_argument(
+        "--cache-dir", default=None, help="LLM response cache to use (and, with --dry-run, to count hits in)"
+    )
+    parser.add_argument("--concurrency", type=int, default=1, help="Parallel calls to project with --dry-run")
+    parser.add_argument("--rpm", type=float, default=None, help="Requests per minute to project with --dry-run")
+    parser.add_argument("--price-in", type=float, default=None, help="USD per 1M input tokens for --dry-run")
+    parser.add_argument("--price-out", type=float, default=None, help="USD per 1M output tokens for --dry-run")
+    _add_build_flags(parser)
+
+
+def _add_build_flags(parser: argparse.ArgumentParser) -> None:
     parser.add_argument("--model", default=None, help="OpenAI model override (defaults to OPENAI_MODEL/gpt-4o-mini)")
+    parser.add_argument(
+        "--redact-rules",
+        default=None,
+        help="JSON list of extra per-band redaction rules [{name,pattern,replacement?,whole?,ignore_case?}]",
+    )
+    parser.add_argument(
+        "--secrets",
+        default=None,
+        help="Per-band secrets file (one string per line, or a JSON list) scrubbed from prompts and output",
+    )
+    parser.add_argument("--prune", action="store_true", help="Delete files left over from earlier builds")
+    parser.add_argument(
+        "--optimize", action="store_true", help="Share one fingerprinted stylesheet across pages and minify HTML/CSS"
+    )
+    parser.add_argument(
+        "--precompress", action="store_true", help="Also write .gz (and .br if brotli is installed) next to each file"
+    )
+    parser.add_argument(
+        "--normalize",
+        action="store_true",
+        help="Drop media placeholders and deleted messages, fold acks/emoji replies, dedupe repeated forwards",
+    )
+    parser.add_argument(
+        "--prefilter",
+        action="store_true",
+        help="Skip chunks with no local sign of relevant content (keywords, dates, times, URLs, venues)",
+    )
+    parser.add_argument(
+        "--prefilter-threshold", type=float, default=None, help="Minimum chunk score for --prefilter"
+    )
+    parser.add_argument(
+        "--reduce",
+        choices=["tree", "llm"],
+        default=None,
+        help="Reduce chunk extractions hierarchically, newest facts winning (llm: model consolidates each group)",
+    )
+    parser.add_argument("--fanout", type=int, default=8, help="Extractions combined per group with --reduce")
+    parser.add_argument(
+        "--search", action="store_true", help="Add a search box backed by a prebuilt, sharded client-side index"
+    )
+    parser.add_argument(
+        "--archive", action="store_true", help="Publish the sanitized chat by month and link items to their sources"
+    )
+    parser.add_argument(
+        "--store", default=None, help="Also upsert every extraction into this SQLite knowledge store"
+    )
+    parser.add_argument("--band", default=None, help="Band name to file knowledge under in --store (default: title)")
+    parser.add_argument(
+        "--retries", type=int, default=4, help="Retries per LLM call on rate limits, timeouts and server errors"
+    )
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        default=None,
+        help="Send a backup request when a call runs longer than this latency percentile (e.g. 95)",
+    )
+    parser.add_argument(
+        "--copy-recordings",
+        action="store_true",
+        help="With a .zip export: copy the audio and demo files the chat refers to into the creative site's media/",
+    )
+    parser.add_argument(
+        "--local-links",
+        action="store_true",
+        help="Take links and recordings from the chat itself (canonical, deduped) instead of asking the model for them",
+    )
+    parser.add_argument(
+        "--resolve-dates",
+        action="store_true",
+        help="Resolve event dates/times locally, write events.json and give pages upcoming/past already split",
+    )
+    parser.add_argument(
+        "--today", type=_iso_date, default=None, help="Date that splits upcoming from past (default: today)"
+    )
+    parser.add_argument(
+        "--day-first", action="store_true", help="Read numeric dates like 12/5 as day/month (default: month/day)"
+    )
+    parser.add_argument(
+        "--max-chars", type=_int_list, default=None, help="Characters per chunk (comma-separated with --dry-run)"
+    )
+    parser.add_argument(
+        "--min-gap-minutes",
+        type=_int_list,
+        default=None,
+        help="Silence that starts a new chunk, in minutes (comma-separated with --dry-run)",
+    )
+    parser.add_argument(
+        "--schema-repairs",
+        type=int,
+        default=1,
+        help="Times to re-ask for a chunk whose result does not match the schema before salvaging it",
+    )
+
+
+def _cache(args: argparse.Namespace):  # noqa: ANN202
+    from .cache import LLMCache
+
+    return LLMCache(args.cache_dir) if args.cache_dir else None
+
+
+def _site_specs(  # noqa: ANN202
+    pipelines: tuple[str, ...], args: argparse.Namespace, max_chars: int | None = None, min_gap: int | None = None
+):
+    """``[(pipeline, SiteSpec)]`` to build, sharing one extraction per chunk with ``--unified``."""
+    if not getattr(args, "unified", False):
+        return [(pipeline, _spec(pipeline)) for pipeline in pipelines], None
+    from .unified import UnifiedExtractor
+
+    extractor = UnifiedExtractor(
+        prompt=_redactor("ops", args), pipelines=pipelines, max_chars=max_chars, min_gap_minutes=min_gap
+    )
+    return [(pipeline, extractor.spec(pipeline)) for pipeline in pipelines], extractor
+
+
+def _dry_run(pipelines: tuple[str, ...], args: argparse.Namespace) -> None:
+    from dataclasses import replace
+    from itertools import product
+
+    from .normalize import Normalizer
+    from .plan import Assumptions, format_plans, plan_build
+    from .prefilter import build_prefilter
+    from .whatsapp import load_messages
+
+    assumptions = Assumptions()
+    prices = {"price_in": args.price_in, "price_out": args.price_out}
+    assumptions = replace(assumptions, **{key: value for key, value in prices.items() if value is not None})
+    messages = load_messages(args.messages)
+    cache = _cache(args)
+    plans = []
+    for max_chars, min_gap in product(args.max_chars or [None], args.min_gap_minutes or [None]):
+        specs, _extractor = _site_specs(pipelines, args, max_chars, min_gap)
+        for pipeline, spec in specs:
+            if args.local_links:
+                spec = spec.without_link_extraction()
+            plans.append(
+                plan_build(
+                    spec,
+                    messages,
+                    model=args.model,
+                    redactor=_redactor(pipeline, args),
+                    scrubber=_scrubber(args),
+                    normalizer=Normalizer() if args.normalize else None,
+                    prefilter=build_prefilter(pipeline, args.prefilter_threshold) if args.prefilter else None,
+                    cache=cache,
+                    reduce_mode=args.reduce,
+                    fanout=args.fanout,
+                    max_chars=max_chars,
+                    min_gap_minutes=min_gap,
+                    assumptions=assumptions,
+                )
+            )
+    print(f"🧮 Plan for {len(messages):,} message(s), no API calls made:")
+    print(format_plans(plans, assumptions, concurrency=args.concurrency, per_minute=args.rpm))
 
 
 def cmd_ops(args: argparse.Namespace) -> None:
+    from .ops import build_ops_site
+    from .whatsapp import load_messages
+
+    if args.dry_run:
+        return _dry_run(("ops",), args)
     out = Path(args.out or "site_ops")
     title = args.title or "Band Ops Hub"
-    messages = _load_messages(args.messages)
-    build_ops_site(messages, out, title=title, model=args.model)
+    messages = load_messages(args.messages)
+    with _opened(_site_options("ops", args, out)) as options:
+        build_ops_site(messages, out, title=title, model=args.model, cache=_cache(args), **options)
+        _report(options)
     print(f"✅ Built: {out.resolve() / 'index.html'}")
 
 
 def cmd_creative(args: argparse.Namespace) -> None:
+    from .creative import build_creative_site
+    from .whatsapp import load_messages
+
+    if args.dry_run:
+        return _dry_run(("creative",), args)
     out = Path(args.out or "site_creative")
     title = args.title or "Band Creative Hub"
-    messages = _load_messages(args.messages)
-    build_creative_site(messages, out, title=title, model=args.model)
+    messages = load_messages(args.messages)
+    with _opened(_site_options("creative", args, out)) as options:
+        build_creative_site(messages, out, title=title, model=args.model, cache=_cache(args), **options)
+        _report(options)
     print(f"✅ Built: {out.resolve() / 'index.html'}")
 
 
 def cmd_public(args: argparse.Namespace) -> None:
+    from .public import build_public_site
+    from .whatsapp import load_messages
+
+    if args.dry_run:
+        return _dry_run(("public",), args)
     out = Path(args.out or "site_public")
     title = args.title or "Band"
-    messages = _load_messages(args.messages)
-    build_public_site(messages, out, title=title, model=args.model)
+    messages = load_messages(args.messages)
+    with _opened(_site_options("public", args, out)) as options:
+        build_public_site(messages, out, title=title, model=args.model, cache=_cache(args), **options)
+        _report(options)
     print(f"✅ Built: {out.resolve() / 'index.html'}")
 
 
+def cmd_all(args: argparse.Namespace) -> None:
+    from .batch import DEFAULT_TITLES
+    from .pipeline import build_site
+    from .whatsapp import load_messages
+
+    if args.dry_run:
+        return _dry_run(PIPELINES, args)
+    out_root = Path(args.out or "sites")
+    messages = load_messages(args.messages)
+    specs, extractor = _site_specs(
+        PIPELINES, args, _single(args.max_chars, "--max-chars"), _single(args.min_gap_minutes, "--min-gap-minutes")
+    )
+    cache = _cache(args)
+    for pipeline, spec in specs:
+        out = out_root / pipeline
+        title = DEFAULT_TITLES[pipeline].format(name=args.title or "Band")
+        with _opened(_site_options(pipeline, args, out)) as options:
+            build_site(spec, messages, out, title=title, model=args.model, cache=cache, **options)
+            print(f"— {pipeline}")
+            _report(options)
+        print(f"✅ Built: {out.resolve() / 'index.html'}")
+    if extractor is not None:
+        print(f"🔗 Unified: {extractor.summary()}")
+
+
+def cmd_batch(args: argparse.Namespace) -> None:
+    from .batch import SUMMARY_NAME, format_summary, load_manifest, run_batch, write_summary
+
+    jobs = load_manifest(args.manifest, out_root=args.out_root)
+    bands = len({job.band for job in jobs})
+    print(f"🎛️  {len(jobs)} site(s) for {bands} band(s) on {args.workers} worker(s)")
+
+    def progress(result: "JobResult") -> None:
+        mark = "✅" if result.ok else "❌"
+        print(f"{mark} {result.band} / {result.pipeline} ({result.seconds:.1f}s) {result.error}".rstrip())
+
+    results = run_batch(
+        jobs,
+        partial(_batch_options, args),
+        model=args.model,
+        cache_dir=args.cache_dir,
+        workers=args.workers,
+        per_minute=args.rpm,
+        retries=args.retries,
+        hedge_percentile=args.hedge_percentile,
+        progress=progress,
+    )
+    print(format_summary(results))
+    summary = write_summary(results, args.summary or Path(args.out_root) / SUMMARY_NAME)
+    print(f"📋 Summary: {summary.resolve()}")
+    if not all(result.ok for result in results):
+        raise SystemExit(1)
+
+
+def cmd_daemon(args: argparse.Namespace) -> None:
+    from .daemon import BuildDaemon, JobQueue, run_daemon
+
+    daemon = BuildDaemon(
+        JobQueue(args.queue),
+        partial(_batch_options, args),
+        model=args.model,
+        cache_dir=args.cache_dir,
+        workers=args.workers,
+        per_minute=args.rpm,
+        retries=args.retries,
+        hedge_percentile=args.hedge_percentile,
+    )
+    run_daemon(daemon, host=args.host, port=args.port)
+
+
 def cmd_whatsapp(args: argparse.Namespace) -> None:
-    output = export_messages_json(args.input, args.output)
+    from .whatsapp import export_messages_json, follow_export
+
+    is_zip = args.input.lower().endswith(".zip")
+    if args.media_index and not is_zip:
+        raise SystemExit("❌ --media-index needs a WhatsApp export with media (.zip)")
+    if args.follow:
+        if is_zip:
+            raise SystemExit("❌ --follow reads a growing .txt export; unzip _chat.txt or parse the .zip without it")
+        output = Path(args.output or "messages.jsonl")
+        result = follow_export(args.input, output, args.checkpoint)
+        action = "Re-ingested" if result.reset else "Appended"
+        print(f"✅ {action} {len(result.appended)} message(s) to {output.resolve()}")
+        return
+    output = export_messages_json(args.input, args.output or "messages.json")
     print(f"✅ Wrote messages JSON to {output.resolve()}")
+    if args.media_index:
+        from .media import index_media, write_media_index
+
+        entries = index_media(args.input, json.loads(output.read_text(encoding="utf-8")))
+        index = write_media_index(entries, args.media_index)
+        referenced = sum(1 for entry in entries if entry.message_id is not None)
+        print(f"✅ Indexed {len(entries)} attachment(s), {referenced} referenced, in {index.resolve()}")
+
+
+def cmd_serve(args: argparse.Namespace) -> None:
+    from .serve import SiteWatcher, serve
+
+    pipelines = [name.strip() for name in args.sites.split(",") if name.strip()]
+    root = Path(args.out_root)
+    watcher = SiteWatcher(
+        args.input,
+        {name: root / name for name in pipelines},
+        state_dir=args.state_dir,
+        model=args.model,
+        options_for=lambda pipeline, out: _site_options(pipeline, args, out),
+    )
+    serve(watcher, host=args.host, port=args.port, watch=args.watch, interval=args.interval)
+
+
+def cmd_check_leaks(args: argparse.Namespace) -> None:
+    from .scrub import SecretScrubber, check_site
+
+    report = check_site(args.site, SecretScrubber.from_file(args.secrets))
+    for path, leaks in report.items():
+        print(f"❌ {path}: {', '.join(sorted(set(leaks)))}")
+    if report:
+        raise SystemExit(1)
+    print(f"✅ No known secrets found in {Path(args.site).resolve()}")
+
+
+def cmd_calibrate_prefilter(args: argparse.Namespace) -> None:
+    from .prefilter import build_prefilter, calibrate, load_labels
+
+    prefilter = build_prefilter(args.pipeline)
+    samples = load_labels(args.labels)
+    thresholds = [float(t) for t in args.thresholds.split(",")] if args.thresholds else [
+        prefilter.threshold * factor for factor in (0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0)
+    ]
+    relevant = sum(1 for _, rel in samples if rel)
+    print(f"{len(samples)} labelled chunk(s), {relevant} relevant; current threshold {prefilter.threshold:g}")
+    print(f"{'threshold':>9}  {'precision':>9}  {'recall':>6}  {'skipped':>7}")
+    for row in calibrate(prefilter, samples, thresholds):
+        print(
+            f"{row['threshold']:>9.2f}  {row['precision']:>9.1%}  {row['recall']:>6.1%}  {row['skipped']:>7.1%}"
+        )
+
+
+def _spec(pipeline: str):  # noqa: ANN202
+    module = importlib.import_module(f".{pipeline}", __package__)
+    return getattr(module, f"{pipeline.upper()}_SITE")
+
+
+def cmd_query(args: argparse.Namespace) -> None:
+    from .store import ENTITIES, KnowledgeStore
+
+    if args.entity not in ENTITIES:
+        raise SystemExit(f"❌ Unknown entity {args.entity!r}; expected one of: {', '.join(sorted(ENTITIES))}")
+    with KnowledgeStore(args.store) as store:
+        if args.export:
+            if args.band is None:
+                raise SystemExit(f"❌ --export needs --band (one of: {', '.join(store.bands())})")
+            print(json.dumps(store.export(args.band, _spec(args.export)), ensure_ascii=False, indent=2))
+            return
+        items = store.query(
+            args.entity,
+            band=args.band,
+            pipeline=args.pipeline,
+            owner=args.owner,
+            status=args.status,
+            after=args.after,
+            before=args.before,
+            message_id=args.message,
+            limit=args.limit,
+        )
+    for item in items:
+        print(json.dumps(item, ensure_ascii=False))
 
 
 def main(argv: list[str] | None = None) -> None:
@@ -66,13 +577,115 @@ def main(argv: list[str] | None = None) -> None:
     _add_common_flags(p_public)
     p_public.set_defaults(func=cmd_public)
 
-    p_whatsapp = sub.add_parser("parse-whatsapp", help="Parse WhatsApp export .txt into messages.json")
-    p_whatsapp.add_argument("--input", required=True, help="WhatsApp export .txt file")
-    p_whatsapp.add_argument("--output", default="messages.json", help="Destination JSON file")
+    p_all = sub.add_parser("all", help="Build the ops, creative and public sites into <out>/<pipeline>")
+    _add_common_flags(p_all)
+    p_all.add_argument(
+        "--unified",
+        action="store_true",
+        help="Extract each chunk once for all three sites (public share filtered by the public redaction rules)",
+    )
+    p_all.set_defaults(func=cmd_all)
+
+    p_batch = sub.add_parser("batch", help="Build the sites of many bands from a manifest on a process pool")
+    p_batch.add_argument("--manifest", required=True, help="JSON list of bands {name, messages, pipelines?, out?, ...}")
+    p_batch.add_argument("--out-root", default="sites", help="Bands without an 'out' are built into <out-root>/<band>")
+    p_batch.add_argument("--workers", type=int, default=8, help="Worker processes (builds mostly wait on the API)")
+    p_batch.add_argument(
+        "--rpm", type=float, default=None, help="Global limit on LLM requests per minute across all workers"
+    )
+    p_batch.add_argument(
+        "--cache-dir", default=".bandchat2site/llm-cache", help="LLM response cache shared by every worker"
+    )
+    p_batch.add_argument("--summary", default=None, help="Summary JSON path (default: <out-root>/batch-summary.json)")
+    p_batch.add_argument("--resume", action="store_true", help="Continue interrupted builds from their journals")
+    _add_build_flags(p_batch)
+    p_batch.set_defaults(func=cmd_batch)
+
+    p_daemon = sub.add_parser("daemon", help="Run a build daemon with a persistent, prioritized job queue")
+    p_daemon.add_argument("--queue", default=".bandchat2site/queue.sqlite", help="SQLite job queue")
+    p_daemon.add_argument("--host", default="127.0.0.1")
+    p_daemon.add_argument("--port", type=int, default=8765)
+    p_daemon.add_argument("--workers", type=int, default=4, help="Warm worker processes")
+    p_daemon.add_argument("--rpm", type=float, default=None, help="Global limit on LLM requests per minute")
+    p_daemon.add_argument("--cache-dir", default=".bandchat2site/llm-cache", help="LLM response cache")
+    p_daemon.add_argument("--resume", action="store_true", help="Continue interrupted builds from their journals")
+    _add_build_flags(p_daemon)
+    p_daemon.set_defaults(func=cmd_daemon)
+
+    p_whatsapp = sub.add_parser("parse-whatsapp", help="Parse WhatsApp export .txt or .zip into messages.json")
+    p_whatsapp.add_argument("--input", required=True, help="WhatsApp export .txt file, or .zip exported with media")
+    p_whatsapp.add_argument(
+        "--output", default=None, help="Destination JSON file (messages.json, or messages.jsonl with --follow)"
+    )
+    p_whatsapp.add_argument(
+        "--follow",
+        action="store_true",
+        help="Append only messages completed since the last run to a JSONL file, using a parse checkpoint",
+    )
+    p_whatsapp.add_argument(
+        "--checkpoint", default=None, help="Checkpoint file for --follow (default: <output stem>.checkpoint.json)"
+    )
+    p_whatsapp.add_argument(
+        "--media-index",
+        default=None,
+        help="With a .zip: write a JSON index of its attachments (name, size, kind, message id) without extracting",
+    )
     p_whatsapp.set_defaults(func=cmd_whatsapp)
 
+    p_serve = sub.add_parser("serve", help="Serve the sites locally, rebuilding when the export changes")
+    p_serve.add_argument("--input", required=True, help="WhatsApp export .txt or messages.json")
+    p_serve.add_argument("--sites", default="ops,creative,public", help="Comma-separated pipelines to build")
+    p_serve.add_argument("--out-root", default="site", help="Each site is built into <out-root>/<pipeline>")
+    p_serve.add_argument("--state-dir", default=".bandchat2site", help="Parse offsets and LLM cache live here")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8000)
+    p_serve.add_argument("--watch", action="store_true", help="Rebuild and live-reload when the input changes")
+    p_serve.add_argument("--interval", type=float, default=1.0, help="Seconds between input checks")
+    _add_build_flags(p_serve)
+    p_serve.set_defaults(func=cmd_serve)
+
+    p_calibrate = sub.add_parser(
+        "calibrate-prefilter", help="Report prefilter precision/recall against labelled chunks"
+    )
+    p_calibrate.add_argument("--pipeline", required=True, choices=PIPELINES)
+    p_calibrate.add_argument(
+        "--labels", required=True, help='JSONL of {"messages": [{"text": ...}] or "texts": [...], "relevant": bool}'
+    )
+    p_calibrate.add_argument("--thresholds", default=None, help="Comma-separated thresholds to evaluate")
+    p_calibrate.set_defaults(func=cmd_calibrate_prefilter)
+
+    p_query = sub.add_parser("query", help="Query a SQLite knowledge store built with --store")
+    p_query.add_argument("--store", required=True, help="SQLite knowledge store")
+    p_query.add_argument("--entity", default="tasks", help="gigs, rehearsals, tasks, songs, shows, decisions, ...")
+    p_query.add_argument("--band", default=None)
+    p_query.add_argument("--pipeline", choices=PIPELINES, default=None)
+    p_query.add_argument("--owner", default=None)
+    p_query.add_argument("--status", default=None)
+    p_query.add_argument("--after", default=None, help="Items dated on or after this ISO date")
+    p_query.add_argument("--before", default=None, help="Items dated on or before this ISO date")
+    p_query.add_argument("--message", type=int, default=None, help="Items citing this message id")
+    p_query.add_argument("--limit", type=int, default=None)
+    p_query.add_argument(
+        "--export", choices=PIPELINES, default=None, help="Print the knowledge.json of --band for a pipeline"
+    )
+    p_query.set_defaults(func=cmd_query)
+
+    p_leaks = sub.add_parser("check-leaks", help="Scan a generated site for known secrets")
+    p_leaks.add_argument("--site", required=True, help="Generated site directory")
+    p_leaks.add_argument("--secrets", required=True, help="Secrets file (one string per line, or a JSON list)")
+    p_leaks.set_defaults(func=cmd_check_leaks)
+
     args = parser.parse_args(argv)
-    args.func(args)
+    if hasattr(args, "retries"):
+        _configure_llm(args)
+    try:
+        args.func(args)
+    except RuntimeError as exc:
+        from .journal import JournalMismatchError
+
+        if isinstance(exc, JournalMismatchError):
+            raise SystemExit(f"❌ {exc}") from exc
+        raise
 
 
 if __name__ == "__main__":
@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
+from typing import Collection
 
-from .html import md_to_html_basic, write_html_page
 from .llm import call_llm_json, call_llm_text
-from .messages import chunk_messages, ensure_ids, redact_contacts
+from .messages import CONTACT_REDACTOR
+from .pipeline import SiteSpec, build_site, extract_system, omit_sections
+from .redact import Redactor
+from .scrub import SecretScrubber
 
 CREATIVE_SCHEMA = {
     "type": "object",
@@ -100,18 +103,24 @@ CREATIVE_EMPTY = {
     "open_questions": [],
 }
 
-CREATIVE_EXTRACT_SYSTEM = """You extract creative band info (songs/arrangements/recordings) from chat.
+CREATIVE_EXTRACT_RULES = """You extract creative band info (songs/arrangements/recordings) from chat.
 Rules:
 - ONLY use facts in messages. If unsure, omit.
 - sources are message IDs.
 - Do not output private contacts (redacted).
 Return STRICT JSON with exactly these keys:
-songs[{title,status(idea|in_progress|ready|parked)?,key?,tempo_bpm?,structure_notes?,parts_notes?,lyrics_notes?,todo[],links[],sources[]}],
-setlists[{name?,context?,songs[],notes?,sources[]}],
-recordings[{title?,url,notes?,sources[]}],
-decisions[{date?,decision,sources[]}],
-open_questions[{question,sources[]}]
 """
+CREATIVE_EXTRACT_KEYS = {
+    "songs": (
+        "songs[{title,status(idea|in_progress|ready|parked)?,key?,tempo_bpm?,structure_notes?,parts_notes?,"
+        "lyrics_notes?,todo[],links[],sources[]}]"
+    ),
+    "setlists": "setlists[{name?,context?,songs[],notes?,sources[]}]",
+    "recordings": "recordings[{title?,url,notes?,sources[]}]",
+    "decisions": "decisions[{date?,decision,sources[]}]",
+    "open_questions": "open_questions[{question,sources[]}]",
+}
+CREATIVE_EXTRACT_SYSTEM = extract_system(CREATIVE_EXTRACT_RULES, CREATIVE_EXTRACT_KEYS)
 
 CREATIVE_WRITE_SYSTEM = """Write clean creative-band hub webpages in Markdown.
 Rules:
@@ -121,13 +130,21 @@ Rules:
 """
 
 
-def _sanitize_creative(text: str) -> str:
-    return redact_contacts(text)
-
-
-def extract_creative(chunk: list[dict], *, model: str | None = None, llm_json=call_llm_json) -> dict:
+def extract_creative(
+    chunk: list[dict],
+    *,
+    model: str | None = None,
+    llm_json=call_llm_json,
+    redactor: Redactor | None = None,
+    scrubber: SecretScrubber | None = None,
+    omit: Collection[str] = (),
+) -> dict:
+    """Extract one chunk; sections in ``omit`` are left out of the prompt and schema."""
+    texts = (redactor or CONTACT_REDACTOR).redact_many([m["text"] for m in chunk])
+    if scrubber is not None:
+        texts = scrubber.scrub_many(texts)
     transcript = "\n".join(
-        f"[{m['id']}] {m['ts']} {m['author']}: {_sanitize_creative(m['text'])}" for m in chunk
+        f"[{m['id']}] {m['ts']} {m['author']}: {text}" for m, text in zip(chunk, texts)
     )
     user = f"""Extract creative info from these messages.
 
@@ -135,10 +152,14 @@ MESSAGES:
 {transcript}
 
 Return STRICT JSON only. If nothing found, return:
-{json.dumps(CREATIVE_EMPTY)}
+{json.dumps({key: value for key, value in CREATIVE_EMPTY.items() if key not in omit})}
 """
     return llm_json(
-        CREATIVE_EXTRACT_SYSTEM, user, CREATIVE_SCHEMA, model=model, name="creative_extract"
+        extract_system(CREATIVE_EXTRACT_RULES, CREATIVE_EXTRACT_KEYS, omit),
+        user,
+        omit_sections(CREATIVE_SCHEMA, omit),
+        model=model,
+        name="creative_extract",
     )
 
 
@@ -169,6 +190,43 @@ Return Markdown only.
     return llm_text(CREATIVE_WRITE_SYSTEM, user, model=model)
 
 
+CREATIVE_SITE = SiteSpec(
+    name="creative",
+    empty=CREATIVE_EMPTY,
+    extract=extract_creative,
+    merge=merge_creative,
+    write_page=write_creative_page,
+    pages=(
+        ("index", "Home"),
+        ("songs", "Songs"),
+        ("setlists", "Setlists"),
+        ("recordings", "Recordings"),
+        ("decisions", "Decisions"),
+        ("review", "Review"),
+    ),
+    redactor=CONTACT_REDACTOR,
+    min_gap_minutes=240,
+    page_keys={
+        "index": ("songs", "setlists", "recordings"),
+        "songs": ("songs",),
+        "setlists": ("setlists",),
+        "recordings": ("recordings",),
+        "decisions": ("decisions",),
+    },
+    prompts=(CREATIVE_EXTRACT_SYSTEM, CREATIVE_WRITE_SYSTEM, json.dumps(CREATIVE_SCHEMA, sort_keys=True)),
+    schema=CREATIVE_SCHEMA,
+    identity={
+        "songs": ("title",),
+        "setlists": ("name",),
+        "recordings": ("url",),
+        "decisions": ("decision",),
+        "open_questions": ("question",),
+    },
+    media_section="recordings",
+    link_sections={"recordings": ("audio", "video", "storage")},
+)
+
+
 def build_creative_site(
     messages: list[dict],
     out_dir: Path,
@@ -177,29 +235,9 @@ def build_creative_site(
     model: str | None = None,
     llm_text=call_llm_text,
     llm_json=call_llm_json,
+    **options,
 ) -> Path:
-    msgs = ensure_ids(messages)
-    chunks = chunk_messages(msgs, max_chars=12000, min_gap_minutes=240, sanitize=_sanitize_creative)
-
-    knowledge = json.loads(json.dumps(CREATIVE_EMPTY))
-    for ch in chunks:
-        knowledge = merge_creative(knowledge, extract_creative(ch, model=model, llm_json=llm_json))
-
-    out_dir.mkdir(parents=True, exist_ok=True)
-    (out_dir / "knowledge.json").write_text(json.dumps(knowledge, ensure_ascii=False, indent=2), encoding="utf-8")
-
-    pages = [
-        ("index", "Home"),
-        ("songs", "Songs"),
-        ("setlists", "Setlists"),
-        ("recordings", "Recordings"),
-        ("decisions", "Decisions"),
-        ("review", "Review"),
-    ]
-    nav = [(label, f"{slug}.html") for slug, label in pages]
-
-    for slug, _ in pages:
-        md = write_creative_page(slug, knowledge, model=model, llm_text=llm_text)
-        write_html_page(out_dir, title, nav, slug, md_to_html_basic(md))
-
-    return out_dir
+    """Build the creative site; ``options`` are passed through to :func:`~bandchat2site.pipeline.build_site`."""
+    return build_site(
+        CREATIVE_SITE, messages, out_dir, title=title, model=model, llm_text=llm_text, llm_json=llm_json, **options
+    )
@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Iterator, Mapping
+
+from .batch import DEFAULT_TITLES, BandJob, JobResult, init_worker, run_job
+from .llm import call_llm_json, call_llm_text
+from .resilience import RateLimiter
+from .serve import BUILDERS
+
+PRIORITIES = {"interactive": 0, "bulk": 10}
+STATS_WINDOW = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    band TEXT NOT NULL,
+    pipeline TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    spec TEXT NOT NULL,
+    enqueued REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    coalesced INTEGER NOT NULL DEFAULT 0,
+    result TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_pending ON jobs (band, pipeline) WHERE state = 'pending';
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, priority, enqueued);
+CREATE INDEX IF NOT EXISTS jobs_band ON jobs (band, started);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished);
+"""
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class JobQueue:
+    """Persistent build queue in SQLite.
+
+    Lower ``priority`` runs first (``PRIORITIES``: interactive rebuilds before
+    nightly bulk work). Within a priority, the band served least recently goes
+    next, so one band's backlog cannot starve the others, and a band never has
+    two builds running at once. Enqueueing a band and pipeline that already has
+    a pending job coalesces into it (keeping the more urgent priority and the
+    newer job settings) instead of queueing a duplicate. Jobs left running by a
+    crashed daemon are pending again when the queue is reopened.
+    """
+
+    def __init__(self, path: str | Path, *, clock: Callable[[], float] = time.time):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.clock = clock
+        self.db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        with self._transaction():
+            self.db.execute(
+                "DELETE FROM jobs WHERE state = 'running' AND EXISTS (SELECT 1 FROM jobs p WHERE p.state = 'pending'"
+                " AND p.band = jobs.band AND p.pipeline = jobs.pipeline)"
+            )
+            self.db.execute("UPDATE jobs SET state = 'pending', started = NULL WHERE state = 'running'")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self.db.execute("COMMIT")
+
+    def close(self) -> None:
+        self.db.close()
+
+    def enqueue(self, job: BandJob, *, priority: int | str = "bulk") -> tuple[int, bool]:
+        """Queue ``job``; return its id and whether it was coalesced into a pending one."""
+        if isinstance(priority, str):
+            if priority not in PRIORITIES:
+                raise ValueError(f"Unknown priority {priority!r}; expected one of {sorted(PRIORITIES)} or an int")
+            priority = PRIORITIES[priority]
+        if job.pipeline not in BUILDERS:
+            raise ValueError(f"Unknown pipeline {job.pipeline!r}; expected one of {sorted(BUILDERS)}")
+        spec = json.dumps(
+            {"messages": str(job.messages), "out": str(job.out), "title": job.title, "settings": dict(job.settings)}
+        )
+        with self._transaction():
+            row = self.db.execute(
+                "SELECT id FROM jobs WHERE state = 'pending' AND band = ? AND pipeline = ?", (job.band, job.pipeline)
+            ).fetchone()
+            if row is not None:
+                self.db.execute(
+                    "UPDATE jobs SET priority = MIN(priority, ?), spec = ?, coalesced = coalesced + 1 WHERE id = ?",
+                    (priority, spec, row["id"]),
+                )
+            else:
+                cursor = self.db.execute(
+                    "INSERT INTO jobs (band, pipeline, priority, spec, enqueued) VALUES (?, ?, ?, ?, ?)",
+                    (job.band, job.pipeline, priority, spec, self.clock()),
+                )
+        return (row["id"], True) if row is not None else (cursor.lastrowid, False)
+
+    def claim(self) -> tuple[int, BandJob] | None:
+        """Mark the next job running and return it, or ``None`` if nothing is runnable."""
+        with self._transaction():
+            row = self.db.execute(
+                """
+                SELECT j.* FROM jobs j
+                WHERE j.state = 'pending'
+                  AND NOT EXISTS (SELECT 1 FROM jobs r WHERE r.state = 'running' AND r.band = j.band)
+                ORDER BY j.priority,
+                         (SELECT MAX(s.started) FROM jobs s WHERE s.band = j.band) IS NOT NULL,
+                         (SELECT MAX(s.started) FROM jobs s WHERE s.band = j.band),
+                         j.enqueued
+                LIMIT 1
+                """
+            ).fetchone()
+            if row is not None:
+                now = self.clock()
+                self.db.execute("UPDATE jobs SET state = 'running', started = ? WHERE id = ?", (now, row["id"]))
+        if row is None:
+            return None
+        spec = json.loads(row["spec"])
+        job = BandJob(
+            row["band"], row["pipeline"], Path(spec["messages"]), Path(spec["out"]), spec["title"], spec["settings"]
+        )
+        return row["id"], job
+
+    def finish(self, job_id: int, result: JobResult) -> None:
+        with self._lock:
+            self.db.execute(
+                "UPDATE jobs SET state = ?, finished = ?, result = ? WHERE id = ?",
+                ("done" if result.ok else "failed", self.clock(), json.dumps(asdict(result)), job_id),
+            )
+
+    def get(self, job_id: int) -> dict | None:
+        with self._lock:
+            row = self.db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {key: row[key] for key in ("id", "band", "pipeline", "priority", "state", "coalesced")}
+        job["enqueued"], job["started"], job["finished"] = row["enqueued"], row["started"], row["finished"]
+        job["result"] = json.loads(row["result"]) if row["result"] else None
+        return job
+
+    def stats(self) -> dict:
+        """Queue depth per priority, running jobs, and wait/latency percentiles of recent jobs."""
+        now = self.clock()
+        with self._lock:
+            depth = self.db.execute(
+                "SELECT priority, COUNT(*) AS n, MIN(enqueued) AS oldest FROM jobs WHERE state = 'pending'"
+                " GROUP BY priority"
+            ).fetchall()
+            counts = dict(self.db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+            coalesced = self.db.execute("SELECT COALESCE(SUM(coalesced), 0) FROM jobs").fetchone()[0]
+            recent = self.db.execute(
+                "SELECT enqueued, started, finished FROM jobs WHERE finished IS NOT NULL ORDER BY finished DESC"
+                " LIMIT ?",
+                (STATS_WINDOW,),
+            ).fetchall()
+        waits = [row["started"] - row["enqueued"] for row in recent]
+        latencies = [row["finished"] - row["started"] for row in recent]
+        return {
+            "depth": {str(row["priority"]): row["n"] for row in depth},
+            "pending": sum(row["n"] for row in depth),
+            "oldest_pending_seconds": max((now - row["oldest"] for row in depth), default=0.0),
+            "running": counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "coalesced": coalesced,
+            "wait_seconds": {"p50": _percentile(waits, 50), "p95": _percentile(waits, 95)},
+            "latency_seconds": {"p50": _percentile(latencies, 50), "p95": _percentile(latencies, 95)},
+        }
+
+
+class BuildDaemon:
+    """Runs queued builds on warm worker processes until stopped.
+
+    The worker pool is started once (see ``batch.init_worker``), so API clients,
+    the resilience policy and the shared LLM cache stay warm between jobs; the
+    dispatcher thread claims jobs from the :class:`JobQueue` whenever a worker is
+    free and records each :class:`JobResult` when it finishes.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        options_for: Callable[[BandJob], dict],
+        *,
+        model: str | None = None,
+        cache_dir: str | Path = ".bandchat2site/llm-cache",
+        workers: int = 4,
+        per_minute: float | None = None,
+        retries: int = 4,
+        hedge_percentile: float | None = None,
+        llm_text=call_llm_text,
+        llm_json=call_llm_json,
+        poll: float = 1.0,
+    ):
+        self.queue = queue
+        self.options_for = options_for
+        self.model = model
+        self.cache_dir = cache_dir
+        self.workers = max(1, workers)
+        self.llm_text = llm_text
+        self.llm_json = llm_json
+        self.poll = poll
+        limiter = RateLimiter(per_minute) if per_minute else None
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=init_worker, initargs=(limiter, retries, hedge_percentile)
+        )
+        self._free = threading.Semaphore(self.workers)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._dispatch, name="build-dispatch", daemon=True)
+
+    def start(self) -> "BuildDaemon":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self.pool.shutdown(wait=True)
+
+    def submit(self, job: BandJob, *, priority: int | str = "bulk") -> tuple[int, bool]:
+        queued = self.queue.enqueue(job, priority=priority)
+        self._wake.set()
+        return queued
+
+    def _dispatch(self) -> None:
+        while not self._stop.is_set():
+            self._free.acquire()
+            claimed = None if self._stop.is_set() else self.queue.claim()
+            if claimed is None:
+                self._free.release()
+                self._wake.wait(self.poll)
+                self._wake.clear()
+                continue
+            job_id, job = claimed
+            future = self.pool.submit(
+                run_job,
+                job,
+                self.options_for,
+                model=self.model,
+                cache_dir=self.cache_dir,
+                llm_text=self.llm_text,
+                llm_json=self.llm_json,
+            )
+            future.add_done_callback(lambda done, job_id=job_id, job=job: self._finished(job_id, job, done))
+
+    def _finished(self, job_id: int, job: BandJob, future: Future) -> None:
+        try:
+            result = future.result()
+        except Exception as exc:  # the worker process died
+            result = JobResult(job.band, job.pipeline, str(job.out), ok=False, seconds=0.0, error=repr(exc))
+        self.queue.finish(job_id, result)
+        self._free.release()
+        self._wake.set()
+
+
+def job_from_request(body: Mapping) -> tuple[list[BandJob], int | str]:
+    """Jobs of a ``POST /jobs`` body: ``{band, messages, out, pipelines?, titles?, priority?, settings?}``."""
+    if not isinstance(body, Mapping):
+        raise ValueError("request body must be a JSON object")
+    for key in ("band", "messages", "out"):
+        if not isinstance(body.get(key), str):
+            raise ValueError(f"'{key}' is required")
+    pipelines = body.get("pipelines") or [body.get("pipeline") or "ops"]
+    if not isinstance(pipelines, list) or not all(isinstance(pipeline, str) for pipeline in pipelines):
+        raise ValueError("'pipelines' must be a list of pipeline names")
+    titles = body.get("titles") or {}
+    settings = body.get("settings") or {}
+    for key, value in (("titles", titles), ("settings", settings)):
+        if not isinstance(value, Mapping):
+            raise ValueError(f"'{key}' must be an object")
+    jobs = [
+        BandJob(
+            body["band"],
+            pipeline,
+            Path(body["messages"]),
+            Path(body["out"]) / pipeline,
+            titles.get(pipeline) or DEFAULT_TITLES.get(pipeline, "{name}").format(name=body["band"]),
+            settings,
+        )
+        for pipeline in pipelines
+    ]
+    return jobs, body.get("priority", "interactive")
+
+
+def _make_handler(daemon: BuildDaemon):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format: str, *args) -> None:  # noqa: A002 - BaseHTTPRequestHandler API
+            pass
+
+        def _json(self, status: int, payload: object) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:  # noqa: N802 - BaseHTTPRequestHandler API
+            if self.path == "/metrics":
+                self._json(200, daemon.queue.stats())
+                return
+            if self.path.startswith("/jobs/") and self.path[6:].isdigit():
+                job = daemon.queue.get(int(self.path[6:]))
+                self._json(200 if job else 404, job or {"error": "no such job"})
+                return
+            self._json(404, {"error": "not found"})
+
+        def do_POST(self) -> None:  # noqa: N802 - BaseHTTPRequestHandler API
+            if self.path != "/jobs":
+                self._json(404, {"error": "not found"})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                jobs, priority = job_from_request(body)
+                queued = [daemon.submit(job, priority=priority) for job in jobs]
+            except (ValueError, TypeError, KeyError) as exc:
+                error = str(exc) if isinstance(exc, ValueError) else f"invalid request: {type(exc).__name__}: {exc}"
+                self._json(400, {"error": error})
+                return
+            self._json(202, {"jobs": [{"id": job_id, "coalesced": merged} for job_id, merged in queued]})
+
+    return Handler
+
+
+def make_server(daemon: BuildDaemon, *, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """HTTP endpoint: ``POST /jobs`` to enqueue, ``GET /jobs/<id>`` for status, ``GET /metrics``."""
+    return ThreadingHTTPServer((host, port), _make_handler(daemon))
+
+
+def run_daemon(daemon: BuildDaemon, *, host: str = "127.0.0.1", port: int = 8765) -> None:
+    server = make_server(daemon, host=host, port=port)
+    daemon.start()
+    print(f"🛠️  Build daemon listening on http://{host}:{server.server_address[1]}/ ({daemon.workers} worker(s))")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.stop()
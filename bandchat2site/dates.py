@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Mapping, Sequence
+
+WEEKDAYS = {
+    "mon": 0, "monday": 0, "tue": 1, "tues": 1, "tuesday": 1, "wed": 2, "weds": 2, "wednesday": 2,
+    "thu": 3, "thur": 3, "thurs": 3, "thursday": 3, "fri": 4, "friday": 4, "sat": 5, "saturday": 5,
+    "sun": 6, "sunday": 6,
+}
+MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4, "may": 5,
+    "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8, "sep": 9, "sept": 9, "september": 9,
+    "oct": 10, "october": 10, "nov": 11, "november": 11, "dec": 12, "december": 12,
+}
+RELATIVE_DAYS = {"today": 0, "tonight": 0, "tomorrow": 1, "tmrw": 1, "tmr": 1, "tmw": 1, "yesterday": -1}
+NUMBER_WORDS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6}
+# A day and month without a year is taken as the first such date from this many days
+# before the message on, so "3 Jan" said in December is next January.
+GRACE_DAYS = 60
+PAGE_UPCOMING = 3
+
+_MONTH = "|".join(sorted(MONTHS, key=len, reverse=True))
+_WEEKDAY = "|".join(sorted(WEEKDAYS, key=len, reverse=True))
+_ORD = r"(?:st|nd|rd|th)?"
+_ISO = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_SLASH = re.compile(r"(?<![\d/])(\d{1,2})/(\d{1,2})(?:/(\d{2}|\d{4}))?(?![\d/])")
+_DOTTED = re.compile(r"(?<![\d.])(\d{1,2})\.(\d{1,2})\.(\d{2}|\d{4})?(?!\d)")
+_DAY_MONTH = re.compile(rf"\b(\d{{1,2}}){_ORD}(?:\s+of)?\s+({_MONTH})\b\.?(?:,?\s+(\d{{4}}))?", re.I)
+_MONTH_DAY = re.compile(rf"\b({_MONTH})\.?\s+(\d{{1,2}}){_ORD}\b(?:,?\s+(\d{{4}}))?", re.I)
+_RELATIVE = re.compile(r"\b(day after tomorrow|today|tonight|tomorrow|tmrw|tmr|tmw|yesterday)\b", re.I)
+_IN_DAYS = re.compile(r"\bin\s+(\d+|a|an|one|two|three|four|five|six)\s+(day|week)s?\b", re.I)
+_WEEKDAY_RE = re.compile(rf"\b(?:(next|this|on)\s+)?({_WEEKDAY})\b\.?", re.I)
+
+_MERIDIEM = r"(a\.?m\.?|p\.?m\.?)"
+_RANGE = re.compile(rf"\b(\d{{1,2}})(?:[:.](\d{{2}}))?\s*(?:-|–|to)\s*\d{{1,2}}(?:[:.]\d{{2}})?\s*{_MERIDIEM}", re.I)
+_TWELVE = re.compile(rf"\b(\d{{1,2}})(?:[:.](\d{{2}}))?\s*{_MERIDIEM}(?!\w)", re.I)
+_CLOCK = re.compile(r"(?<![\d.:/])(\d{1,2})[:.h](\d{2})(?![\d.:/])")
+_HALF = re.compile(r"\bhalf\s+(\d{1,2})\b", re.I)
+_NAMED = re.compile(r"\b(noon|midday|midnight)\b", re.I)
+_HOUR = re.compile(r"(?:\b(?:at|from|around)\s+|@\s*|~\s*)(\d{1,2})\b|\b(\d{1,2})\s*(?:-?ish|o'?clock)\b", re.I)
+_BARE_HOUR = re.compile(r"^\D{0,3}(\d{1,2})\D{0,6}$")
+_APPROXIMATE = re.compile(r"ish\b|~|\b(?:around|approx|roughly|about)\b|\?", re.I)
+
+
+def _year(year: str | None) -> int | None:
+    if not year:
+        return None
+    return int(year) + 2000 if len(year) == 2 else int(year)
+
+
+def _on_or_after(month: int, day: int, year: int | None, reference: date) -> date | None:
+    """``month``/``day`` in ``year``, or else the first such date from ``GRACE_DAYS`` before ``reference`` on."""
+    try:
+        if year is not None:
+            return date(year, month, day)
+        earliest = reference - timedelta(days=GRACE_DAYS)
+        for candidate_year in (reference.year - 1, reference.year, reference.year + 1):
+            candidate = date(candidate_year, month, day)
+            if candidate >= earliest:
+                return candidate
+    except ValueError:
+        return None
+    return None
+
+
+def resolve_date(text: str, reference: date, *, dayfirst: bool = False) -> date | None:
+    """The calendar date ``text`` means when written on ``reference``, or ``None``.
+
+    Understands ISO and numeric dates (``12/5``, ``12/5/24``, ``12.5.``), day and
+    month names (``May 12th``, ``12 of May``), ``today``/``tonight``/``tomorrow``,
+    ``in 3 days``/``in two weeks`` and weekdays (``fri``, ``next Friday``: the
+    first one after ``reference``; ``this fri`` may be ``reference`` itself).
+    Numeric dates are month first like the WhatsApp parser unless ``dayfirst``.
+    """
+    if match := _ISO.search(text):
+        return _on_or_after(int(match.group(2)), int(match.group(3)), int(match.group(1)), reference)
+    for pattern in (_SLASH, _DOTTED):
+        if match := pattern.search(text):
+            first, second = int(match.group(1)), int(match.group(2))
+            dotted = pattern is _DOTTED
+            day, month = (first, second) if dayfirst or dotted or first > 12 else (second, first)
+            return _on_or_after(month, day, _year(match.group(3)), reference)
+    if match := _DAY_MONTH.search(text):
+        return _on_or_after(MONTHS[match.group(2).lower()], int(match.group(1)), _year(match.group(3)), reference)
+    if match := _MONTH_DAY.search(text):
+        return _on_or_after(MONTHS[match.group(1).lower()], int(match.group(2)), _year(match.group(3)), reference)
+    if match := _RELATIVE.search(text):
+        word = match.group(1).lower()
+        return reference + timedelta(days=2 if word == "day after tomorrow" else RELATIVE_DAYS[word])
+    if match := _IN_DAYS.search(text):
+        count = match.group(1).lower()
+        days = int(count) if count.isdigit() else NUMBER_WORDS[count]
+        return reference + timedelta(days=days * (7 if match.group(2).lower() == "week" else 1))
+    if match := _WEEKDAY_RE.search(text):
+        ahead = (WEEKDAYS[match.group(2).lower()] - reference.weekday()) % 7
+        if ahead == 0 and (match.group(1) or "").lower() != "this":
+            ahead = 7
+        return reference + timedelta(days=ahead)
+    return None
+
+
+def _hour(hour: int, minute: int, meridiem: str | None) -> time | None:
+    if meridiem is not None:
+        pm = meridiem.lower().startswith("p")
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if pm else 0)
+    elif 1 <= hour <= 11:
+        hour += 12  # band plans are evening plans: "7ish" is 19:00
+    try:
+        return time(hour, minute)
+    except ValueError:
+        return None
+
+
+def resolve_time(text: str, *, bare: bool = False) -> time | None:
+    """The time of day in ``text`` (``7pm``, ``19:30``, ``7-10pm``, ``half 7``, ``7ish``, ``at 8``, ``noon``).
+
+    Hours from 1 to 11 without am/pm are taken as evening hours. With ``bare`` a
+    lone number (the whole of a ``time`` field such as ``"7"``) is an hour too.
+    """
+    for pattern in (_RANGE, _TWELVE):
+        if match := pattern.search(text):
+            return _hour(int(match.group(1)), int(match.group(2) or 0), match.group(3))
+    if match := _CLOCK.search(text):
+        hour, minute = int(match.group(1)), int(match.group(2))
+        return _hour(hour, minute, None) if hour < 12 else time(hour, minute) if hour < 24 and minute < 60 else None
+    if match := _HALF.search(text):
+        return _hour(int(match.group(1)), 30, None)
+    if match := _NAMED.search(text):
+        return time(0, 0) if match.group(1).lower() == "midnight" else time(12, 0)
+    match = _HOUR.search(text) or (_BARE_HOUR.match(text.strip()) if bare else None)
+    if match:
+        hour = int(next(group for group in match.groups() if group))
+        return _hour(hour, 0, None) if hour < 12 else time(hour, 0) if hour < 24 else None
+    return None
+
+
+@dataclass(frozen=True)
+class Event:
+    """One rehearsal, gig or show item with its resolved date and time (``None`` if unknown)."""
+
+    kind: str
+    day: date | None
+    at: time | None
+    approximate: bool
+    item: Mapping
+
+    @property
+    def key(self) -> tuple[date, time]:
+        return (self.day or date.min, self.at or time.min)
+
+    def to_json(self, today: date) -> dict:
+        return {
+            "kind": self.kind,
+            "date": self.day.isoformat() if self.day else None,
+            "time": self.at.strftime("%H:%M") if self.at else None,
+            "approximate": self.approximate,
+            "upcoming": self.day >= today if self.day else None,
+            "item": self.item,
+        }
+
+
+class EventIndex:
+    """Dated events kept sorted per kind, so the next, upcoming and past ones are a bisect away."""
+
+    def __init__(self, events: Iterable[Event]):
+        events = list(events)
+        self.undated = [event for event in events if event.day is None]
+        dated = sorted((event for event in events if event.day is not None), key=lambda event: event.key)
+        self._events: dict[str | None, list[Event]] = {None: dated}
+        for event in dated:
+            self._events.setdefault(event.kind, []).append(event)
+        self._keys = {kind: [event.key for event in items] for kind, items in self._events.items()}
+
+    def __len__(self) -> int:
+        return len(self._events[None]) + len(self.undated)
+
+    def _split(self, today: date, kind: str | None) -> int:
+        return bisect_left(self._keys.get(kind, []), (today, time.min))
+
+    def upcoming(self, today: date, kind: str | None = None) -> list[Event]:
+        """Events from ``today`` on, soonest first."""
+        return self._events.get(kind, [])[self._split(today, kind):]
+
+    def past(self, today: date, kind: str | None = None) -> list[Event]:
+        """Events before ``today``, latest first."""
+        return self._events.get(kind, [])[: self._split(today, kind)][::-1]
+
+    def next(self, today: date, kind: str | None = None) -> Event | None:
+        events, index = self._events.get(kind, []), self._split(today, kind)
+        return events[index] if index < len(events) else None
+
+    def to_json(self, today: date) -> dict:
+        return {
+            "events": [event.to_json(today) for event in self._events[None]],
+            "undated": [event.to_json(today) for event in self.undated],
+        }
+
+
+def message_times(messages: Iterable[Mapping]) -> dict:
+    """Message id -> timestamp, for the messages whose ``ts`` parses."""
+    stamps = {}
+    for m in messages:
+        try:
+            stamps[m["id"]] = datetime.fromisoformat(m["ts"])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return stamps
+
+
+def _reference(item: Mapping, stamps: Mapping) -> datetime | None:
+    seen = [stamps[i] for i in item.get("sources") or () if i in stamps]
+    return min(seen) if seen else None
+
+
+class DateResolver:
+    """Resolves the free-form ``date``/``time`` of event items and indexes them.
+
+    :meth:`index` reads each item of the ``sections`` given (rehearsals, gigs,
+    shows) relative to the timestamp of its first source message, rewrites
+    ``date`` and ``time`` as ``YYYY-MM-DD`` and ``HH:MM`` where they resolve (the
+    date as written is kept in ``date_text``) and returns an :class:`EventIndex`.
+    :meth:`page_view` then hands a page writer those sections already split into
+    upcoming and past (or, on the home page, just the next and the few after it)
+    as of ``today``, so the model no longer works out dates or order and the page
+    only changes when an event passes.
+    """
+
+    def __init__(self, *, today: date | None = None, dayfirst: bool = False):
+        self.today = today or date.today()
+        self.dayfirst = dayfirst
+        self.events: EventIndex = EventIndex(())
+        self.resolved = 0
+        self.unresolved = 0
+
+    def _day(self, item: dict, reference: date) -> date | None:
+        """Resolve ``item["date"]`` in place; the text as written moves to ``date_text``."""
+        text = str(item.get("date") or "")
+        day = resolve_date(text, reference, dayfirst=self.dayfirst) if text else None
+        if day is not None and day.isoformat() != text:
+            item.setdefault("date_text", text)
+            item["date"] = day.isoformat()
+        return day
+
+    def resolve(self, kind: str, item: dict, reference: datetime | None) -> Event:
+        time_text = str(item.get("time") or "")
+        day = self._day(item, reference.date() if reference is not None else self.today)
+        day_text = str(item.get("date_text") or item.get("date") or "")
+        at = resolve_time(time_text, bare=True) if time_text else resolve_time(day_text) if day_text else None
+        if day is not None:
+            self.resolved += 1
+        elif day_text:
+            self.unresolved += 1
+        if at is not None:
+            item["time"] = at.strftime("%H:%M")
+        approximate = bool(_APPROXIMATE.search(f"{day_text} {time_text}"))
+        return Event(kind, day, at, approximate, item)
+
+    def anchor(self, knowledge: Mapping, sections: Sequence[str], messages: Iterable[Mapping]) -> None:
+        """Rewrite event dates as ``YYYY-MM-DD`` against their first source message.
+
+        Run on each chunk extraction (with the chunk's ``messages``) before reduction
+        and the knowledge store, so events are identified by the day they fall on
+        rather than by words such as "Friday". Items without a timestamped source
+        are left as written.
+        """
+        stamps = message_times(messages)
+        for section in sections:
+            for item in knowledge.get(section, []):
+                reference = _reference(item, stamps)
+                if reference is not None:
+                    self._day(item, reference.date())
+
+    def index(self, knowledge: Mapping, sections: Sequence[str], messages: Iterable[Mapping]) -> EventIndex:
+        stamps = message_times(messages)
+        events = []
+        for section in sections:
+            for item in knowledge.get(section, []):
+                events.append(self.resolve(section, item, _reference(item, stamps)))
+        self.events = EventIndex(events)
+        return self.events
+
+    def page_view(self, knowledge: Mapping, sections: Sequence[str], *, home: bool = False) -> dict:
+        """``knowledge`` (a page's slice) with each event section split around ``today``."""
+        view = dict(knowledge)
+        for section in sections:
+            if section not in view:
+                continue
+            upcoming = [event.item for event in self.events.upcoming(self.today, section)]
+            if home:
+                view[section] = {"next": upcoming[0] if upcoming else None, "upcoming": upcoming[1:PAGE_UPCOMING]}
+                continue
+            view[section] = {
+                "upcoming": upcoming,
+                "past": [event.item for event in self.events.past(self.today, section)],
+                "undated": [event.item for event in self.events.undated if event.kind == section],
+            }
+        return view
+
+    def summary(self) -> str:
+        upcoming = len(self.events.upcoming(self.today))
+        return (
+            f"{self.resolved} date(s) resolved, {self.unresolved} left as written; "
+            f"{len(self.events)} event(s), {upcoming} upcoming as of {self.today.isoformat()}"
+        )
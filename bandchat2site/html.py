@@ -1,67 +1,307 @@
 from __future__ import annotations
 
+import io
+import os
+import re
 from pathlib import Path
+from typing import Callable
+
+from .output import SiteWriter, write_atomic
+
+SITE_CSS = """body{font-family:system-ui,Segoe UI,Arial,sans-serif;margin:0}
+header{padding:16px 18px;border-bottom:1px solid #ccc;position:sticky;top:0;background:#fff}
+main{max-width:980px;margin:0 auto;padding:18px}
+nav a{margin-right:10px;text-decoration:none}
+h2{margin-top:22px}
+.card{border:1px solid #ddd;border-radius:14px;padding:12px 14px;margin:12px 0}
+#site-search{margin-top:8px;padding:6px 10px;width:100%;max-width:320px}
+#archive .card{white-space:pre-wrap}
+small{opacity:.7}
+"""
+
+_ESCAPE_CHARS = re.compile(r"[&<>\"]")
+
+_HEADING = re.compile(r"(#{1,6})\s+(.*?)(?:\s+#+)?\s*")
+_LIST_ITEM = re.compile(r"( *)([-*+]|\d{1,9}[.)])\s+(.*)")
+_HR = re.compile(r"\s{0,3}([-*_])(?:\s*\1){2,}\s*")
+_TABLE_SEP = re.compile(r"\|?\s*:?-{3,}:?\s*(?:\|\s*:?-{3,}:?\s*)*\|?\s*")
+_INLINE = re.compile(
+    r"`(?P<code>[^`]+)`"
+    r"|\[(?P<ltext>[^\]]+)\]\((?P<lurl>[^)\s]+)\)"
+    r"|\*\*(?P<strong>.+?)\*\*"
+    r"|__(?P<strong2>.+?)__"
+    r"|(?<![\w*])\*(?P<em>[^*\s](?:[^*]*[^*\s])?)\*(?![\w*])"
+    r"|(?<![\w_])_(?P<em2>[^_\s](?:[^_]*[^_\s])?)_(?![\w_])"
+    r"|(?P<url>https?://[^\s<>\"]*[^\s<>\".,;:!?)\]'])"
+)
+_INLINE_TRIGGER = re.compile(r"[`\[*_]|https?://")
+_SPECIAL = re.compile(r"[&<>\"`\[*_]|https?://")
+_SAFE_SCHEMES = ("http:", "https:", "mailto:")
+_LIST_START = frozenset("-*+0123456789")
 
 
 def escape(s: str) -> str:
-    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    # Chained str.replace beats a str.translate table here: translate falls back to a
+    # slow per-character path as soon as a replacement is longer than one character.
+    if _ESCAPE_CHARS.search(s) is None:
+        return s
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
 
 
-def md_to_html_basic(md: str) -> str:
+def safe_url(url: str) -> str | None:
+    """Return ``url`` if it is http(s), mailto or relative; ``None`` for anything else."""
+    url = url.strip()
+    scheme, sep, _ = url.partition(":")
+    if not sep or "/" in scheme or "?" in scheme or "#" in scheme:
+        return url
+    return url if url.lower().startswith(_SAFE_SCHEMES) else None
+
+
+def _render_inline(text: str, w: Callable[[str], object], *, links: bool = True) -> None:
+    if _SPECIAL.search(text) is None:
+        w(text)
+        return
+    if _INLINE_TRIGGER.search(text) is None:
+        w(escape(text))
+        return
+    pos = 0
+    for m in _INLINE.finditer(text):
+        kind = m.lastgroup
+        if kind == "lurl" and not links:
+            continue
+        w(escape(text[pos : m.start()]))
+        pos = m.end()
+        if kind == "code":
+            w(f"<code>{escape(m['code'])}</code>")
+        elif kind == "lurl":
+            url = safe_url(m["lurl"])
+            if url is None:
+                _render_inline(m["ltext"], w, links=False)
+            else:
+                w(f'<a href="{escape(url)}">')
+                _render_inline(m["ltext"], w, links=False)
+                w("</a>")
+        elif kind in ("strong", "strong2"):
+            w("<strong>")
+            _render_inline(m[kind], w, links=links)
+            w("</strong>")
+        elif kind in ("em", "em2"):
+            w("<em>")
+            _render_inline(m[kind], w, links=links)
+            w("</em>")
+        elif links:
+            url = escape(m["url"])
+            w(f'<a href="{url}">{url}</a>')
+        else:
+            w(escape(m["url"]))
+    w(escape(text[pos:]))
+
+
+def _split_row(line: str) -> list[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|"):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split("|")]
+
+
+def _close_lists(lists: list[tuple[int, str]], w: Callable[[str], object], to_indent: int = -1) -> None:
+    while lists and lists[-1][0] > to_indent:
+        w(f"</li></{lists.pop()[1]}>\n")
+
+
+def render_markdown(md: str, w: Callable[[str], object]) -> None:
+    """Render Markdown into the writer ``w`` in a single pass over the lines.
+
+    Supports h1-h4 (deeper headings clamp to h4), paragraphs, ordered/unordered and
+    nested lists, pipe tables, fenced code, horizontal rules, and inline code,
+    strong/emphasis, ``[links](url)`` and bare http(s) URLs. Links with unsafe
+    schemes (``javascript:`` etc.) are rendered as plain text.
+    """
+    # Plain locals only (no closures): cell-variable access in this loop is measurably slower.
     lines = md.splitlines()
-    html, in_ul = [], False
-
-    def close_ul() -> None:
-        nonlocal in_ul
-        if in_ul:
-            html.append("</ul>")
-            in_ul = False
-
-    for line in lines:
-        if line.startswith("### "):
-            close_ul()
-            html.append(f"<h3>{escape(line[4:])}</h3>")
-        elif line.startswith("## "):
-            close_ul()
-            html.append(f"<h2>{escape(line[3:])}</h2>")
-        elif line.startswith("- "):
-            if not in_ul:
-                html.append("<ul>")
-                in_ul = True
-            html.append(f"<li>{escape(line[2:])}</li>")
-        elif line.strip() == "":
-            close_ul()
+    lists: list[tuple[int, str]] = []  # (indent, "ul"/"ol") of open lists, innermost last
+    in_para = False
+    i, n = 0, len(lines)
+    while i < n:
+        line = lines[i]
+        stripped = line.strip()
+        i += 1
+
+        if not stripped:
+            if in_para:
+                w("</p>\n")
+                in_para = False
+            continue
+        first = stripped[0]
+
+        if first == "`" and stripped.startswith("```"):
+            if in_para:
+                w("</p>\n")
+                in_para = False
+            _close_lists(lists, w)
+            w("<pre><code>")
+            while i < n and not lines[i].strip().startswith("```"):
+                w(escape(lines[i]))
+                w("\n")
+                i += 1
+            i += 1
+            w("</code></pre>\n")
+            continue
+
+        item = _LIST_ITEM.fullmatch(line) if first in _LIST_START else None
+        if item is not None and not (first in "-*" and _HR.fullmatch(line)):
+            if in_para:
+                w("</p>\n")
+                in_para = False
+            indent = len(item.group(1))
+            tag = "ol" if item.group(2)[0].isdigit() else "ul"
+            if lists and indent > lists[-1][0]:
+                w("\n")
+            else:
+                _close_lists(lists, w, indent)
+                if lists and lists[-1][0] == indent and lists[-1][1] != tag:
+                    _close_lists(lists, w, indent - 1)
+                if lists and lists[-1][0] == indent:
+                    w("</li>\n")
+                    w("<li>")
+                    _render_inline(item.group(3), w)
+                    continue
+            start = item.group(2)[:-1] if tag == "ol" else ""
+            w(f'<{tag} start="{start}">\n<li>' if start not in ("", "1") else f"<{tag}>\n<li>")
+            lists.append((indent, tag))
+            _render_inline(item.group(3), w)
+            continue
+
+        if first == "#":
+            hashes = len(stripped) - len(stripped.lstrip("#"))
+            if hashes <= 6 and stripped[hashes : hashes + 1] in (" ", "\t"):
+                if in_para:
+                    w("</p>\n")
+                    in_para = False
+                if lists:
+                    _close_lists(lists, w)
+                text = stripped[hashes:].strip()
+                if text.endswith("#"):
+                    text = _HEADING.fullmatch(stripped).group(2)
+                level = min(hashes, 4)
+                w(f"<h{level}>")
+                _render_inline(text, w)
+                w(f"</h{level}>\n")
+                continue
+
+        if first in "-*_" and _HR.fullmatch(line):
+            if in_para:
+                w("</p>\n")
+                in_para = False
+            _close_lists(lists, w)
+            w("<hr/>\n")
+            continue
+
+        if first == "|" and i < n and _TABLE_SEP.fullmatch(lines[i]):
+            if in_para:
+                w("</p>\n")
+                in_para = False
+            _close_lists(lists, w)
+            w("<table>\n<thead><tr>")
+            for cell in _split_row(stripped):
+                w("<th>")
+                _render_inline(cell, w)
+                w("</th>")
+            w("</tr></thead>\n<tbody>\n")
+            i += 1
+            while i < n and lines[i].strip().startswith("|"):
+                w("<tr>")
+                for cell in _split_row(lines[i]):
+                    w("<td>")
+                    _render_inline(cell, w)
+                    w("</td>")
+                w("</tr>\n")
+                i += 1
+            w("</tbody></table>\n")
+            continue
+
+        if lists and line.startswith(" "):
+            # Lazy continuation of the current list item.
+            w(" ")
+            _render_inline(stripped, w)
+            continue
+
+        if lists:
+            _close_lists(lists, w)
+        if in_para:
+            w("\n")
         else:
-            close_ul()
-            html.append(f"<p>{escape(line)}</p>")
-    close_ul()
-    return "\n".join(html)
+            w("<p>")
+            in_para = True
+        _render_inline(stripped, w)
+
+    if in_para:
+        w("</p>\n")
+    _close_lists(lists, w)
+
+
+def md_to_html_basic(md: str) -> str:
+    buf = io.StringIO()
+    render_markdown(md, buf.write)
+    return buf.getvalue().rstrip("\n")
+
 
+def write_html_page(
+    out_dir: Path,
+    title: str,
+    nav: list[tuple[str, str]],
+    slug: str,
+    body_html: str,
+    *,
+    scrub: Callable[[str], str] | None = None,
+    writer: SiteWriter | None = None,
+    search_js: str | None = None,
+) -> bool:
+    """Render and write ``<slug>.html``; return ``True`` if the file on disk changed.
 
-def write_html_page(out_dir: Path, title: str, nav: list[tuple[str, str]], slug: str, body_html: str) -> None:
+    With an optimizing ``writer`` the page links the shared stylesheet instead of
+    inlining it. ``search_js`` (site-relative path of the search script) adds a
+    search box backed by the index under ``search/``. ``scrub`` is applied to the
+    title and nav labels, never to markup; ``body_html`` must be rendered from
+    already scrubbed text.
+    """
+    path = out_dir / f"{slug}.html"
+    if scrub is not None:
+        title = scrub(title)
+        nav = [(scrub(label), href) for label, href in nav]
+    search_html = ""
+    if search_js is not None:
+        script = Path(os.path.relpath(out_dir / search_js, path.parent)).as_posix()
+        index = Path(os.path.relpath(out_dir / "search", path.parent)).as_posix()
+        search_html = (
+            '\n  <input type="search" id="site-search" placeholder="Search" aria-label="Search this site"/>'
+            '\n  <div id="search-results"></div>'
+            f'\n  <script src="{escape(script)}" data-index="{escape(index)}/" defer></script>'
+        )
+    if writer is not None and writer.optimize:
+        css = os.path.relpath(writer.out_dir / writer.asset("site.css", SITE_CSS), path.parent)
+        style = f'<link rel="stylesheet" href="{escape(Path(css).as_posix())}"/>'
+    else:
+        style = f"<style>\n{SITE_CSS}</style>"
     nav_html = " ".join([f'<a href="{href}">{escape(label)}</a>' for label, href in nav])
     page = f"""<!doctype html>
 <html><head>
 <meta charset="utf-8"/>
 <meta name="viewport" content="width=device-width,initial-scale=1"/>
 <title>{escape(title)}</title>
-<style>
-body{{font-family:system-ui,Segoe UI,Arial,sans-serif;margin:0}}
-header{{padding:16px 18px;border-bottom:1px solid #ccc;position:sticky;top:0;background:#fff}}
-main{{max-width:980px;margin:0 auto;padding:18px}}
-nav a{{margin-right:10px;text-decoration:none}}
-h2{{margin-top:22px}}
-.card{{border:1px solid #ddd;border-radius:14px;padding:12px 14px;margin:12px 0}}
-small{{opacity:.7}}
-</style>
+{style}
 </head>
 <body>
 <header>
   <div><strong>{escape(title)}</strong></div>
-  <nav>{nav_html}</nav>
+  <nav>{nav_html}</nav>{search_html}
 </header>
 <main>{body_html}</main>
 </body></html>
 """
-    out_dir.mkdir(parents=True, exist_ok=True)
-    (out_dir / f"{slug}.html").write_text(page, encoding="utf-8")
+    if writer is not None:
+        return writer.write_text(path.relative_to(writer.out_dir).as_posix(), page)
+    write_atomic(path, page.encode("utf-8"))
+    return True
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+JOURNAL_NAME = ".build-journal.jsonl"
+JOURNAL_VERSION = 1
+
+
+def digest(obj: Any) -> str:
+    """SHA-256 of the canonical JSON form of ``obj``."""
+    payload = json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class JournalMismatchError(RuntimeError):
+    """The journal on disk was written for different inputs, prompts or model."""
+
+
+class BuildJournal:
+    """Write-ahead log of finished extractions and page renders for one site build.
+
+    Every completed chunk extraction and page render is appended as one JSON line
+    and fsynced before the build moves on, so a build killed half way (network
+    blip, Ctrl-C, OOM) loses at most the call in flight. The first line records a
+    fingerprint of everything that determines the results (messages, prompts,
+    schemas, redaction rules, model); :meth:`open` with ``resume=True`` replays the
+    entries only when it matches and raises :class:`JournalMismatchError` otherwise.
+    A torn last line from a crash mid-write is dropped.
+    """
+
+    def __init__(self, path: Path, fingerprint: str):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.extracts: dict[int, tuple[str, dict]] = {}
+        self.pages: dict[str, tuple[str, str]] = {}
+        self.replayed = 0
+        self._fh = None
+
+    @classmethod
+    def open(cls, directory: str | Path, fingerprint: str, *, resume: bool = False) -> "BuildJournal":
+        journal = cls(Path(directory) / JOURNAL_NAME, fingerprint)
+        if resume and journal.path.exists():
+            journal._replay()
+        else:
+            journal._start()
+        return journal
+
+    def _start(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = self.path.open("wb")
+        self._append({"type": "start", "version": JOURNAL_VERSION, "fingerprint": self.fingerprint})
+
+    def _replay(self) -> None:
+        good = 0
+        with self.path.open("rb") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # torn write at the crash point; everything after it is discarded
+                if not line.endswith(b"\n"):
+                    break
+                if good == 0:
+                    if entry.get("version") != JOURNAL_VERSION or entry.get("fingerprint") != self.fingerprint:
+                        raise JournalMismatchError(
+                            f"{self.path} belongs to a build with different inputs, prompts or model; "
+                            "rebuild without --resume"
+                        )
+                elif entry["type"] == "extract":
+                    self.extracts[entry["index"]] = (entry["chunk"], entry["result"])
+                elif entry["type"] == "page":
+                    self.pages[entry["slug"]] = (entry["input"], entry["markdown"])
+                good += len(line)
+        if good == 0:
+            self._start()
+            return
+        self._fh = self.path.open("r+b")
+        self._fh.truncate(good)
+        self._fh.seek(good)
+
+    def _append(self, entry: dict) -> None:
+        self._fh.write(json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def extract(self, index: int, chunk_digest: str) -> dict | None:
+        """Journalled extraction result for chunk ``index``, if its content is unchanged."""
+        entry = self.extracts.get(index)
+        if entry is None or entry[0] != chunk_digest:
+            return None
+        self.replayed += 1
+        return entry[1]
+
+    def record_extract(self, index: int, chunk_digest: str, result: dict) -> None:
+        self.extracts[index] = (chunk_digest, result)
+        self._append({"type": "extract", "index": index, "chunk": chunk_digest, "result": result})
+
+    def page(self, slug: str, input_digest: str) -> str | None:
+        entry = self.pages.get(slug)
+        if entry is None or entry[0] != input_digest:
+            return None
+        self.replayed += 1
+        return entry[1]
+
+    def record_page(self, slug: str, input_digest: str, markdown: str) -> None:
+        self.pages[slug] = (input_digest, markdown)
+        self._append({"type": "page", "slug": slug, "input": input_digest, "markdown": markdown})
+
+    def close(self, *, complete: bool = False) -> None:
+        if self._fh is None:
+            return
+        if complete:
+            self._append({"type": "done"})
+        self._fh.close()
+        self._fh = None
@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import PurePosixPath
+from typing import Callable, Iterable, Mapping, Sequence
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+URL = re.compile(r"(?:https?://|\bwww\.)[^\s<>\"]*[^\s<>\".,;:!?)\]']", re.I)
+_TRIGGERS = ("://", "www.")
+_PLACEHOLDER = re.compile(r"\[REDACTED_[A-Z_]+\]")
+_WS = re.compile(r"\s+")
+_SPACE_BEFORE_PUNCT = re.compile(r"\s+([.,;:!?])")
+_EDGES = " -–—:;,.|>•"
+LABEL_CHARS = 80
+LABEL_GAP_SECONDS = 600
+
+# Query parameters that only track where a link was shared from.
+TRACKING_PARAMS = frozenset(
+    {"fbclid", "gclid", "dclid", "yclid", "igshid", "igsh", "si", "feature", "usp", "ref_src", "mc_cid", "mc_eid"}
+)
+TRACKING_PREFIXES = ("utm_", "_hs")
+
+# Host (or parent domain) -> (kind, service name).
+HOSTS: dict[str, tuple[str, str]] = {
+    "youtube.com": ("video", "YouTube"),
+    "youtu.be": ("video", "YouTube"),
+    "vimeo.com": ("video", "Vimeo"),
+    "soundcloud.com": ("audio", "SoundCloud"),
+    "bandcamp.com": ("audio", "Bandcamp"),
+    "spotify.com": ("audio", "Spotify"),
+    "music.apple.com": ("audio", "Apple Music"),
+    "deezer.com": ("audio", "Deezer"),
+    "tidal.com": ("audio", "Tidal"),
+    "mixcloud.com": ("audio", "Mixcloud"),
+    "drive.google.com": ("storage", "Google Drive"),
+    "dropbox.com": ("storage", "Dropbox"),
+    "wetransfer.com": ("storage", "WeTransfer"),
+    "we.tl": ("storage", "WeTransfer"),
+    "1drv.ms": ("storage", "OneDrive"),
+    "onedrive.live.com": ("storage", "OneDrive"),
+    "docs.google.com": ("document", "Google Docs"),
+    "instagram.com": ("social", "Instagram"),
+    "facebook.com": ("social", "Facebook"),
+    "fb.me": ("social", "Facebook"),
+    "tiktok.com": ("social", "TikTok"),
+    "twitter.com": ("social", "X"),
+    "x.com": ("social", "X"),
+    "threads.net": ("social", "Threads"),
+    "eventbrite.com": ("event", "Eventbrite"),
+    "dice.fm": ("event", "DICE"),
+    "songkick.com": ("event", "Songkick"),
+    "bandsintown.com": ("event", "Bandsintown"),
+    "ticketmaster.com": ("event", "Ticketmaster"),
+}
+FILE_KINDS = {
+    **dict.fromkeys((".mp3", ".wav", ".m4a", ".flac", ".ogg", ".opus", ".aiff", ".aif"), "audio"),
+    **dict.fromkeys((".mp4", ".mov", ".webm", ".mkv"), "video"),
+    **dict.fromkeys((".pdf", ".doc", ".docx", ".txt"), "document"),
+}
+_YOUTUBE_PATH = re.compile(r"^/(?:shorts|embed|live|v)/([\w-]{6,})")
+_DRIVE_FILE = re.compile(r"^/file/d/([\w-]+)")
+_DRIVE_FOLDER = re.compile(r"^/drive/(?:u/\d+/)?folders/([\w-]+)")
+_DOCS = re.compile(r"^/(document|spreadsheets|presentation|forms)/d/([\w-]+)")
+
+
+def _lookup(host: str) -> tuple[str, str] | None:
+    parts = host.split(".")
+    for start in range(len(parts) - 1):
+        found = HOSTS.get(".".join(parts[start:]))
+        if found is not None:
+            return found
+    return None
+
+
+def _host(netloc: str) -> str:
+    host = netloc.rsplit("@", 1)[-1].lower()
+    host = re.sub(r":(?:80|443)$", "", host)
+    for prefix in ("www.", "m.", "mobile."):
+        if host.startswith(prefix):
+            return host[len(prefix):]
+    return host
+
+
+def canonical_url(url: str) -> str:
+    """One spelling per link: tracking parameters and fragments dropped, share variants folded.
+
+    ``youtu.be/ID``, ``/shorts/ID``, ``m.youtube.com/watch?v=ID&t=42`` all become
+    ``https://www.youtube.com/watch?v=ID``; SoundCloud loses its query string and
+    mobile host; Drive and Docs links become the bare file or folder URL.
+    Anything else keeps its scheme, path and remaining query, with the host
+    lowercased and ``www.`` removed.
+    """
+    url = url.strip()
+    if url.lower().startswith("www."):
+        url = "https://" + url
+    parts = urlsplit(url)
+    host = _host(parts.netloc)
+    path = parts.path or "/"
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)]
+    params = dict(query)
+
+    if host in ("youtube.com", "music.youtube.com", "youtube-nocookie.com", "youtu.be"):
+        match = _YOUTUBE_PATH.match(path)
+        video = path.strip("/") if host == "youtu.be" else params.get("v") or (match.group(1) if match else "")
+        if video:
+            return f"https://www.youtube.com/watch?v={video}"
+        if params.get("list"):
+            return f"https://www.youtube.com/playlist?list={params['list']}"
+        return urlunsplit(("https", "www.youtube.com", path.rstrip("/") or "/", "", ""))
+    if host == "soundcloud.com":
+        return urlunsplit(("https", host, path.rstrip("/") or "/", "", ""))
+    if host == "drive.google.com":
+        match = _DRIVE_FILE.match(path)
+        file_id = match.group(1) if match else params.get("id") if path in ("/open", "/uc") else None
+        if file_id:
+            return f"https://drive.google.com/file/d/{file_id}/view"
+        match = _DRIVE_FOLDER.match(path)
+        if match:
+            return f"https://drive.google.com/drive/folders/{match.group(1)}"
+    if host == "docs.google.com":
+        match = _DOCS.match(path)
+        if match:
+            return f"https://docs.google.com/{match.group(1)}/d/{match.group(2)}"
+    scheme = "https" if _lookup(host) else parts.scheme.lower()
+    return urlunsplit((scheme, host, "" if path == "/" else path, urlencode(query), ""))
+
+
+def classify(url: str) -> tuple[str, str]:
+    """``(kind, service)`` of a canonical URL, e.g. ``("audio", "SoundCloud")`` or ``("web", "example.org")``."""
+    parts = urlsplit(url)
+    host = _host(parts.netloc)
+    found = _lookup(host)
+    if found is not None:
+        return found
+    return FILE_KINDS.get(PurePosixPath(parts.path).suffix.lower(), "web"), host
+
+
+def _label(text: str) -> str:
+    text = _SPACE_BEFORE_PUNCT.sub(r"\1", _WS.sub(" ", URL.sub(" ", text))).strip(_EDGES)
+    if not _PLACEHOLDER.sub("", text).strip(_EDGES):
+        return ""
+    if len(text) > LABEL_CHARS:
+        text = text[:LABEL_CHARS].rsplit(" ", 1)[0].rstrip(" ,;:-") + "…"
+    return text
+
+
+def _seconds_apart(a: Mapping, b: Mapping) -> float:
+    try:
+        return abs((datetime.fromisoformat(a["ts"]) - datetime.fromisoformat(b["ts"])).total_seconds())
+    except (KeyError, TypeError, ValueError):
+        return float("inf")
+
+
+@dataclass
+class FoundLink:
+    url: str
+    kind: str
+    service: str
+    label: str
+    sources: list = field(default_factory=list)
+
+
+class LinkExtractor:
+    """Finds links in the chat locally and fills the link sections of the knowledge.
+
+    :meth:`scan` reads each message once (only those containing a URL, and their
+    neighbours, are sanitized), canonicalizes and dedupes the URLs, classifies
+    them by host and labels each with the text around it: the message itself
+    with the URL removed, else the same author's previous or next message
+    within ten minutes, else the service name. Sources collect every message
+    that shared the link.
+
+    :meth:`apply` replaces what the model extracted for each link section with
+    these links (filtered by kind). The model's items only lend their label and
+    notes to the link with the same canonical URL (unless ``llm_labels`` is off);
+    model URLs that appear nowhere in the chat are dropped. A ``curated`` section
+    (the public site's) keeps the model's selection: its URLs are only
+    canonicalized and given the sources of every message that shared them, and
+    no other link is added.
+    """
+
+    def __init__(self, *, llm_labels: bool = True):
+        self.llm_labels = llm_labels
+        self.found: list[FoundLink] = []
+        self.scanned = 0
+        self.mentions = 0
+        self.labelled = 0
+        self.dropped = 0
+
+    def scan(
+        self, messages: Sequence[Mapping], sanitize: Callable[[list[str]], list[str]] | None = None
+    ) -> list[FoundLink]:
+        """Links shared in ``messages`` (with ids, see ``ensure_ids``), in order of first mention."""
+        hits = [i for i, m in enumerate(messages) if any(t in m["text"] for t in _TRIGGERS)]
+        needed = sorted({j for i in hits for j in (i - 1, i, i + 1) if 0 <= j < len(messages)})
+        texts = [messages[j]["text"] for j in needed]
+        clean = dict(zip(needed, sanitize(texts) if sanitize is not None else texts))
+
+        def nearby(i: int) -> str:
+            for j in (i - 1, i + 1):
+                if 0 <= j < len(messages) and messages[j].get("author") == messages[i].get("author"):
+                    if _seconds_apart(messages[i], messages[j]) <= LABEL_GAP_SECONDS and not URL.search(clean[j]):
+                        label = _label(clean[j])
+                        if label:
+                            return label
+            return ""
+
+        links: dict[str, FoundLink] = {}
+        for i in hits:
+            urls = [match.group(0) for match in URL.finditer(clean[i])]
+            label = None
+            for raw in urls:
+                if "[REDACTED" in raw:
+                    continue
+                self.mentions += 1
+                url = canonical_url(raw)
+                link = links.get(url)
+                if link is None:
+                    if label is None:
+                        label = _label(clean[i]) or nearby(i)
+                    kind, service = classify(url)
+                    link = links[url] = FoundLink(url, kind, service, label or service)
+                if messages[i]["id"] not in link.sources:
+                    link.sources.append(messages[i]["id"])
+        self.scanned += len(messages)
+        self.found = list(links.values())
+        return self.found
+
+    def apply(
+        self,
+        knowledge: dict,
+        sections: Mapping[str, Iterable[str]],
+        schema: Mapping | None = None,
+        *,
+        curated: bool = False,
+    ) -> dict:
+        """Fill each of ``sections`` (section -> wanted kinds, empty for all) with the scanned links."""
+        for section, kinds in sections.items():
+            kinds = frozenset(kinds)
+            fields = _item_fields(schema, section)
+            label_field = "title" if "title" in fields else "label"
+            suggested: dict[str, dict] = {}
+            for item in knowledge.get(section, []):
+                suggested.setdefault(canonical_url(str(item.get("url", ""))), item)
+            if curated:
+                knowledge[section] = self._curate(suggested)
+                continue
+            items = []
+            for link in self.found:
+                if kinds and link.kind not in kinds:
+                    continue
+                item = {label_field: link.label, "url": link.url}
+                if "notes" in fields:
+                    item["notes"] = link.service
+                model = suggested.pop(link.url, None)
+                if model is not None and self.llm_labels:
+                    if model.get(label_field):
+                        item[label_field] = model[label_field]
+                        self.labelled += 1
+                    if model.get("notes") and "notes" in fields:
+                        item["notes"] = model["notes"]
+                item["sources"] = list(link.sources)
+                items.append(item)
+            self.dropped += len(suggested)
+            knowledge[section] = items
+        return knowledge
+
+    def _curate(self, suggested: Mapping[str, dict]) -> list[dict]:
+        found = {link.url: link for link in self.found}
+        items = []
+        for url, model in suggested.items():
+            link = found.get(url)
+            if link is None:
+                self.dropped += 1
+                continue
+            sources = list(model.get("sources") or ())
+            items.append({**model, "url": url, "sources": sources + [i for i in link.sources if i not in sources]})
+        return items
+
+    def summary(self) -> str:
+        kinds: dict[str, int] = {}
+        for link in self.found:
+            kinds[link.kind] = kinds.get(link.kind, 0) + 1
+        by_kind = ", ".join(f"{count} {kind}" for kind, count in sorted(kinds.items()))
+        return (
+            f"{len(self.found)} unique link(s) from {self.mentions} mention(s) in {self.scanned:,} message(s)"
+            f"{f' ({by_kind})' if by_kind else ''}; {self.labelled} labelled by the model, "
+            f"{self.dropped} unmatched model URL(s) dropped"
+        )
+
+
+def _item_fields(schema: Mapping | None, section: str) -> frozenset[str]:
+    if schema is None:
+        return frozenset({"label", "notes"})
+    items = schema["properties"][section].get("items", {})
+    return frozenset(items.get("properties", {}))
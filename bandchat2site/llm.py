@@ -4,26 +4,48 @@ import json
 import os
 from typing import Any, Dict
 
-try:
-    from openai import OpenAI
-except ImportError as exc:  # pragma: no cover - handled in _get_client
-    OpenAI = None  # type: ignore[assignment]
-    _import_error = exc
-else:
-    _import_error = None
+from .resilience import CircuitBreaker, ResilientCaller
 
 DEFAULT_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# Error codes the API uses when the prompt plus the answer do not fit the model.
+LENGTH_ERRORS = frozenset({"context_length_exceeded", "string_above_max_length"})
 _client = None
+_resilience = ResilientCaller(breaker=CircuitBreaker())
 
 
-def _get_client() -> "OpenAI":
-    if OpenAI is None:  # type: ignore[truthy-bool]
-        raise RuntimeError(
-            "The openai package is required for LLM calls. Install dependencies with `pip install -r requirements.txt`."
-        ) from _import_error
+class TruncatedResponseError(RuntimeError):
+    """The request or its answer did not fit the model's limits; a smaller input may.
+
+    Raised when the response is ``incomplete`` because of ``max_output_tokens``,
+    when the JSON text ends before it is complete, or when the API rejects the
+    prompt as too long. The pipeline reacts by splitting the chunk.
+    """
+
+
+def set_resilience(caller: ResilientCaller) -> ResilientCaller:
+    """Replace the retry/hedging/circuit-breaker policy used for every API call; return the old one."""
+    global _resilience
+    previous, _resilience = _resilience, caller
+    return previous
+
+
+def get_resilience() -> ResilientCaller:
+    return _resilience
+
+
+def _get_client() -> Any:
     global _client
     if _client is None:
-        _client = OpenAI()
+        # Imported on first use: the SDK is slow to import and most commands never call the API.
+        try:
+            from openai import OpenAI
+        except ImportError as exc:
+            raise RuntimeError(
+                "The openai package is required for LLM calls. "
+                "Install dependencies with `pip install -r requirements.txt`."
+            ) from exc
+        # Retries are handled by ``_resilience`` so the SDK's own must not stack on top.
+        _client = OpenAI(max_retries=0)
     return _client
 
 
@@ -41,10 +63,24 @@ def _extract_text(response: Any) -> str:
     raise ValueError("No text content returned from model response")
 
 
+def _create(**kwargs: Any) -> Any:
+    """One ``responses.create`` call, retried/hedged on its own so a straggler does not fail the build."""
+    client = _get_client()
+    try:
+        response = _resilience.call(client.responses.create, **kwargs)
+    except Exception as exc:
+        if getattr(exc, "code", None) in LENGTH_ERRORS:
+            raise TruncatedResponseError(str(exc)) from exc
+        raise
+    details = getattr(response, "incomplete_details", None)
+    if getattr(response, "status", None) == "incomplete" and getattr(details, "reason", None) == "max_output_tokens":
+        raise TruncatedResponseError("Response cut off at max_output_tokens")
+    return response
+
+
 def call_llm_text(system_prompt: str, user_prompt: str, *, model: str | None = None) -> str:
     """Call the OpenAI Responses API for free-form text (Markdown) output."""
-    client = _get_client()
-    response = client.responses.create(
+    response = _create(
         model=model or DEFAULT_MODEL,
         input=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
     )
@@ -59,19 +95,24 @@ def call_llm_json(
     model: str | None = None,
     name: str = "response",
 ) -> Dict[str, Any]:
-    """Call the OpenAI Responses API with a strict JSON schema."""
-    client = _get_client()
-    response = client.responses.create(
+    """Call the OpenAI Responses API for JSON output constrained by ``schema``.
+
+    Structured output is requested with ``text.format`` (the Responses API form;
+    ``response_format`` belongs to Chat Completions). ``strict`` is off because
+    strict mode requires every property to be required, which the pipeline
+    schemas deliberately are not; results are checked locally instead (see
+    :class:`bandchat2site.schema.SchemaGuard`). Raises ``ValueError`` if the
+    reply is not JSON and :class:`TruncatedResponseError` if it was cut off.
+    """
+    response = _create(
         model=model or DEFAULT_MODEL,
         input=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
-        response_format={
-            "type": "json_schema",
-            "json_schema": {
-                "name": name,
-                "schema": schema,
-                "strict": True,
-            },
-        },
+        text={"format": {"type": "json_schema", "name": name, "schema": schema, "strict": False}},
     )
     raw_text = _extract_text(response)
-    return json.loads(raw_text)
+    try:
+        return json.loads(raw_text)
+    except json.JSONDecodeError as exc:
+        if exc.pos >= len(raw_text.rstrip()) or exc.msg.startswith("Unterminated string"):
+            raise TruncatedResponseError(f"JSON answer ends early ({len(raw_text)} chars)") from exc
+        raise
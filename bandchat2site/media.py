@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+import mimetypes
+import re
+import zipfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, Mapping
+
+from .messages import ensure_ids
+from .output import SiteWriter, write_atomic
+from .whatsapp import chat_entry
+
+MEDIA_DIR = "media"
+AUDIO_EXTENSIONS = frozenset(
+    {".aac", ".aif", ".aiff", ".amr", ".flac", ".m4a", ".mp3", ".oga", ".ogg", ".opus", ".wav"}
+)
+# Android: "PTT-20240105-WA0003.opus (file attached)"; iOS: "<attached: 00000012-AUDIO-2024-01-05-20-01-33.opus>".
+ATTACHMENT = re.compile(r"<attached:\s*(?P<ios>[^>]+?)\s*>|(?P<android>[^\s<>]+\.\w{2,5})\s+\(file attached\)")
+
+
+@dataclass(frozen=True)
+class MediaEntry:
+    """One attachment of an export zip; ``message_id`` is the message that sent it, if any."""
+
+    name: str
+    size: int
+    kind: str
+    message_id: int | None = None
+
+    @property
+    def is_recording(self) -> bool:
+        """Audio (voice notes, bounces, demos) or anything named like a demo."""
+        return self.kind == "audio" or "demo" in self.name.lower()
+
+
+def attachment_names(text: str) -> list[str]:
+    """File names of the attachments a message announces."""
+    return [match.group("ios") or match.group("android") for match in ATTACHMENT.finditer(text)]
+
+
+def media_kind(name: str) -> str:
+    """``audio``, ``image``, ``video``, ``document`` or ``other``, from the file name alone."""
+    suffix = Path(name).suffix.lower()
+    if suffix in AUDIO_EXTENSIONS:
+        return "audio"
+    mime = mimetypes.guess_type(name, strict=False)[0] or ""
+    major = mime.split("/", 1)[0]
+    if major in ("audio", "image", "video"):
+        return major
+    if mime.startswith(("application/", "text/")):
+        return "document"
+    return "other"
+
+
+def index_media(zip_path: str | Path, messages: Iterable[Mapping] = ()) -> list[MediaEntry]:
+    """Attachments of an export zip, read from its central directory only (nothing is extracted).
+
+    Each entry is linked to the first of ``messages`` (ids as in ``ensure_ids``)
+    that announces it by file name.
+    """
+    referenced: dict[str, int] = {}
+    for m in ensure_ids(messages):
+        for name in attachment_names(str(m.get("text", ""))):
+            referenced.setdefault(name, m["id"])
+    with zipfile.ZipFile(zip_path) as archive:
+        chat = chat_entry(archive).filename
+        infos = [info for info in archive.infolist() if not info.is_dir() and info.filename != chat]
+    entries = []
+    for info in infos:
+        base = info.filename.rsplit("/", 1)[-1]
+        entries.append(MediaEntry(base, info.file_size, media_kind(base), referenced.get(base)))
+    return entries
+
+
+def write_media_index(entries: Iterable[MediaEntry], path: str | Path) -> Path:
+    path = Path(path)
+    rows = [asdict(entry) for entry in entries]
+    write_atomic(path, json.dumps(rows, ensure_ascii=False, indent=2).encode("utf-8"))
+    return path
+
+
+class MediaLibrary:
+    """The attachments of one export zip, published on demand.
+
+    :meth:`publish` indexes the zip, then copies the referenced recordings (see
+    :attr:`MediaEntry.is_recording`) into the site's ``media/`` folder, streaming
+    each straight out of the zip. The site manifest remembers each file by the
+    zip's CRC and size, so a rebuild neither reads nor rewrites an unchanged file.
+    """
+
+    def __init__(self, zip_path: str | Path):
+        self.zip_path = Path(zip_path)
+        self.entries: list[MediaEntry] = []
+        self.published: list[str] = []
+
+    def recordings(self) -> list[MediaEntry]:
+        return [entry for entry in self.entries if entry.is_recording and entry.message_id is not None]
+
+    def publish(self, writer: SiteWriter, messages: Iterable[Mapping]) -> list[dict]:
+        """Copy the recordings ``messages`` refer to into ``media/``; return them as ``recordings`` items."""
+        self.entries = index_media(self.zip_path, messages)
+        wanted = {entry.name: entry for entry in self.recordings()}
+        items = []
+        with zipfile.ZipFile(self.zip_path) as archive:
+            for info in archive.infolist():
+                entry = wanted.pop(info.filename.rsplit("/", 1)[-1], None)
+                if entry is None:
+                    continue
+                name = f"{MEDIA_DIR}/{entry.name}"
+                writer.write_stream(name, f"zip:{info.CRC:08x}:{info.file_size}", lambda info=info: archive.open(info))
+                self.published.append(name)
+                items.append({"title": entry.name, "url": name, "notes": entry.kind, "sources": [entry.message_id]})
+        return items
+
+    def summary(self) -> str:
+        referenced = sum(1 for entry in self.entries if entry.message_id is not None)
+        size = sum(entry.size for entry in self.entries)
+        return (
+            f"{len(self.entries)} attachment(s) ({size / 1e6:.1f} MB), {referenced} referenced, "
+            f"{len(self.published)} recording(s) published"
+        )
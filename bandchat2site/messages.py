@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import re
 from datetime import datetime
-from typing import Callable, Iterable, List, Mapping
+from typing import Callable, Iterable, List, Mapping, Sequence
+
+from .redact import RedactionRule, Redactor
 
 PHONE_RE = re.compile(r"(\+?\d[\d\s\-()]{7,}\d)")
 EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
@@ -12,17 +14,44 @@ PRIVATE_TOPICS = re.compile(r"\b(payment|money|rent|drama|fight|argument|complai
 Message = Mapping[str, str]
 
 
+# Emails may only start where a local part starts: an address's local part never
+# contains "@", so a match from inside the run exists only if one from its start
+# does, and the lookbehind saves re-scanning inside words. Phones use the plain
+# pattern (a start after "+" or a digit can still be the leftmost match); the
+# trigger gate already skips messages without digits. Emails go first so digits
+# inside an address are redacted as part of the email.
+_EMAIL_SCAN = re.compile(r"(?<![A-Za-z0-9._%+-])" + EMAIL_RE.pattern)
+
+CONTACT_RULES = (
+    RedactionRule("email", _EMAIL_SCAN, "[REDACTED_EMAIL]", trigger="@"),
+    RedactionRule("phone", PHONE_RE, "[REDACTED_PHONE]", trigger="0123456789"),
+)
+PUBLIC_RULES = CONTACT_RULES + (
+    RedactionRule("private_topic", PRIVATE_TOPICS, "[REDACTED_PRIVATE_CONTEXT]", whole=True),
+)
+RULESETS: dict[str, tuple[RedactionRule, ...]] = {
+    "ops": CONTACT_RULES,
+    "creative": CONTACT_RULES,
+    "public": PUBLIC_RULES,
+}
+
+CONTACT_REDACTOR = Redactor(CONTACT_RULES)
+PUBLIC_REDACTOR = Redactor(PUBLIC_RULES)
+
+
+def build_redactor(pipeline: str, extra_rules: Sequence[RedactionRule] = ()) -> Redactor:
+    """Redactor for a pipeline's rule set plus any custom per-band rules."""
+    if pipeline not in RULESETS:
+        raise ValueError(f"Unknown pipeline {pipeline!r}; expected one of {sorted(RULESETS)}")
+    return Redactor(RULESETS[pipeline] + tuple(extra_rules))
+
+
 def redact_contacts(text: str) -> str:
-    text = PHONE_RE.sub("[REDACTED_PHONE]", text)
-    text = EMAIL_RE.sub("[REDACTED_EMAIL]", text)
-    return text
+    return CONTACT_REDACTOR.redact(text)
 
 
 def sanitize_public(text: str) -> str:
-    text = redact_contacts(text)
-    if PRIVATE_TOPICS.search(text):
-        return "[REDACTED_PRIVATE_CONTEXT]"
-    return text
+    return PUBLIC_REDACTOR.redact(text)
 
 
 def ensure_ids(msgs: Iterable[Mapping[str, str]]) -> List[dict]:
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Mapping
+
+# Placeholders WhatsApp writes instead of the attachment when media is excluded
+# from the export. Attachments that keep a file name (``<attached: ...>``) stay.
+MEDIA_PLACEHOLDER = re.compile(
+    r"^(?:<media omitted>|<(?:image|video|audio|sticker|gif|document) omitted>|"
+    r"(?:image|video|audio|sticker|gif|document) omitted|null)$",
+    re.I,
+)
+DELETED = re.compile(r"^(?:this message was deleted|you deleted this message)\.?$", re.I)
+ACK_WORDS = frozenset(
+    {
+        "ok", "okay", "k", "kk", "yes", "yep", "yeah", "yup", "no", "nope", "sure", "cool", "nice", "great",
+        "thanks", "thank you", "thx", "ty", "lol", "haha", "hahaha", "np", "done", "agreed", "+1",
+    }
+)
+# An ack only answers the message before it when someone else sends it this soon after.
+FOLD_GAP_SECONDS = 600
+# A long message repeated within this window is a forward or copy-paste; later it is a fresh announcement.
+DEDUPE_WINDOW_SECONDS = 86_400
+_WS = re.compile(r"\s+")
+_TRAILING_PUNCT = re.compile(r"[\s.!?]+$")
+
+
+def _prompt_chars(m: Mapping) -> int:
+    """Characters a message costs in a chunk transcript (see :func:`chunk_messages`)."""
+    return len(f"[{m['id']}] {m['ts']} {m['author']}: {m['text']}\n")
+
+
+class Normalizer:
+    """Drops and folds chat noise between parsing and chunking.
+
+    Media placeholders and deleted-message notices are dropped. Short
+    acknowledgements ("ok", "👍", emoji-only replies) from another member within
+    ``fold_gap_seconds`` of the previous kept message are folded into it as
+    ``[Author: 👍]`` so agreement survives at a fraction of the cost; an ack to
+    one's own message or after a pause stays a message of its own. A long message
+    repeated within ``dedupe_window_seconds`` of its kept copy (a forward or
+    copy-paste) is dropped by hash; the same announcement weeks later is kept.
+
+    Kept messages keep their original ids, so ``sources`` in extracted knowledge
+    stay valid; a message lists the ids of the acks folded into it in ``folded``
+    and of the repeats dropped in its favour in ``duplicates``.
+    """
+
+    def __init__(
+        self,
+        *,
+        drop_media: bool = True,
+        drop_deleted: bool = True,
+        fold_acks: bool = True,
+        dedupe_min_chars: int | None = 40,
+        dedupe_window_seconds: float = DEDUPE_WINDOW_SECONDS,
+        ack_words: Iterable[str] = ACK_WORDS,
+        max_ack_chars: int = 12,
+        fold_gap_seconds: float = FOLD_GAP_SECONDS,
+    ):
+        self.drop_media = drop_media
+        self.drop_deleted = drop_deleted
+        self.fold_acks = fold_acks
+        self.dedupe_min_chars = dedupe_min_chars
+        self.dedupe_window_seconds = dedupe_window_seconds
+        self.ack_words = frozenset(word.lower() for word in ack_words)
+        self.max_ack_chars = max_ack_chars
+        self.fold_gap_seconds = fold_gap_seconds
+        self.counts: Counter = Counter()
+        self.chars_before = 0
+        self.chars_after = 0
+
+    def classify(self, text: str) -> str | None:
+        """``"media"``, ``"deleted"``, ``"ack"`` or ``None`` for a normal message."""
+        text = text.strip()
+        if self.drop_media and MEDIA_PLACEHOLDER.match(text):
+            return "media"
+        if self.drop_deleted and DELETED.match(text):
+            return "deleted"
+        if self.fold_acks and len(text) <= self.max_ack_chars:
+            if not any(ch.isalnum() for ch in text) and text:
+                return "ack"
+            if _TRAILING_PUNCT.sub("", text).lower() in self.ack_words:
+                return "ack"
+        return None
+
+    def normalize(self, messages: Iterable[Mapping]) -> list[dict]:
+        kept: list[dict] = []
+        seen: dict[str, dict] = {}
+        counts: Counter = Counter()
+        before = 0
+        for m in messages:
+            before += _prompt_chars(m)
+            kind = self.classify(m["text"])
+            if kind in ("media", "deleted"):
+                counts[kind] += 1
+                continue
+            if kind == "ack" and kept and self._answers(kept[-1], m):
+                target = kept[-1]
+                target["text"] += f" [{m['author']}: {m['text'].strip()}]"
+                target.setdefault("folded", []).append(m["id"])
+                counts["ack"] += 1
+                continue
+            if self.dedupe_min_chars is not None and len(m["text"]) >= self.dedupe_min_chars:
+                key = hashlib.sha1(_WS.sub(" ", m["text"].strip().casefold()).encode("utf-8")).hexdigest()
+                original = seen.get(key)
+                if original is not None and self._within_window(original, m):
+                    original.setdefault("duplicates", []).append(m["id"])
+                    counts["duplicate"] += 1
+                    continue
+                seen[key] = dict(m)
+                kept.append(seen[key])
+                continue
+            kept.append(dict(m))
+
+        self.counts = counts
+        self.chars_before = before
+        self.chars_after = sum(_prompt_chars(m) for m in kept)
+        return kept
+
+    def _answers(self, target: Mapping, ack: Mapping) -> bool:
+        if target["author"] == ack["author"]:
+            return False
+        gap = datetime.fromisoformat(ack["ts"]) - datetime.fromisoformat(target["ts"])
+        return gap.total_seconds() <= self.fold_gap_seconds
+
+    def _within_window(self, original: Mapping, repeat: Mapping) -> bool:
+        gap = datetime.fromisoformat(repeat["ts"]) - datetime.fromisoformat(original["ts"])
+        return gap.total_seconds() <= self.dedupe_window_seconds
+
+    def summary(self) -> str:
+        saved = self.chars_before - self.chars_after
+        share = saved / self.chars_before if self.chars_before else 0.0
+        parts = ", ".join(f"{count} {kind}" for kind, count in sorted(self.counts.items()))
+        return f"{saved:,} prompt chars saved ({share:.0%}): {parts or 'nothing to collapse'}"
@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
+from typing import Collection
 
-from .html import md_to_html_basic, write_html_page
 from .llm import call_llm_json, call_llm_text
-from .messages import chunk_messages, ensure_ids, redact_contacts
+from .messages import CONTACT_REDACTOR
+from .pipeline import SiteSpec, build_site, extract_system, omit_sections
+from .redact import Redactor
+from .scrub import SecretScrubber
 
 OPS_SCHEMA = {
     "type": "object",
@@ -145,21 +148,24 @@ OPS_EMPTY = {
     "open_questions": [],
 }
 
-OPS_EXTRACT_SYSTEM = """You extract operational band info from chat messages.
+OPS_EXTRACT_RULES = """You extract operational band info from chat messages.
 Rules:
 - Use ONLY facts present in messages. If unsure, omit.
 - Keep sources as message IDs.
 - Do NOT output phone numbers/emails/addresses (they are redacted).
 Output STRICT JSON with exactly these keys:
-band{name,members[]},
-rehearsals[{date?,time?,location?,agenda[],notes[],sources[]}],
-gigs[{date?,time?,venue?,call_time?,setlist[],notes[],sources[]}],
-tasks[{task,owner?,due?,status(open|done|blocked)?,sources[]}],
-decisions[{date?,decision,sources[]}],
-gear[{item,who?,when?,notes?,sources[]}],
-links[{url,label?,sources[]}],
-open_questions[{question,sources[]}]
 """
+OPS_EXTRACT_KEYS = {
+    "band": "band{name,members[]}",
+    "rehearsals": "rehearsals[{date?,time?,location?,agenda[],notes[],sources[]}]",
+    "gigs": "gigs[{date?,time?,venue?,call_time?,setlist[],notes[],sources[]}]",
+    "tasks": "tasks[{task,owner?,due?,status(open|done|blocked)?,sources[]}]",
+    "decisions": "decisions[{date?,decision,sources[]}]",
+    "gear": "gear[{item,who?,when?,notes?,sources[]}]",
+    "links": "links[{url,label?,sources[]}]",
+    "open_questions": "open_questions[{question,sources[]}]",
+}
+OPS_EXTRACT_SYSTEM = extract_system(OPS_EXTRACT_RULES, OPS_EXTRACT_KEYS)
 
 OPS_WRITE_SYSTEM = """You write clean operational webpages in Markdown for a band.
 Rules:
@@ -170,13 +176,21 @@ Rules:
 """
 
 
-def _sanitize_ops(text: str) -> str:
-    return redact_contacts(text)
-
-
-def extract_ops(chunk: list[dict], *, model: str | None = None, llm_json=call_llm_json) -> dict:
+def extract_ops(
+    chunk: list[dict],
+    *,
+    model: str | None = None,
+    llm_json=call_llm_json,
+    redactor: Redactor | None = None,
+    scrubber: SecretScrubber | None = None,
+    omit: Collection[str] = (),
+) -> dict:
+    """Extract one chunk; sections in ``omit`` are left out of the prompt and schema."""
+    texts = (redactor or CONTACT_REDACTOR).redact_many([m["text"] for m in chunk])
+    if scrubber is not None:
+        texts = scrubber.scrub_many(texts)
     transcript = "\n".join(
-        f"[{m['id']}] {m['ts']} {m['author']}: {_sanitize_ops(m['text'])}" for m in chunk
+        f"[{m['id']}] {m['ts']} {m['author']}: {text}" for m, text in zip(chunk, texts)
     )
     user = f"""Extract operational band info from these messages.
 
@@ -184,9 +198,10 @@ MESSAGES:
 {transcript}
 
 Return STRICT JSON only. If nothing found, return:
-{json.dumps(OPS_EMPTY)}
+{json.dumps({key: value for key, value in OPS_EMPTY.items() if key not in omit})}
 """
-    return llm_json(OPS_EXTRACT_SYSTEM, user, OPS_SCHEMA, model=model, name="ops_extract")
+    system = extract_system(OPS_EXTRACT_RULES, OPS_EXTRACT_KEYS, omit)
+    return llm_json(system, user, omit_sections(OPS_SCHEMA, omit), model=model, name="ops_extract")
 
 
 def merge_dict_lists(base: dict, part: dict) -> dict:
@@ -220,26 +235,13 @@ Return Markdown only.
     return llm_text(OPS_WRITE_SYSTEM, user, model=model)
 
 
-def build_ops_site(
-    messages: list[dict],
-    out_dir: Path,
-    *,
-    title: str = "Band Ops Hub",
-    model: str | None = None,
-    llm_text=call_llm_text,
-    llm_json=call_llm_json,
-) -> Path:
-    msgs = ensure_ids(messages)
-    chunks = chunk_messages(msgs, max_chars=12000, min_gap_minutes=180, sanitize=_sanitize_ops)
-
-    knowledge = json.loads(json.dumps(OPS_EMPTY))
-    for ch in chunks:
-        knowledge = merge_dict_lists(knowledge, extract_ops(ch, model=model, llm_json=llm_json))
-
-    out_dir.mkdir(parents=True, exist_ok=True)
-    (out_dir / "knowledge.json").write_text(json.dumps(knowledge, ensure_ascii=False, indent=2), encoding="utf-8")
-
-    pages = [
+OPS_SITE = SiteSpec(
+    name="ops",
+    empty=OPS_EMPTY,
+    extract=extract_ops,
+    merge=merge_dict_lists,
+    write_page=write_ops_page,
+    pages=(
         ("index", "Home"),
         ("rehearsals", "Rehearsals"),
         ("gigs", "Gigs"),
@@ -248,11 +250,45 @@ def build_ops_site(
         ("gear", "Gear"),
         ("links", "Links"),
         ("review", "Review"),
-    ]
-    nav = [(label, f"{slug}.html") for slug, label in pages]
+    ),
+    redactor=CONTACT_REDACTOR,
+    min_gap_minutes=180,
+    page_keys={
+        "index": ("band", "rehearsals", "gigs", "tasks", "decisions"),
+        "rehearsals": ("rehearsals",),
+        "gigs": ("gigs",),
+        "tasks": ("tasks",),
+        "decisions": ("decisions",),
+        "gear": ("gear",),
+        "links": ("links",),
+    },
+    link_sections={"links": ()},
+    event_sections=("rehearsals", "gigs"),
+    prompts=(OPS_EXTRACT_SYSTEM, OPS_WRITE_SYSTEM, json.dumps(OPS_SCHEMA, sort_keys=True)),
+    schema=OPS_SCHEMA,
+    identity={
+        "rehearsals": ("date", "location"),
+        "gigs": ("date", "venue"),
+        "tasks": ("task",),
+        "decisions": ("decision",),
+        "gear": ("item",),
+        "links": ("url",),
+        "open_questions": ("question",),
+    },
+)
 
-    for slug, _label in pages:
-        md = write_ops_page(slug, knowledge, model=model, llm_text=llm_text)
-        write_html_page(out_dir, title, nav, slug, md_to_html_basic(md))
 
-    return out_dir
+def build_ops_site(
+    messages: list[dict],
+    out_dir: Path,
+    *,
+    title: str = "Band Ops Hub",
+    model: str | None = None,
+    llm_text=call_llm_text,
+    llm_json=call_llm_json,
+    **options,
+) -> Path:
+    """Build the ops site; ``options`` are passed through to :func:`~bandchat2site.pipeline.build_site`."""
+    return build_site(
+        OPS_SITE, messages, out_dir, title=title, model=model, llm_text=llm_text, llm_json=llm_json, **options
+    )
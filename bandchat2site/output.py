@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Callable
+
+from .assets import COMPRESSIBLE_SUFFIXES, compressed_variants, fingerprint, minify_css, minify_html
+
+MANIFEST_NAME = ".manifest.json"
+
+
+def state_dir(out_dir: str | Path) -> Path:
+    """Hidden sibling of ``out_dir`` for build state (journal, audit logs) that must not be deployed."""
+    out_dir = Path(out_dir).resolve()
+    return out_dir.with_name(f".{out_dir.name}.build")
+
+
+def write_atomic(path: Path, data: bytes | BinaryIO) -> None:
+    """Write ``data`` (bytes, or a binary stream copied in blocks) to ``path`` via a temp file and ``os.replace``."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            if isinstance(data, bytes):
+                fh.write(data)
+            else:
+                shutil.copyfileobj(data, fh, 1 << 20)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class SiteWriter:
+    """Writes site files only when their content changed, tracked by a hash manifest.
+
+    The manifest (``.manifest.json`` in the output directory) maps each output path
+    relative to the site root to its SHA-256. Files whose hash matches the previous
+    build and that still exist on disk are left untouched, so a deploy step that
+    syncs by mtime or checksum only ships what changed. Files written by a previous
+    build but not by this one are stale; :meth:`close` removes them when ``prune`` is
+    set and otherwise keeps tracking them so a later pruning build can.
+
+    With ``optimize`` pages link one shared, fingerprinted stylesheet (see :meth:`asset`)
+    and HTML/CSS are minified; with ``precompress`` every changed text file also gets
+    ``.gz`` (and ``.br`` when available) siblings a static host can serve directly.
+    """
+
+    def __init__(self, out_dir: str | Path, *, optimize: bool = False, precompress: bool = False):
+        self.out_dir = Path(out_dir)
+        self.optimize = optimize
+        self.precompress = precompress
+        self._assets: dict[str, str] = {}
+        self.manifest_path = self.out_dir / MANIFEST_NAME
+        self.previous = self._load_manifest()
+        self.current: dict[str, str] = {}
+        self.written: list[str] = []
+        self.skipped: list[str] = []
+        self.removed: list[str] = []
+
+    def _load_manifest(self) -> dict[str, str]:
+        try:
+            return json.loads(self.manifest_path.read_text(encoding="utf-8")).get("files", {})
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def write_bytes(self, name: str, data: bytes) -> bool:
+        """Write ``name`` (relative to the site root); return ``True`` if the file changed."""
+        digest = hashlib.sha256(data).hexdigest()
+        self.current[name] = digest
+        path = self.out_dir / name
+        compress = self.precompress and name.endswith(COMPRESSIBLE_SUFFIXES)
+        unchanged = self.previous.get(name) == digest and path.exists()
+        if unchanged and compress:
+            unchanged = (self.out_dir / f"{name}.gz").exists()
+        if unchanged:
+            self.skipped.append(name)
+            if compress:
+                for sibling in (f"{name}.gz", f"{name}.br"):
+                    if sibling in self.previous:
+                        self.current[sibling] = self.previous[sibling]
+            return False
+        write_atomic(path, data)
+        self.written.append(name)
+        if compress:
+            for suffix, packed in compressed_variants(data).items():
+                self.write_bytes(name + suffix, packed)
+        return True
+
+    def write_stream(self, name: str, digest: str, open_source: Callable[[], BinaryIO]) -> bool:
+        """Copy a large file from a stream unless the manifest already has it under ``digest``.
+
+        ``digest`` identifies the content without reading it (for a zip entry, its
+        CRC and size), so an unchanged file is neither read nor written. The file
+        is never precompressed.
+        """
+        self.current[name] = digest
+        path = self.out_dir / name
+        if self.previous.get(name) == digest and path.exists():
+            self.skipped.append(name)
+            return False
+        with open_source() as source:
+            write_atomic(path, source)
+        self.written.append(name)
+        return True
+
+    def write_text(self, name: str, text: str) -> bool:
+        if self.optimize:
+            if name.endswith(".html"):
+                text = minify_html(text)
+            elif name.endswith(".css"):
+                text = minify_css(text)
+        return self.write_bytes(name, text.encode("utf-8"))
+
+    def asset(self, name: str, text: str) -> str:
+        """Write a shared asset once under ``assets/`` with a content-hash name; return its path."""
+        if name not in self._assets:
+            if self.optimize and name.endswith(".css"):
+                text = minify_css(text)
+            path = f"assets/{fingerprint(name, text.encode('utf-8'))}"
+            self.write_bytes(path, text.encode("utf-8"))
+            self._assets[name] = path
+        return self._assets[name]
+
+    def write_json(self, name: str, obj: object) -> bool:
+        return self.write_text(name, json.dumps(obj, ensure_ascii=False, indent=2))
+
+    def stale(self) -> list[str]:
+        return sorted(name for name in self.previous if name not in self.current)
+
+    def close(self, *, prune: bool = False) -> list[str]:
+        """Save the manifest and optionally delete stale files; return the removed names."""
+        files = dict(self.current)
+        for name in self.stale():
+            if prune:
+                (self.out_dir / name).unlink(missing_ok=True)
+                self.removed.append(name)
+            else:
+                files[name] = self.previous[name]
+        if files != self.previous or not self.manifest_path.exists():
+            payload = json.dumps({"files": dict(sorted(files.items()))}, indent=2)
+            write_atomic(self.manifest_path, payload.encode("utf-8"))
+        self.previous = files
+        return self.removed
+
+    def summary(self) -> str:
+        return f"{len(self.written)} written, {len(self.skipped)} unchanged, {len(self.removed)} removed"
@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field, replace
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Collection, Mapping
+
+from .archive import ARCHIVE_JS, ARCHIVE_PAGE, ArchiveWriter, source_ids, viewer_html
+from .cache import LLMCache
+from .html import md_to_html_basic, write_html_page
+from .journal import BuildJournal, digest
+from .llm import DEFAULT_MODEL, call_llm_json, call_llm_text
+from .messages import chunk_messages, ensure_ids
+from .normalize import Normalizer
+from .output import SiteWriter, state_dir
+from .prefilter import AUDIT_NAME, Prefilter
+from .reduce import llm_combiner, local_combiner, tree_reduce
+from .redact import Redactor
+from .schema import SchemaGuard
+from .scrub import SecretScrubber
+from .split import ChunkSplitter
+from .search import SEARCH_JS, SearchIndex
+from .store import KnowledgeStore
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .dates import DateResolver
+    from .links import LinkExtractor
+    from .media import MediaLibrary
+
+
+@dataclass(frozen=True)
+class SiteSpec:
+    """Everything that differs between the ops, creative and public pipelines.
+
+    ``page_keys`` lists the knowledge sections each page is written from; pages not
+    listed get the whole knowledge object. Sending only the slice a page needs keeps
+    prompts small and lets unchanged pages hit the LLM cache. ``prompts`` (system
+    prompts and schemas) go into the build journal fingerprint. ``identity`` names
+    the fields that identify an item of each list section, used by tree reduction
+    to merge duplicates and superseded facts. ``chunk_redactor`` (default: the
+    build's redactor) is what chunk sizes are measured with; pipelines sharing one
+    extraction per chunk set it alike so their chunks line up. ``media_section`` is
+    the list section that published recordings are added to; ``link_sections``
+    maps each section filled from links found in the chat to the link kinds it
+    takes (empty for all); with ``curated_links`` those sections keep the model's
+    choice of links and the scan only canonicalizes them. ``event_sections`` hold
+    dated items (rehearsals, gigs, shows) that a ``DateResolver`` can resolve and
+    split into upcoming and past. ``skip_chunk`` is told about every chunk a build
+    does not pass to ``extract`` (prefiltered, or replayed from the journal).
+    """
+
+    name: str
+    empty: dict
+    extract: Callable[..., dict]
+    merge: Callable[[dict, dict], dict]
+    write_page: Callable[..., str]
+    pages: tuple[tuple[str, str], ...]
+    redactor: Redactor
+    min_gap_minutes: int
+    max_chars: int = 24000
+    page_keys: Mapping[str, tuple[str, ...]] = field(default_factory=dict)
+    prompts: tuple[str, ...] = ()
+    schema: dict | None = None
+    identity: Mapping[str, tuple[str, ...]] = field(default_factory=dict)
+    chunk_redactor: Redactor | None = None
+    media_section: str | None = None
+    link_sections: Mapping[str, tuple[str, ...]] = field(default_factory=dict)
+    curated_links: bool = False
+    event_sections: tuple[str, ...] = ()
+    skip_chunk: Callable[[list[dict]], None] | None = None
+
+    def page_knowledge(self, slug: str, knowledge: dict) -> dict:
+        keys = self.page_keys.get(slug)
+        return knowledge if keys is None else {key: knowledge[key] for key in keys}
+
+    def without_link_extraction(self) -> SiteSpec:
+        """This spec with its ``link_sections`` left out of the extraction prompt and schema.
+
+        For builds whose links are filled locally (a ``LinkExtractor``): the model
+        no longer lists links only to have them replaced. ``extract`` is called with
+        ``omit`` naming the sections. Curated sections stay, since the model picks
+        their links.
+        """
+        if self.curated_links or not self.link_sections:
+            return self
+        omit = tuple(self.link_sections)
+        return replace(
+            self, extract=partial(self.extract, omit=omit), prompts=self.prompts + (f"omit: {', '.join(omit)}",)
+        )
+
+
+def extract_system(rules: str, keys: Mapping[str, str], omit: Collection[str] = ()) -> str:
+    """An extraction system prompt: ``rules``, then the shape of each section in ``keys`` not in ``omit``."""
+    return rules + ",\n".join(shape for key, shape in keys.items() if key not in omit) + "\n"
+
+
+def omit_sections(schema: dict, omit: Collection[str]) -> dict:
+    """``schema`` (an object schema) without the properties in ``omit``."""
+    if not omit:
+        return schema
+    return {
+        **schema,
+        "properties": {key: value for key, value in schema["properties"].items() if key not in omit},
+        "required": [key for key in schema.get("required", ()) if key not in omit],
+    }
+
+
+def build_fingerprint(
+    spec: SiteSpec,
+    messages: list[dict],
+    *,
+    model: str | None,
+    redactor: Redactor,
+    scrubber: SecretScrubber | None,
+) -> str:
+    """Hash of everything that determines extraction and page results for a build."""
+    rules = [(r.name, r.pattern.pattern, r.pattern.flags, r.replacement, r.whole) for r in redactor.rules]
+    return digest(
+        {
+            "pipeline": spec.name,
+            "prompts": spec.prompts,
+            "model": model or DEFAULT_MODEL,
+            "chunking": [spec.max_chars, spec.min_gap_minutes],
+            "rules": rules,
+            "secrets": scrubber.fingerprint if scrubber is not None else None,
+            "messages": messages,
+        }
+    )
+
+
+def build_site(
+    spec: SiteSpec,
+    messages: list[dict],
+    out_dir: Path,
+    *,
+    title: str,
+    model: str | None = None,
+    llm_text=call_llm_text,
+    llm_json=call_llm_json,
+    redactor: Redactor | None = None,
+    scrubber: SecretScrubber | None = None,
+    writer: SiteWriter | None = None,
+    prune: bool = False,
+    cache: LLMCache | None = None,
+    journal: bool = True,
+    resume: bool = False,
+    prefilter: Prefilter | None = None,
+    normalizer: Normalizer | None = None,
+    reduce_mode: str | None = None,
+    fanout: int = 8,
+    workers: int = 4,
+    max_items: int = 200,
+    store: KnowledgeStore | None = None,
+    band: str | None = None,
+    search: bool = False,
+    archive: bool = False,
+    guard: SchemaGuard | None = None,
+    splitter: ChunkSplitter | None = None,
+    max_chars: int | None = None,
+    min_gap_minutes: int | None = None,
+    media: "MediaLibrary | None" = None,
+    links: "LinkExtractor | None" = None,
+    dates: "DateResolver | None" = None,
+) -> Path:
+    """Extract knowledge chunk by chunk, then write each page.
+
+    Unless ``journal`` is off, finished extractions and pages are logged to
+    ``.build-journal.jsonl`` in the :func:`state_dir` next to ``out_dir``, so it is
+    never deployed with the site; with ``resume`` a journal left by an interrupted
+    build of the same inputs is replayed instead of calling the model again (see
+    :class:`BuildJournal`). A ``prefilter`` skips chunks without any local sign of
+    relevant content and logs them to ``.prefilter-skipped.jsonl`` in the same state
+    directory. A ``normalizer`` drops and folds chat noise before chunking.
+
+    By default chunk extractions are concatenated with ``spec.merge``. With
+    ``reduce_mode="tree"`` they are reduced in groups of ``fanout`` on ``workers``
+    threads, each group consolidated by ``spec.identity`` (newest facts win) and
+    capped at ``max_items`` per section; ``"llm"`` additionally has the model
+    consolidate each group. Events only merge on a resolved ``YYYY-MM-DD`` date,
+    which ``dates`` supplies for each chunk extraction.
+
+    With a ``store`` every chunk extraction is also upserted into the SQLite
+    knowledge store under ``band`` (default: ``title``). ``search`` adds a search
+    box to every page and writes a sharded index of the pages and knowledge items
+    to ``search/`` (no extra model calls). ``archive`` writes the sanitized chat as
+    month shards under ``archive/`` with an ``archive.html`` viewer, and ends each
+    section page with links from its items to their source messages.
+
+    Every structured result is validated against its schema by ``guard`` (a
+    default :class:`SchemaGuard` if none is given): an invalid chunk is re-asked
+    with the errors attached, then salvaged, so it never aborts the build. A chunk
+    whose answer is cut off is bisected and extracted in halves by ``splitter``.
+    ``max_chars`` and ``min_gap_minutes`` override the pipeline's chunking. With
+    ``media`` (an export zip) the recordings the chat refers to are copied into
+    ``media/`` and listed in ``spec.media_section``. With ``links`` the sections in
+    ``spec.link_sections`` are left out of extraction and filled from URLs found in
+    the sanitized chat instead (curated sections are only checked against them).
+    With ``dates`` the items of
+    ``spec.event_sections`` get ISO dates and times, resolved against their source
+    messages, ``events.json`` lists them in order, and page writers receive those
+    sections already split into upcoming and past.
+    """
+    if reduce_mode not in (None, "tree", "llm"):
+        raise ValueError(f"Unknown reduce mode {reduce_mode!r}; expected 'tree' or 'llm'")
+    if max_chars is not None or min_gap_minutes is not None:
+        spec = replace(
+            spec,
+            max_chars=max_chars or spec.max_chars,
+            min_gap_minutes=spec.min_gap_minutes if min_gap_minutes is None else min_gap_minutes,
+        )
+    if links is not None:
+        spec = spec.without_link_extraction()
+    if cache is not None:
+        llm_json, llm_text = cache.wrap_json(llm_json), cache.wrap_text(llm_text)
+    llm_json = (guard or SchemaGuard()).wrap(llm_json)
+    splitter = splitter or ChunkSplitter()
+    redactor = redactor or spec.redactor
+    writer = writer or SiteWriter(out_dir)
+    msgs = archived = ensure_ids(messages)
+    if normalizer is not None:
+        msgs = normalizer.normalize(msgs)
+    chunks = chunk_messages(
+        msgs,
+        max_chars=spec.max_chars,
+        min_gap_minutes=spec.min_gap_minutes,
+        sanitize=(spec.chunk_redactor or redactor).redact,
+    )
+
+    log = None
+    if journal or resume:
+        fingerprint = build_fingerprint(spec, msgs, model=model, redactor=redactor, scrubber=scrubber)
+        log = BuildJournal.open(state_dir(out_dir), fingerprint, resume=resume)
+
+    def fresh() -> dict:
+        return json.loads(json.dumps(spec.empty))
+
+    complete = False
+    try:
+        parts = []
+        for index, ch in enumerate(chunks):
+            if prefilter is not None and not prefilter.keep(index, ch):
+                if spec.skip_chunk is not None:
+                    spec.skip_chunk(ch)
+                continue
+            chunk_digest = digest(ch) if log is not None else ""
+            part = log.extract(index, chunk_digest) if log is not None else None
+            if part is None:
+                part = splitter.extract(
+                    ch,
+                    lambda piece: spec.extract(
+                        piece, model=model, llm_json=llm_json, redactor=redactor, scrubber=scrubber
+                    ),
+                    lambda left, right: spec.merge(spec.merge(fresh(), left), right),
+                    fresh,
+                )
+                if log is not None:
+                    log.record_extract(index, chunk_digest, part)
+            elif spec.skip_chunk is not None:
+                spec.skip_chunk(ch)
+            if dates is not None and spec.event_sections:
+                dates.anchor(part, spec.event_sections, ch)
+            if store is not None:
+                store.upsert(band or title, spec, part, ch)
+            parts.append(part)
+
+        if reduce_mode is None:
+            knowledge = fresh()
+            for part in parts:
+                knowledge = spec.merge(knowledge, part)
+        else:
+            combine = local_combiner(spec.empty, spec.merge, spec.identity, max_items=max_items)
+            if reduce_mode == "llm":
+                combine = llm_combiner(combine, spec.schema, llm_json=llm_json, model=model, name=f"{spec.name}_reduce")
+            knowledge = tree_reduce(parts, combine, fanout=fanout, workers=workers) or fresh()
+
+        if scrubber is None:
+            sanitize = redactor.redact_many
+        else:
+            sanitize = lambda texts: scrubber.scrub_many(redactor.redact_many(texts))  # noqa: E731
+        if links is not None and spec.link_sections:
+            links.scan(msgs, sanitize)
+            links.apply(knowledge, spec.link_sections, spec.schema, curated=spec.curated_links)
+        if media is not None and spec.media_section:
+            known = {item.get("url") for item in knowledge[spec.media_section]}
+            published = media.publish(writer, archived)
+            knowledge[spec.media_section].extend(item for item in published if item["url"] not in known)
+        if scrubber is not None:
+            knowledge = scrubber.scrub_obj(knowledge)
+        if dates is not None and spec.event_sections:
+            events = dates.index(knowledge, spec.event_sections, archived)
+            writer.write_json("events.json", events.to_json(dates.today))
+        writer.write_json("knowledge.json", knowledge)
+        if prefilter is not None:
+            prefilter.write_audit(state_dir(out_dir) / AUDIT_NAME)
+
+        nav = [(label, f"{slug}.html") for slug, label in spec.pages]
+        archiver = None
+        if archive:
+            archiver = ArchiveWriter(writer, sanitize=sanitize, wanted=source_ids(knowledge))
+            archiver.write(archived)
+            nav.append(("Archive", ARCHIVE_PAGE))
+        search_js = writer.asset("search.js", SEARCH_JS) if search else None
+        pages = {}
+        for slug, _label in spec.pages:
+            page_knowledge = spec.page_knowledge(slug, knowledge)
+            prompt_knowledge = page_knowledge
+            if dates is not None and spec.event_sections:
+                prompt_knowledge = dates.page_view(page_knowledge, spec.event_sections, home=slug == spec.pages[0][0])
+            input_digest = digest(prompt_knowledge) if log is not None else ""
+            md = log.page(slug, input_digest) if log is not None else None
+            if md is None:
+                md = spec.write_page(slug, prompt_knowledge, model=model, llm_text=llm_text)
+                if log is not None:
+                    log.record_page(slug, input_digest, md)
+            pages[slug] = md
+            if archiver is not None and slug in spec.page_keys:
+                md += archiver.sources_markdown(page_knowledge)
+            if scrubber is not None:
+                md = scrubber.scrub(md)
+            write_html_page(
+                out_dir, title, nav, slug, md_to_html_basic(md), scrub=scrubber, writer=writer, search_js=search_js
+            )
+        if archiver is not None:
+            body = viewer_html(writer.asset("archive.js", ARCHIVE_JS))
+            write_html_page(out_dir, title, nav, "archive", body, scrub=scrubber, writer=writer, search_js=search_js)
+
+        if search:
+            index = SearchIndex()
+            index.add_site(spec, knowledge, pages, scrub=scrubber.scrub if scrubber is not None else None)
+            index.write(writer)
+
+        writer.close(prune=prune)
+        complete = True
+    finally:
+        if log is not None:
+            log.close(complete=complete)
+    return out_dir
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass, field, replace
+from typing import Sequence
+
+from .cache import LLMCache
+from .messages import chunk_messages, ensure_ids
+from .normalize import Normalizer
+from .pipeline import SiteSpec
+from .prefilter import Prefilter
+from .redact import Redactor
+from .schema import default_value
+from .scrub import SecretScrubber
+
+CHARS_PER_TOKEN = 4
+
+
+@dataclass(frozen=True)
+class Assumptions:
+    """Rates a plan is projected with; the defaults fit gpt-4o-mini (prices in USD per 1M tokens)."""
+
+    extract_output_ratio: float = 0.1
+    page_output_tokens: int = 900
+    seconds_per_call: float = 1.5
+    output_tokens_per_second: float = 80.0
+    price_in: float = 0.15
+    price_out: float = 0.60
+
+
+@dataclass(frozen=True)
+class CallEstimate:
+    kind: str
+    input_tokens: int
+    output_tokens: int
+    cached: bool = False
+
+
+@dataclass
+class BuildPlan:
+    """The model calls a build would make, estimated without making any."""
+
+    pipeline: str
+    max_chars: int
+    min_gap_minutes: int
+    messages: int
+    chunks: int
+    skipped: int
+    calls: list[CallEstimate] = field(default_factory=list)
+
+    def count(self, kind: str) -> int:
+        return sum(1 for call in self.calls if call.kind == kind)
+
+    @property
+    def cache_hits(self) -> int:
+        return sum(1 for call in self.calls if call.cached)
+
+    @property
+    def input_tokens(self) -> int:
+        return sum(call.input_tokens for call in self.calls if not call.cached)
+
+    @property
+    def output_tokens(self) -> int:
+        return sum(call.output_tokens for call in self.calls if not call.cached)
+
+    def wall_seconds(
+        self, assumptions: Assumptions, *, concurrency: int = 1, per_minute: float | None = None
+    ) -> float:
+        """Projected time for the uncached calls on ``concurrency`` slots under a ``per_minute`` request limit."""
+        busy = sum(
+            assumptions.seconds_per_call + call.output_tokens / assumptions.output_tokens_per_second
+            for call in self.calls
+            if not call.cached
+        )
+        seconds = busy / max(1, concurrency)
+        if per_minute:
+            seconds = max(seconds, (len(self.calls) - self.cache_hits) * 60 / per_minute)
+        return seconds
+
+    def cost(self, assumptions: Assumptions) -> float:
+        return (self.input_tokens * assumptions.price_in + self.output_tokens * assumptions.price_out) / 1e6
+
+
+def _tokens(*texts: str) -> int:
+    return math.ceil(sum(len(text) for text in texts) / CHARS_PER_TOKEN)
+
+
+def plan_build(
+    spec: SiteSpec,
+    messages: list[dict],
+    *,
+    model: str | None = None,
+    redactor: Redactor | None = None,
+    scrubber: SecretScrubber | None = None,
+    normalizer: Normalizer | None = None,
+    prefilter: Prefilter | None = None,
+    cache: LLMCache | None = None,
+    reduce_mode: str | None = None,
+    fanout: int = 8,
+    max_chars: int | None = None,
+    min_gap_minutes: int | None = None,
+    assumptions: Assumptions = Assumptions(),
+) -> BuildPlan:
+    """Plan a :func:`~bandchat2site.pipeline.build_site` run without calling the model.
+
+    Messages go through the same normalizing, redaction, chunking and prefilter
+    steps as a build, and every extraction prompt is rendered exactly, so its
+    size and whether ``cache`` already holds the answer are known. Output sizes
+    and the page prompts (which depend on the extracted knowledge) are estimated
+    from ``assumptions``; a cached extraction contributes its real size instead.
+    """
+    spec = replace(
+        spec,
+        max_chars=max_chars or spec.max_chars,
+        min_gap_minutes=spec.min_gap_minutes if min_gap_minutes is None else min_gap_minutes,
+    )
+    redactor = redactor or spec.redactor
+    msgs = ensure_ids(messages)
+    if normalizer is not None:
+        msgs = normalizer.normalize(msgs)
+    chunks = chunk_messages(
+        msgs,
+        max_chars=spec.max_chars,
+        min_gap_minutes=spec.min_gap_minutes,
+        sanitize=(spec.chunk_redactor or redactor).redact,
+    )
+    plan = BuildPlan(spec.name, spec.max_chars, spec.min_gap_minutes, len(msgs), len(chunks), 0)
+
+    def record_json(system_prompt, user_prompt, schema, *, model=None, name="response"):  # noqa: ANN001
+        key = LLMCache.key("json", model, system_prompt, user_prompt, schema)
+        cached = cache.get(key) if cache is not None and key in cache else None
+        input_tokens = _tokens(system_prompt, user_prompt, json.dumps(schema))
+        empty = default_value(schema)
+        if cached is not None:
+            output_tokens = _tokens(json.dumps(cached, ensure_ascii=False))
+        else:
+            ratio = assumptions.extract_output_ratio
+            output_tokens = _tokens(json.dumps(empty)) + math.ceil(_tokens(user_prompt) * ratio)
+        plan.calls.append(CallEstimate("extract", input_tokens, output_tokens, cached is not None))
+        return empty
+
+    for index, ch in enumerate(chunks):
+        if prefilter is not None and not prefilter.keep(index, ch):
+            plan.skipped += 1
+            if spec.skip_chunk is not None:
+                spec.skip_chunk(ch)
+            continue
+        spec.extract(ch, model=model, llm_json=record_json, redactor=redactor, scrubber=scrubber)
+
+    knowledge_tokens = sum(call.output_tokens for call in plan.calls)
+    if reduce_mode == "llm":
+        level = plan.count("extract")
+        while level > 1:
+            groups = math.ceil(level / fanout)
+            share = knowledge_tokens // max(1, groups)
+            plan.calls.extend(CallEstimate("reduce", share, share) for _ in range(groups))
+            level = groups
+
+    sections = [key for key, value in spec.empty.items() if isinstance(value, list)] or list(spec.empty)
+    for slug, _label in spec.pages:
+        prompts: list[str] = []
+
+        def record_text(system_prompt, user_prompt, *, model=None):  # noqa: ANN001
+            prompts.extend((system_prompt, user_prompt))
+            return ""
+
+        empty = json.loads(json.dumps(spec.empty))
+        spec.write_page(slug, spec.page_knowledge(slug, empty), model=model, llm_text=record_text)
+        keys = spec.page_keys.get(slug)
+        share = 1.0 if keys is None else min(1.0, len(keys) / max(1, len(sections)))
+        input_tokens = _tokens(*prompts) + math.ceil(knowledge_tokens * share)
+        plan.calls.append(CallEstimate("page", input_tokens, assumptions.page_output_tokens))
+    return plan
+
+
+def format_plans(
+    plans: Sequence[BuildPlan],
+    assumptions: Assumptions = Assumptions(),
+    *,
+    concurrency: int = 1,
+    per_minute: float | None = None,
+) -> str:
+    """Plain-text table comparing plans, one row per pipeline and chunking setting."""
+    header = (
+        "pipeline", "max_chars", "gap min", "chunks", "skipped", "extract", "pages", "cached", "tokens in",
+        "tokens out", "time", "cost $",
+    )
+    rows = []
+    for p in plans:
+        minutes = p.wall_seconds(assumptions, concurrency=concurrency, per_minute=per_minute) / 60
+        rows.append((
+            p.pipeline, f"{p.max_chars:,}", str(p.min_gap_minutes), f"{p.chunks:,}", f"{p.skipped:,}",
+            f"{p.count('extract') + p.count('reduce'):,}", str(p.count("page")), f"{p.cache_hits:,}",
+            f"{p.input_tokens:,}", f"{p.output_tokens:,}", f"{minutes:.1f} min", f"{p.cost(assumptions):.2f}",
+        ))
+    widths = [max(len(row[i]) for row in [header, *rows]) for i in range(len(header))]
+    lines = ["  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in [header, *rows]]
+    lines.insert(1, "  ".join("-" * width for width in widths))
+    extract_calls = [c for p in plans for c in p.calls if c.kind == "extract"]
+    if extract_calls:
+        average = sum(c.input_tokens for c in extract_calls) // len(extract_calls)
+        largest = max(c.input_tokens for c in extract_calls)
+        lines.append(f"extraction prompts: {average:,} tokens on average, {largest:,} at most")
+    limit = f", {per_minute:g} requests/min" if per_minute else ""
+    lines.append(
+        f"time for uncached calls on {concurrency} slot(s){limit}; tokens ≈ chars/{CHARS_PER_TOKEN}; "
+        f"prices ${assumptions.price_in:g}/${assumptions.price_out:g} per 1M tokens in/out"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Mapping, Sequence
+
+from .output import write_atomic
+
+# Signals every pipeline cares about. Scored once per match, like keywords.
+_DATE = (
+    r"\b(?:mon|tues?|wed(?:nes)?|thu(?:rs)?|fri|sat(?:ur)?|sun)(?:day)?\b"
+    r"|\b(?:tomorrow|tonight|next week|this weekend)\b"
+    r"|\b\d{1,2}(?:st|nd|rd|th)?\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\b"
+    r"|\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\s+\d{1,2}(?:st|nd|rd|th)?\b"
+    r"|\b\d{1,2}[/.]\d{1,2}(?:[/.]\d{2,4})?\b"
+)
+_TIME = r"\b\d{1,2}(?::\d{2})?\s?(?:am|pm)\b|\b\d{1,2}:\d{2}\b|\b\d{1,2}h\d{0,2}\b"
+_URL = r"https?://\S+|\bwww\.\S+"
+_VENUE = r"\b(?:club|bar|pub|hall|venue|theatre|theater|arena|festival|studio|lounge|cafe|church)\b"
+
+DEFAULT_WEIGHTS: Mapping[str, float] = {"date": 1.5, "time": 1.5, "url": 2.0, "venue": 1.0}
+
+KEYWORDS: dict[str, Mapping[str, float]] = {
+    "ops": {
+        "rehearsal": 2, "rehearse": 2, "practice": 1.5, "gig": 2, "show": 1, "soundcheck": 2, "load in": 2,
+        "load-in": 2, "call time": 2, "setlist": 1.5, "booking": 1.5, "book": 1, "invoice": 1.5, "deposit": 1.5,
+        "fee": 1, "pay": 1, "van": 1, "gear": 1.5, "amp": 1, "pa": 1, "drums": 1, "cable": 1, "bring": 1,
+        "todo": 1.5, "need to": 1, "can you": 1, "decided": 2, "agreed": 2, "confirm": 1.5, "confirmed": 1.5,
+        "cancel": 1.5, "reschedule": 2, "tickets": 1, "poster": 1, "deadline": 1.5, "rider": 1.5,
+    },
+    "creative": {
+        "song": 1.5, "chorus": 2, "verse": 2, "bridge": 2, "riff": 2, "lyrics": 2, "lyric": 2, "key": 1,
+        "tempo": 2, "bpm": 2, "arrangement": 2, "demo": 2, "mix": 1.5, "master": 1.5, "recording": 2,
+        "record": 1, "take": 1, "setlist": 1.5, "intro": 1.5, "outro": 1.5, "solo": 1.5, "harmony": 2,
+        "chord": 2, "chords": 2, "tuning": 1.5, "cover": 1, "new tune": 2, "decided": 1,
+    },
+    "public": {
+        "gig": 2, "show": 1.5, "tour": 2, "tickets": 2, "release": 2, "single": 1.5, "album": 2, "ep": 1.5,
+        "video": 1.5, "press": 2, "interview": 2, "review": 1.5, "radio": 2, "festival": 2, "stream": 1,
+        "spotify": 2, "bandcamp": 2, "youtube": 1.5, "instagram": 1.5, "bio": 2, "photo": 1, "photos": 1,
+        "support": 1, "headline": 1.5, "line-up": 1.5, "lineup": 1.5,
+    },
+}
+THRESHOLDS: dict[str, float] = {"ops": 2.0, "creative": 2.0, "public": 2.5}
+AUDIT_NAME = ".prefilter-skipped.jsonl"
+
+
+class Prefilter:
+    """Cheap local relevance score that decides whether a chunk is worth an LLM call.
+
+    Keywords and the date/time/URL/venue patterns are compiled into one
+    case-insensitive alternation and scanned once per chunk; each match adds its
+    weight. Chunks scoring below ``threshold`` are skipped and remembered in
+    ``skipped`` for the audit log. Where several keywords match at one position the
+    longest wins.
+    """
+
+    def __init__(
+        self,
+        keywords: Mapping[str, float],
+        *,
+        threshold: float,
+        weights: Mapping[str, float] = DEFAULT_WEIGHTS,
+    ):
+        self.keywords = {word.lower(): float(weight) for word, weight in keywords.items()}
+        self.threshold = threshold
+        self.weights = dict(weights)
+        words = "|".join(re.escape(word) for word in sorted(self.keywords, key=len, reverse=True))
+        parts = [f"(?P<url>{_URL})", f"(?P<date>{_DATE})", f"(?P<time>{_TIME})", f"(?P<venue>{_VENUE})"]
+        if words:
+            parts.append(rf"(?P<keyword>\b(?:{words})\b)")
+        self._scanner = re.compile("|".join(parts), re.I)
+        self.checked = 0
+        self.skipped: list[dict] = []
+
+    def score(self, texts: Iterable[str]) -> tuple[float, Counter]:
+        """Total score of ``texts`` and the number of matches per signal."""
+        total = 0.0
+        signals: Counter = Counter()
+        for match in self._scanner.finditer("\n".join(texts)):
+            kind = match.lastgroup
+            signals[kind] += 1
+            if kind == "keyword":
+                total += self.keywords[match.group().lower()]
+            else:
+                total += self.weights.get(kind, 0.0)
+        return total, signals
+
+    def keep(self, index: int, chunk: Sequence[Mapping]) -> bool:
+        """Whether chunk ``index`` should go to the model; records it in ``skipped`` if not."""
+        self.checked += 1
+        score, signals = self.score(m["text"] for m in chunk)
+        if score >= self.threshold:
+            return True
+        self.skipped.append(
+            {
+                "chunk": index,
+                "first_id": chunk[0]["id"],
+                "last_id": chunk[-1]["id"],
+                "messages": len(chunk),
+                "score": round(score, 2),
+                "signals": dict(signals),
+            }
+        )
+        return False
+
+    def write_audit(self, path: str | Path) -> None:
+        """One JSON line per skipped chunk (ids, score, signals; no message text)."""
+        lines = "".join(json.dumps(entry) + "\n" for entry in self.skipped)
+        write_atomic(Path(path), lines.encode("utf-8"))
+
+    def summary(self) -> str:
+        return f"{len(self.skipped)} of {self.checked} chunk(s) skipped"
+
+
+def build_prefilter(pipeline: str, threshold: float | None = None) -> Prefilter:
+    if pipeline not in KEYWORDS:
+        raise ValueError(f"Unknown pipeline {pipeline!r}; expected one of {sorted(KEYWORDS)}")
+    return Prefilter(KEYWORDS[pipeline], threshold=THRESHOLDS[pipeline] if threshold is None else threshold)
+
+
+def load_labels(path: str | Path) -> list[tuple[list[str], bool]]:
+    """Labelled chunks from JSONL lines ``{"messages": [{"text": ...}, ...] | "texts": [...], "relevant": bool}``."""
+    samples = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        texts = entry.get("texts") or [m["text"] for m in entry.get("messages", [])]
+        samples.append((texts, bool(entry["relevant"])))
+    return samples
+
+
+def calibrate(
+    prefilter: Prefilter, samples: Sequence[tuple[list[str], bool]], thresholds: Iterable[float]
+) -> list[dict]:
+    """Precision/recall of "send to the model" and the skip rate at each threshold.
+
+    Recall is the share of relevant chunks that would still be sent; a skipped
+    relevant chunk is lost information, so pick the highest threshold whose recall
+    you can live with.
+    """
+    scored = [(prefilter.score(texts)[0], relevant) for texts, relevant in samples]
+    rows = []
+    for threshold in thresholds:
+        sent_relevant = sum(1 for score, relevant in scored if score >= threshold and relevant)
+        sent = sum(1 for score, _ in scored if score >= threshold)
+        relevant = sum(1 for _, rel in scored if rel)
+        rows.append(
+            {
+                "threshold": threshold,
+                "precision": sent_relevant / sent if sent else 1.0,
+                "recall": sent_relevant / relevant if relevant else 1.0,
+                "skipped": 1 - sent / len(scored) if scored else 0.0,
+            }
+        )
+    return rows
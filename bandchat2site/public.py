@@ -3,9 +3,11 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
-from .html import md_to_html_basic, write_html_page
 from .llm import call_llm_json, call_llm_text
-from .messages import chunk_messages, ensure_ids, sanitize_public
+from .messages import PUBLIC_REDACTOR
+from .pipeline import SiteSpec, build_site
+from .redact import Redactor
+from .scrub import SecretScrubber
 
 PUBLIC_SCHEMA = {
     "type": "object",
@@ -132,9 +134,19 @@ Rules:
 """
 
 
-def extract_public(chunk: list[dict], *, model: str | None = None, llm_json=call_llm_json) -> dict:
+def extract_public(
+    chunk: list[dict],
+    *,
+    model: str | None = None,
+    llm_json=call_llm_json,
+    redactor: Redactor | None = None,
+    scrubber: SecretScrubber | None = None,
+) -> dict:
+    texts = (redactor or PUBLIC_REDACTOR).redact_many([m["text"] for m in chunk])
+    if scrubber is not None:
+        texts = scrubber.scrub_many(texts)
     transcript = "\n".join(
-        f"[{m['id']}] {m['ts']} {m['author']}: {sanitize_public(m['text'])}" for m in chunk
+        f"[{m['id']}] {m['ts']} {m['author']}: {text}" for m, text in zip(chunk, texts)
     )
     user = f"""Extract public-safe band info from these messages.
 
@@ -180,6 +192,42 @@ Return Markdown only.
     return llm_text(PUBLIC_WRITE_SYSTEM, user, model=model)
 
 
+PUBLIC_SITE = SiteSpec(
+    name="public",
+    empty=PUBLIC_EMPTY,
+    extract=extract_public,
+    merge=merge_public,
+    write_page=write_public_page,
+    pages=(
+        ("index", "Home"),
+        ("shows", "Shows"),
+        ("media", "Media"),
+        ("contact", "Contact"),
+        ("review", "Review"),
+    ),
+    redactor=PUBLIC_REDACTOR,
+    min_gap_minutes=360,
+    page_keys={
+        "index": ("band", "shows", "media"),
+        "shows": ("shows",),
+        "media": ("media",),
+        "contact": ("band", "contact"),
+    },
+    link_sections={"media": ()},
+    curated_links=True,
+    event_sections=("shows",),
+    prompts=(PUBLIC_EXTRACT_SYSTEM, PUBLIC_WRITE_SYSTEM, json.dumps(PUBLIC_SCHEMA, sort_keys=True)),
+    schema=PUBLIC_SCHEMA,
+    identity={
+        "shows": ("date", "venue"),
+        "media": ("url",),
+        "press": ("blurb",),
+        "contact": ("public_contact_text",),
+        "open_questions": ("question",),
+    },
+)
+
+
 def build_public_site(
     messages: list[dict],
     out_dir: Path,
@@ -188,28 +236,9 @@ def build_public_site(
     model: str | None = None,
     llm_text=call_llm_text,
     llm_json=call_llm_json,
+    **options,
 ) -> Path:
-    msgs = ensure_ids(messages)
-    chunks = chunk_messages(msgs, max_chars=12000, min_gap_minutes=360, sanitize=sanitize_public)
-
-    knowledge = json.loads(json.dumps(PUBLIC_EMPTY))
-    for ch in chunks:
-        knowledge = merge_public(knowledge, extract_public(ch, model=model, llm_json=llm_json))
-
-    out_dir.mkdir(parents=True, exist_ok=True)
-    (out_dir / "knowledge.json").write_text(json.dumps(knowledge, ensure_ascii=False, indent=2), encoding="utf-8")
-
-    pages = [
-        ("index", "Home"),
-        ("shows", "Shows"),
-        ("media", "Media"),
-        ("contact", "Contact"),
-        ("review", "Review"),
-    ]
-    nav = [(label, f"{slug}.html") for slug, label in pages]
-
-    for slug, _ in pages:
-        md = write_public_page(slug, knowledge, model=model, llm_text=llm_text)
-        write_html_page(out_dir, title, nav, slug, md_to_html_basic(md))
-
-    return out_dir
+    """Build the public site; ``options`` are passed through to :func:`~bandchat2site.pipeline.build_site`."""
+    return build_site(
+        PUBLIC_SITE, messages, out_dir, title=title, model=model, llm_text=llm_text, llm_json=llm_json, **options
+    )
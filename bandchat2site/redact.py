@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Mapping, Sequence
+
+# Inline flags that may be scoped to a single alternative with ``(?flags:...)``.
+_SCOPED_FLAGS = (
+    (re.IGNORECASE, "i"),
+    (re.MULTILINE, "m"),
+    (re.DOTALL, "s"),
+    (re.VERBOSE, "x"),
+)
+
+
+@dataclass(frozen=True)
+class RedactionRule:
+    """One redaction rule.
+
+    ``whole`` rules replace the entire message on a hit (used for private topics);
+    the others replace only the matched span. ``trigger`` lists characters of which
+    at least one must occur for the rule to match at all; messages without any of
+    them skip the rule entirely.
+    """
+
+    name: str
+    pattern: re.Pattern[str]
+    replacement: str
+    whole: bool = False
+    trigger: str = ""
+
+
+def _scoped(pattern: re.Pattern[str]) -> str:
+    flags = "".join(letter for flag, letter in _SCOPED_FLAGS if pattern.flags & flag)
+    return f"(?{flags}:{pattern.pattern})" if flags else f"(?:{pattern.pattern})"
+
+
+class Redactor:
+    """All rules compiled into one alternation and applied in a single scan.
+
+    Rules are tried in order at each position, so earlier rules win ties. Rule
+    patterns must not define named groups of their own. Rules with a ``trigger``
+    are only included in the scanner for messages containing a trigger character;
+    the scanner for each combination of active rules is compiled once and cached.
+    """
+
+    def __init__(self, rules: Sequence[RedactionRule]):
+        names = [rule.name for rule in rules]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate redaction rule names: {names}")
+        self.rules = tuple(rules)
+        self.hits: Counter[str] = Counter({name: 0 for name in names})
+        self._by_group = {f"r{i}": rule for i, rule in enumerate(self.rules)}
+        self._always = sum(1 << i for i, rule in enumerate(self.rules) if not rule.trigger)
+        self._gates = [
+            (1 << i, re.compile(f"[{re.escape(rule.trigger)}]").search)
+            for i, rule in enumerate(self.rules)
+            if rule.trigger
+        ]
+        self._scanners: dict[int, object] = {}
+
+    def _scanner(self, mask: int):
+        scanner = self._scanners.get(mask)
+        if scanner is None:
+            combined = "|".join(
+                f"(?P<r{i}>{_scoped(rule.pattern)})" for i, rule in enumerate(self.rules) if mask & (1 << i)
+            )
+            scanner = self._scanners[mask] = re.compile(combined).finditer
+        return scanner
+
+    def extend(self, rules: Iterable[RedactionRule]) -> "Redactor":
+        return Redactor(self.rules + tuple(rules))
+
+    def redact(self, text: str) -> str:
+        mask = self._always
+        for bit, gate in self._gates:
+            if gate(text):
+                mask |= bit
+        if not mask:
+            return text
+        by_group, hits = self._by_group, self.hits
+        out: list[str] = []
+        pos = 0
+        for match in self._scanner(mask)(text):
+            rule = by_group[match.lastgroup]
+            hits[rule.name] += 1
+            if rule.whole:
+                return rule.replacement
+            out.append(text[pos : match.start()])
+            out.append(rule.replacement)
+            pos = match.end()
+        if not out:
+            return text
+        out.append(text[pos:])
+        return "".join(out)
+
+    __call__ = redact
+
+    def redact_many(self, texts: Iterable[str]) -> list[str]:
+        """Batch form of :meth:`redact` for a whole chunk of message texts."""
+        redact = self.redact
+        return [redact(text) for text in texts]
+
+    def stats(self) -> dict[str, int]:
+        return dict(self.hits)
+
+    def reset_stats(self) -> None:
+        for name in self.hits:
+            self.hits[name] = 0
+
+
+def rules_from_config(entries: Iterable[Mapping[str, object]]) -> list[RedactionRule]:
+    """Build rules from ``[{name, pattern, replacement?, whole?, ignore_case?, trigger?}]``."""
+    rules = []
+    for entry in entries:
+        if "name" not in entry or "pattern" not in entry:
+            raise ValueError(f"Redaction rule needs 'name' and 'pattern': {entry!r}")
+        flags = re.IGNORECASE if entry.get("ignore_case") else 0
+        name = str(entry["name"])
+        rules.append(
+            RedactionRule(
+                name=name,
+                pattern=re.compile(str(entry["pattern"]), flags),
+                replacement=str(entry.get("replacement", f"[REDACTED_{name.upper()}]")),
+                whole=bool(entry.get("whole", False)),
+                trigger=str(entry.get("trigger", "")),
+            )
+        )
+    return rules
+
+
+def load_rules(path: str | Path) -> list[RedactionRule]:
+    """Load custom per-band rules from a JSON list (see :func:`rules_from_config`)."""
+    return rules_from_config(json.loads(Path(path).read_text(encoding="utf-8")))
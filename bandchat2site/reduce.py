@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce as fold
+from typing import Any, Callable, Mapping, Sequence
+
+_WS = re.compile(r"\s+")
+_ISO_DAY = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+# Identity fields that only identify an item once they hold an ISO day: two
+# rehearsals "on Friday" said weeks apart are different rehearsals.
+DAY_FIELDS = frozenset({"date"})
+
+REDUCE_SYSTEM = """You consolidate band knowledge extracted from consecutive chat chunks.
+Rules:
+- The input JSON is already merged, oldest facts first; higher source IDs are newer.
+- Merge items that describe the same thing (same rehearsal, gig, task, song, ...).
+- When facts conflict, keep the newer one (higher source IDs); drop superseded details.
+- Keep the union of sources for every merged item.
+- Do not invent anything that is not in the input.
+Return STRICT JSON with the same keys as the input.
+"""
+
+
+def _norm(value: Any) -> str:
+    return _WS.sub(" ", str(value).strip().casefold()) if value is not None else ""
+
+
+def recency(item: Mapping) -> int:
+    """Newest message id an item cites (``-1`` if none)."""
+    sources = [s for s in item.get("sources", []) if isinstance(s, int)]
+    return max(sources, default=-1)
+
+
+def identity_key(item: Mapping, fields: Sequence[str]) -> str:
+    """Key under which items describing the same thing collapse.
+
+    A field in :data:`DAY_FIELDS` must hold a ``YYYY-MM-DD`` date (see
+    :meth:`DateResolver.anchor`); until it does only exact duplicates collapse.
+    """
+    key = tuple(_norm(item.get(field)) for field in fields)
+    dated = all(_ISO_DAY.match(value) for field, value in zip(fields, key) if field in DAY_FIELDS)
+    if dated and any(key):
+        return json.dumps(key)
+    # Nothing to identify the item by: only collapse exact duplicates.
+    return json.dumps({k: v for k, v in item.items() if k != "sources"}, sort_keys=True, ensure_ascii=False)
+
+
+def merge_items(items: list[dict], max_sources: int | None = None) -> dict:
+    """Fold items describing the same thing, oldest first, so newer non-empty values win."""
+    merged: dict = {}
+    for item in sorted(items, key=recency):
+        for key, value in item.items():
+            if isinstance(value, list):
+                merged.setdefault(key, []).extend(value)
+            elif value not in (None, ""):
+                merged[key] = value
+    for key, value in merged.items():
+        if isinstance(value, list):
+            try:
+                merged[key] = list(dict.fromkeys(value))
+            except TypeError:  # unhashable entries (nested objects): keep the first of each
+                merged[key] = [v for i, v in enumerate(value) if v not in value[:i]]
+    if "sources" in merged:
+        sources = sorted(merged["sources"], key=lambda s: (not isinstance(s, int), s))
+        merged["sources"] = sources[-max_sources:] if max_sources else sources
+    return merged
+
+
+def consolidate(
+    knowledge: dict,
+    identity: Mapping[str, Sequence[str]],
+    *,
+    max_items: int | None = None,
+    max_sources: int | None = None,
+) -> dict:
+    """Collapse duplicate and superseded items per section, keeping ``sources``.
+
+    Items of a section listed in ``identity`` with the same identity fields (compared
+    case- and whitespace-insensitively) are merged; on conflicting values the item
+    citing the newest message wins. With ``max_items`` only the most recent items of
+    each section are kept and with ``max_sources`` only the newest citations of each
+    item, so the result stays bounded however long the chat is.
+    """
+    out = dict(knowledge)
+    for section, fields in identity.items():
+        items = knowledge.get(section)
+        if not isinstance(items, list):
+            continue
+        groups: dict[str, list[dict]] = {}
+        for item in items:
+            groups.setdefault(identity_key(item, fields), []).append(item)
+        merged = sorted((merge_items(group, max_sources) for group in groups.values()), key=recency)
+        out[section] = merged[-max_items:] if max_items else merged
+    return out
+
+
+def tree_reduce(
+    parts: Sequence[dict],
+    combine: Callable[[list[dict]], dict],
+    *,
+    fanout: int = 8,
+    workers: int = 4,
+) -> dict | None:
+    """Reduce ``parts`` with ``combine`` in groups of ``fanout`` until one remains.
+
+    The groups of each level are combined concurrently on ``workers`` threads, which
+    pays off when ``combine`` calls the model. Order is preserved, so every group
+    sees its parts oldest first. Every input part is combined at least once; above
+    the first level a lone leftover group is carried up unchanged. Returns ``None``
+    for no parts.
+    """
+    if fanout < 2:
+        raise ValueError("fanout must be at least 2")
+    level = list(parts)
+    if not level:
+        return None
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="reduce") as pool:
+        level = list(pool.map(combine, [level[i : i + fanout] for i in range(0, len(level), fanout)]))
+        while len(level) > 1:
+            groups = [level[i : i + fanout] for i in range(0, len(level), fanout)]
+            carried = groups.pop() if len(groups[-1]) == 1 else None
+            level = list(pool.map(combine, groups)) + (carried or [])
+    return level[0]
+
+
+def local_combiner(
+    empty: dict,
+    merge: Callable[[dict, dict], dict],
+    identity: Mapping[str, Sequence[str]],
+    *,
+    max_items: int | None = None,
+    max_sources: int | None = 20,
+) -> Callable[[list[dict]], dict]:
+    """Combine a group with the pipeline's ``merge`` followed by :func:`consolidate`."""
+
+    def combine(group: list[dict]) -> dict:
+        merged = fold(merge, group, json.loads(json.dumps(empty)))
+        return consolidate(merged, identity, max_items=max_items, max_sources=max_sources)
+
+    return combine
+
+
+def llm_combiner(
+    local: Callable[[list[dict]], dict],
+    schema: dict,
+    *,
+    llm_json: Callable[..., dict],
+    model: str | None = None,
+    name: str = "reduce",
+) -> Callable[[list[dict]], dict]:
+    """Combine locally, then let the model resolve what identity keys cannot (re-consolidated after)."""
+
+    def combine(group: list[dict]) -> dict:
+        merged = local(group)
+        user = f"""Consolidate this band knowledge.
+
+KNOWLEDGE_JSON:
+{json.dumps(merged, ensure_ascii=False)}
+
+Return STRICT JSON only.
+"""
+        return local([llm_json(REDUCE_SYSTEM, user, schema, model=model, name=name)])
+
+    return combine
@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable
+
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+# openai/httpx transport errors carry no status code; match them by class name so
+# this module does not need to import either package.
+RETRYABLE_ERRORS = ("APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout", "TimeoutException")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+def _status_code(exc: BaseException) -> int | None:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Rate limits, timeouts, server errors and dropped connections are worth retrying."""
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    status = _status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return any(cls.__name__ in RETRYABLE_ERRORS for cls in type(exc).__mro__)
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """Seconds the server asked us to wait (``Retry-After`` / ``retry-after-ms``), if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter; a server ``Retry-After`` wins when given."""
+
+    attempts: int = 5
+    base: float = 1.0
+    cap: float = 30.0
+
+    def delay(
+        self, attempt: int, exc: BaseException | None = None, *, rng: Callable[[], float] = random.random
+    ) -> float:
+        """Seconds to sleep after failed attempt number ``attempt`` (starting at 1)."""
+        hinted = retry_after(exc) if exc is not None else None
+        if hinted is not None:
+            return min(hinted, self.cap)
+        return rng() * min(self.cap, self.base * 2 ** (attempt - 1))
+
+
+class CircuitBreaker:
+    """Stops calling the API when most recent calls failed with transient errors.
+
+    Outcomes of the last ``window`` calls are kept; once at least ``min_calls`` are
+    recorded and the failure ratio reaches ``threshold`` the circuit opens and calls
+    fail fast with :class:`CircuitOpenError` for ``cooldown`` seconds. After that a
+    single probe call is let through: success closes the circuit, failure re-opens it.
+    Only the probe's outcome counts while the circuit is not closed; calls started
+    before it opened finish without touching it.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float = 0.5,
+        window: int = 20,
+        min_calls: int = 5,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.threshold = threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.clock = clock
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.opened_at: float | None = None
+        self.opens = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.clock() - self.opened_at >= self.cooldown else "open"
+
+    def before_call(self) -> bool:
+        """Raise :class:`CircuitOpenError` or let the call through; ``True`` if it is the half-open probe."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return False
+            if state == "open" or self._probing:
+                remaining = max(0.0, self.cooldown - (self.clock() - self.opened_at))
+                raise CircuitOpenError(f"LLM circuit open after repeated failures; retry in {remaining:.0f}s")
+            self._probing = True
+            return True
+
+    def release(self) -> None:
+        """Let the next call probe again if the probe ended without a recorded outcome."""
+        with self._lock:
+            self._probing = False
+
+    def record(self, ok: bool, *, probe: bool = False) -> None:
+        with self._lock:
+            if self.opened_at is not None:
+                if not probe:
+                    return
+                self._probing = False
+                if ok:
+                    self.opened_at = None
+                    self.outcomes.clear()
+                else:
+                    self.opened_at = self.clock()
+                return
+            self.outcomes.append(ok)
+            failures = self.outcomes.count(False)
+            if len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.threshold:
+                self.opened_at = self.clock()
+                self.opens += 1
+
+
+class Hedger:
+    """Sends a duplicate request when the first one is slower than usual.
+
+    Latencies of successful calls are tracked; once ``min_samples`` are known, a call
+    still running after the ``percentile`` latency gets one backup request and
+    whichever finishes first wins. The loser keeps running on its worker thread and
+    its result is discarded.
+    """
+
+    def __init__(self, *, percentile: float = 95.0, min_samples: int = 10, window: int = 200, max_workers: int = 8):
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.hedged = 0
+        self.won = 0
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+        self._lock = threading.Lock()
+
+    def threshold(self) -> float | None:
+        with self._lock:
+            if len(self.latencies) < self.min_samples:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+
+    def _timed(self, fn: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        result = fn()
+        with self._lock:
+            self.latencies.append(time.perf_counter() - started)
+        return result
+
+    def run(self, fn: Callable[[], Any]) -> Any:
+        after = self.threshold()
+        if after is None:
+            return self._timed(fn)
+        primary = self._pool.submit(self._timed, fn)
+        done, _ = wait([primary], timeout=after)
+        if done:
+            return primary.result()
+        self.hedged += 1
+        backup = self._pool.submit(self._timed, fn)
+        pending = {primary, backup}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            succeeded = [future for future in done if future.exception() is None]
+            if succeeded:
+                if primary not in succeeded:
+                    self.won += 1
+                return (primary if primary in succeeded else backup).result()
+            if not pending:
+                return primary.result()  # both failed: surface the original error
+
+
+class RateLimiter:
+    """Spaces API calls at least ``60 / per_minute`` seconds apart.
+
+    The next free slot lives in shared memory, so one limiter created before a
+    process pool starts and handed to its workers (see ``batch``) enforces a
+    single request budget across all of them as well as across threads.
+    """
+
+    def __init__(
+        self,
+        per_minute: float,
+        *,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        import multiprocessing  # only batch/daemon runs need a limiter; keep it off the import path
+
+        self.interval = 60.0 / per_minute
+        self.clock = clock
+        self.sleep = sleep
+        self._next = multiprocessing.Value("d", 0.0)
+
+    def acquire(self) -> float:
+        """Block until this caller's slot; return the seconds waited."""
+        with self._next.get_lock():
+            now = self.clock()
+            slot = max(now, self._next.value)
+            self._next.value = slot + self.interval
+        if slot > now:
+            self.sleep(slot - now)
+        return slot - now
+
+
+class ResilientCaller:
+    """Retries, hedging and circuit breaking around one kind of API call.
+
+    Wraps a single request (one chunk extraction or one page), so a failure is
+    retried on its own instead of aborting the build and re-sending earlier chunks.
+    A ``limiter`` is consulted before every attempt, retries included.
+    """
+
+    def __init__(
+        self,
+        policy: RetryPolicy | None = None,
+        *,
+        breaker: CircuitBreaker | None = None,
+        hedger: Hedger | None = None,
+        limiter: RateLimiter | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker
+        self.hedger = hedger
+        self.limiter = limiter
+        self.sleep = sleep
+        self.calls = 0
+        self.retries = 0
+
+    def call(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+        self.calls += 1
+        attempt = 1
+        while True:
+            probe = self.breaker.before_call() if self.breaker is not None else False
+            try:
+                if self.limiter is not None:
+                    self.limiter.acquire()
+                if self.hedger is not None:
+                    result = self.hedger.run(lambda: fn(*args, **kwargs))
+                else:
+                    result = fn(*args, **kwargs)
+            except Exception as exc:
+                if not is_retryable(exc):
+                    raise
+                if self.breaker is not None:
+                    self.breaker.record(False, probe=probe)
+                if attempt >= self.policy.attempts:
+                    raise
+                self.sleep(self.policy.delay(attempt, exc))
+                self.retries += 1
+                attempt += 1
+                continue
+            else:
+                if self.breaker is not None:
+                    self.breaker.record(True, probe=probe)
+                return result
+            finally:
+                # A non-retryable error (e.g. a 400) says nothing about the API's health,
+                # but must not leave a half-open probe claimed forever.
+                if probe:
+                    self.breaker.release()
+
+    def summary(self) -> str:
+        parts = [f"{self.calls} call(s)", f"{self.retries} retried"]
+        if self.hedger is not None:
+            parts.append(f"{self.hedger.hedged} hedged ({self.hedger.won} won by the backup)")
+        if self.breaker is not None and self.breaker.opens:
+            parts.append(f"circuit opened {self.breaker.opens}x")
+        return ", ".join(parts)
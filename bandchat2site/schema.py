@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Callable
+
+MAX_REPORTED_ERRORS = 20
+_INVALID = object()
+_INTEGER = re.compile(r"\s*#?(-?\d+)\s*")
+
+REPAIR_NOTE = """
+
+Your previous answer did not match the JSON schema:
+{errors}
+Return the complete corrected JSON only."""
+
+
+def default_value(schema: dict) -> Any:
+    """Smallest valid instance of ``schema``: empty lists, empty strings, required keys only."""
+    kind = schema.get("type")
+    if kind == "object":
+        props = schema.get("properties", {})
+        return {key: default_value(props.get(key, {})) for key in schema.get("required", ())}
+    if kind == "array":
+        return []
+    if "enum" in schema:
+        return schema["enum"][0]
+    return {"string": "", "integer": 0, "number": 0, "boolean": False}.get(kind)
+
+
+class Validator:
+    """A JSON schema compiled once into nested closures.
+
+    Supports the subset the pipeline schemas use: ``type`` (object, array, string,
+    integer, number, boolean), ``properties``, ``required``,
+    ``additionalProperties: false``, ``items`` and ``enum``. :meth:`errors` lists
+    every mismatch with its JSON path; :meth:`salvage` returns the closest valid
+    value, dropping unknown keys and invalid list items, coercing obvious near
+    misses (``"12"`` or ``"#12"`` for an integer, a differently cased enum value)
+    and filling missing required lists, so one bad item does not cost the chunk.
+    """
+
+    def __init__(self, schema: dict):
+        self.schema = schema
+        self._check, self._fix = self._compile(schema)
+
+    def errors(self, value: Any) -> list[str]:
+        found: list[str] = []
+        self._check(value, "$", found)
+        return found
+
+    def salvage(self, value: Any) -> tuple[Any, list[str]]:
+        """Closest valid value to ``value`` and what had to change to get there."""
+        dropped: list[str] = []
+        fixed = self._fix(value, "$", dropped)
+        if fixed is _INVALID:
+            return default_value(self.schema), dropped
+        return fixed, dropped
+
+    def _compile(self, schema: dict) -> tuple[Callable, Callable]:
+        kind = schema.get("type")
+        if kind == "object":
+            return self._compile_object(schema)
+        if kind == "array":
+            return self._compile_array(schema)
+        return self._compile_scalar(schema)
+
+    def _compile_object(self, schema: dict):
+        props = schema.get("properties", {})
+        fields = {key: self._compile(sub) for key, sub in props.items()}
+        required = tuple(schema.get("required", ()))
+        closed = schema.get("additionalProperties") is False
+
+        def check(value, path, found):
+            if not isinstance(value, dict):
+                found.append(f"{path}: expected object, got {type(value).__name__}")
+                return
+            for key in required:
+                if key not in value:
+                    found.append(f"{path}: missing required {key!r}")
+            for key, entry in value.items():
+                if key in fields:
+                    fields[key][0](entry, f"{path}.{key}", found)
+                elif closed:
+                    found.append(f"{path}: unexpected key {key!r}")
+
+        def fix(value, path, dropped):
+            if not isinstance(value, dict):
+                dropped.append(f"{path}: not an object")
+                return _INVALID
+            out = {}
+            for key, entry in value.items():
+                if key not in fields:
+                    if closed:
+                        dropped.append(f"{path}.{key}: unexpected key")
+                    else:
+                        out[key] = entry
+                    continue
+                fixed = fields[key][1](entry, f"{path}.{key}", dropped)
+                if fixed is not _INVALID:
+                    out[key] = fixed
+            for key in required:
+                if key not in out:
+                    if props.get(key, {}).get("type") not in ("array", "object"):
+                        dropped.append(f"{path}: missing required {key!r}")
+                        return _INVALID
+                    out[key] = default_value(props[key])
+            return out
+
+        return check, fix
+
+    def _compile_array(self, schema: dict):
+        item_check, item_fix = self._compile(schema.get("items", {}))
+
+        def check(value, path, found):
+            if not isinstance(value, list):
+                found.append(f"{path}: expected array, got {type(value).__name__}")
+                return
+            for i, entry in enumerate(value):
+                item_check(entry, f"{path}[{i}]", found)
+
+        def fix(value, path, dropped):
+            if not isinstance(value, list):
+                dropped.append(f"{path}: not an array")
+                return _INVALID
+            out = []
+            for i, entry in enumerate(value):
+                fixed = item_fix(entry, f"{path}[{i}]", dropped)
+                if fixed is not _INVALID:
+                    out.append(fixed)
+            return out
+
+        return check, fix
+
+    def _compile_scalar(self, schema: dict):
+        kind = schema.get("type")
+        enum = tuple(schema.get("enum", ()))
+        folded = {str(option).lower(): option for option in enum}
+
+        def matches(value):
+            if kind == "string":
+                ok = isinstance(value, str)
+            elif kind == "integer":
+                ok = isinstance(value, int) and not isinstance(value, bool)
+            elif kind == "number":
+                ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+            elif kind == "boolean":
+                ok = isinstance(value, bool)
+            else:
+                ok = True
+            return ok and (not enum or value in enum)
+
+        def check(value, path, found):
+            if not matches(value):
+                expected = f"one of {list(enum)}" if enum else kind
+                found.append(f"{path}: expected {expected}, got {json.dumps(value, ensure_ascii=False)[:60]}")
+
+        def coerce(value):
+            if kind == "string" and isinstance(value, (int, float)) and not isinstance(value, bool):
+                return str(value)
+            if kind in ("integer", "number") and isinstance(value, str):
+                match = _INTEGER.fullmatch(value)
+                return int(match.group(1)) if match else _INVALID
+            if kind == "integer" and isinstance(value, float) and value.is_integer():
+                return int(value)
+            return _INVALID
+
+        def fix(value, path, dropped):
+            if matches(value):
+                return value
+            fixed = coerce(value)
+            if fixed is _INVALID and enum and isinstance(value, str):
+                fixed = folded.get(value.strip().lower(), _INVALID)
+            if fixed is _INVALID or not matches(fixed):
+                dropped.append(f"{path}: invalid {json.dumps(value, ensure_ascii=False)[:60]}")
+                return _INVALID
+            return fixed
+
+        return check, fix
+
+
+_VALIDATORS: dict[int, tuple[dict, Validator]] = {}
+
+
+def validator_for(schema: dict) -> Validator:
+    """The compiled validator of ``schema``, compiled on first use and then reused."""
+    entry = _VALIDATORS.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        entry = _VALIDATORS[id(schema)] = (schema, Validator(schema))
+    return entry[1]
+
+
+class SchemaGuard:
+    """Checks every structured model result against its schema before it is used.
+
+    A result that does not validate (or is not JSON at all) is asked for again
+    once per ``repairs``, with the validation errors appended to the same
+    prompt; only that chunk is re-sent. If it still does not validate it is
+    salvaged (see :meth:`Validator.salvage`) instead of failing the build.
+    """
+
+    def __init__(self, *, repairs: int = 1):
+        if repairs < 0:
+            raise ValueError("repairs must not be negative")
+        self.repairs = repairs
+        self.checked = 0
+        self.invalid = 0
+        self.repaired = 0
+        self.salvaged = 0
+        self.problems: list[tuple[str, list[str]]] = []
+
+    def wrap(self, llm_json):
+        """Validating version of an ``llm_json(system, user, schema, *, model, name)`` callable."""
+
+        def guarded_llm_json(system_prompt, user_prompt, schema, *, model=None, name="response"):
+            validator = validator_for(schema)
+            prompt, result, errors = user_prompt, None, []
+            for attempt in range(self.repairs + 1):
+                try:
+                    result = llm_json(system_prompt, prompt, schema, model=model, name=name)
+                    errors = validator.errors(result)
+                except ValueError as exc:  # not JSON at all
+                    result, errors = None, [f"$: {exc}"]
+                if attempt == 0:
+                    self.checked += 1
+                if not errors:
+                    self.repaired += attempt > 0
+                    return result
+                if attempt == 0:
+                    self.invalid += 1
+                listed = "\n".join(f"- {error}" for error in errors[:MAX_REPORTED_ERRORS])
+                prompt = user_prompt + REPAIR_NOTE.format(errors=listed)
+            self.salvaged += 1
+            fixed, dropped = validator.salvage(result)
+            self.problems.append((name, dropped or errors[:MAX_REPORTED_ERRORS]))
+            return fixed
+
+        return guarded_llm_json
+
+    def summary(self) -> str:
+        return (
+            f"{self.checked} result(s) checked, {self.invalid} invalid, "
+            f"{self.repaired} repaired, {self.salvaged} salvaged"
+        )
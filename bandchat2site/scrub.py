@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import hashlib
+import html
+import json
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+# Characters ignored on both sides when matching, so "06 12 34-56 78" still hits
+# "0612345678" and "ada (at) example (dot) com" hits the email variant.
+_SKIP = frozenset(" \t\r\n-._()[]{}/\\|*'\"")
+
+REPLACEMENT = "[REDACTED]"
+
+
+def _fold(ch: str) -> str:
+    low = ch.lower()
+    return low if len(low) == 1 else ch
+
+
+def _normalize(s: str) -> str:
+    return "".join(_fold(ch) for ch in s if ch not in _SKIP)
+
+
+class AhoCorasick:
+    """Multi-pattern automaton; scan cost is linear in the text, not in the pattern count."""
+
+    def __init__(self, patterns: Iterable[str]):
+        goto: list[dict[str, int]] = [{}]
+        out: list[tuple[int, ...]] = [()]
+        for pattern in patterns:
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = goto[state][ch] = len(goto)
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            if len(pattern) not in out[state]:
+                out[state] += (len(pattern),)
+
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] += out[fail[nxt]]
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, int]]:
+        """Yield ``(end, length)`` for every pattern occurrence; ``end`` is exclusive."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length in out[state]:
+                yield i + 1, length
+
+
+def _variants(secret: str) -> set[str]:
+    variants = {secret, html.escape(secret)}
+    if "@" in secret:
+        variants.add(secret.replace("@", " at ").replace(".", " dot "))
+    if secret.startswith("+"):
+        variants.add(secret[1:])
+    return variants
+
+
+class SecretScrubber:
+    """Scrubs a per-band list of known private strings (surnames, addresses, contacts).
+
+    Matching ignores case, whitespace and common separators, and only accepts hits
+    that start and end on word boundaries of the original text.
+    """
+
+    def __init__(self, secrets: Iterable[str], *, replacement: str = REPLACEMENT, min_length: int = 3):
+        patterns = set()
+        for secret in secrets:
+            for variant in _variants(secret.strip()):
+                norm = _normalize(variant)
+                if len(norm) >= min_length:
+                    patterns.add(norm)
+        self.replacement = replacement
+        self.pattern_count = len(patterns)
+        self.fingerprint = hashlib.sha256("\n".join(sorted(patterns)).encode("utf-8")).hexdigest()
+        self.hits = 0
+        self._automaton = AhoCorasick(sorted(patterns)) if patterns else None
+
+    @classmethod
+    def from_file(cls, path: str | Path, **kwargs) -> "SecretScrubber":
+        """Load secrets from a JSON list or a text file with one secret per line (``#`` comments)."""
+        raw = Path(path).read_text(encoding="utf-8")
+        if raw.lstrip().startswith("["):
+            secrets = [str(s) for s in json.loads(raw)]
+        else:
+            secrets = [line for line in raw.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+        return cls(secrets, **kwargs)
+
+    def find(self, text: str) -> list[tuple[int, int]]:
+        """Non-overlapping ``(start, end)`` spans of secrets in ``text``, leftmost-longest."""
+        if self._automaton is None:
+            return []
+        positions = [i for i, ch in enumerate(text) if ch not in _SKIP]
+        norm = "".join(_fold(text[i]) for i in positions)
+        spans = []
+        for end, length in self._automaton.iter_matches(norm):
+            start = positions[end - length]
+            stop = positions[end - 1] + 1
+            if start > 0 and text[start - 1].isalnum() and text[start].isalnum():
+                continue
+            if stop < len(text) and text[stop].isalnum() and text[stop - 1].isalnum():
+                continue
+            spans.append((start, stop))
+        spans.sort(key=lambda span: (span[0], -span[1]))
+        chosen: list[tuple[int, int]] = []
+        for start, stop in spans:
+            if not chosen or start >= chosen[-1][1]:
+                chosen.append((start, stop))
+        return chosen
+
+    def leaks(self, text: str) -> list[str]:
+        return [text[start:stop] for start, stop in self.find(text)]
+
+    def scrub(self, text: str) -> str:
+        spans = self.find(text)
+        if not spans:
+            return text
+        self.hits += len(spans)
+        out = []
+        pos = 0
+        for start, stop in spans:
+            out.append(text[pos:start])
+            out.append(self.replacement)
+            pos = stop
+        out.append(text[pos:])
+        return "".join(out)
+
+    __call__ = scrub
+
+    def scrub_many(self, texts: Iterable[str]) -> list[str]:
+        scrub = self.scrub
+        return [scrub(text) for text in texts]
+
+    def scrub_obj(self, obj: Any) -> Any:
+        """Scrub every string inside a JSON-like structure."""
+        if isinstance(obj, str):
+            return self.scrub(obj)
+        if isinstance(obj, dict):
+            return {key: self.scrub_obj(value) for key, value in obj.items()}
+        if isinstance(obj, list):
+            return [self.scrub_obj(value) for value in obj]
+        return obj
+
+
+def check_site(site_dir: str | Path, scrubber: SecretScrubber) -> dict[str, list[str]]:
+    """Leak check over a generated site: ``{relative_path: [leaked strings]}``."""
+    root = Path(site_dir)
+    report = {}
+    for path in sorted(root.rglob("*")):
+        if path.is_file() and path.suffix in {".html", ".json", ".js", ".css", ".txt"}:
+            found = scrubber.leaks(path.read_text(encoding="utf-8", errors="replace"))
+            if found:
+                report[str(path.relative_to(root))] = found
+    return report
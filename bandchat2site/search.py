@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from typing import TYPE_CHECKING, Callable, Iterable, Mapping
+
+from .output import SiteWriter
+from .store import ENTITIES
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .pipeline import SiteSpec
+
+INDEX_DIR = "search"
+DOC_SHARD_SIZE = 256
+SNIPPET_CHARS = 140
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was we were will "
+    "with".split()
+)
+_TOKEN = re.compile(r"[^\W_]+")
+_TAG = re.compile(r"<[^>]+>")
+_MD_NOISE = re.compile(r"^\s*(?:[-+*]|\d+[.)])\s+|[#*_`>|\[\]()]+", re.M)
+
+# The browser side mirrors tokenize()/stem()/shard_key() exactly; keep them in sync.
+SEARCH_JS = r"""(function(){
+var s=document.currentScript,base=s.getAttribute("data-index"),box=document.getElementById("site-search"),
+out=document.getElementById("search-results"),meta=null,shards={},docs={},seq=0,stop=new Set(("a an and are as at "+
+"be but by for from has have in is it its of on or that the this to was we were will with").split(" "));
+function get(p){return fetch(base+p).then(function(r){return r.ok?r.json():{}})}
+function stem(w){if(w.length>4&&w.slice(-3)=="ies")return w.slice(0,-3)+"y";
+if(w.length>5&&w.slice(-3)=="ing")return w.slice(0,-3);
+if(w.length>4&&w.slice(-2)=="ed"&&w.slice(-3)!="eed")return w.slice(0,-2);
+if(w.length>3&&w.slice(-1)=="s"&&!/(ss|us|is)$/.test(w))return w.slice(0,-1);return w}
+function terms(q){return (q.toLowerCase().match(/[\p{L}\p{N}]+/gu)||[])
+.filter(function(w){return w.length>1&&!stop.has(w)}).map(stem)}
+function key(t){return /^[a-z0-9]{2}/.test(t)?t.slice(0,2):"u"+t.codePointAt(0).toString(16)}
+function shard(k){if(!(k in shards))shards[k]=meta.shards.indexOf(k)<0?Promise.resolve({}):get(k+".json");
+return shards[k]}
+function doc(i){var k=Math.floor(i/meta.doc_shard_size);if(!(k in docs))docs[k]=get("docs-"+k+".json");
+return docs[k].then(function(d){return d[i%meta.doc_shard_size]})}
+function esc(t){return String(t).replace(/[&<>"]/g,function(c){
+return{"&":"&amp;","<":"&lt;",">":"&gt;",'"':"&quot;"}[c]})}
+function search(q,last){var ts=terms(q);if(!ts.length)return Promise.resolve([]);
+return Promise.all(ts.map(function(t){return shard(key(t))})).then(function(ss){var score=null;
+ts.forEach(function(t,n){var hit={},sh=ss[n];Object.keys(sh).forEach(function(term){
+if(term==t||(last&&n==ts.length-1&&term.indexOf(t)==0)){var p=sh[term],idf=Math.log(1+meta.docs*2/p.length);
+for(var j=0;j<p.length;j+=2)hit[p[j]]=(hit[p[j]]||0)+p[j+1]*idf}});
+if(score===null)score=hit;else{var next={};
+Object.keys(score).forEach(function(d){if(d in hit)next[d]=score[d]+hit[d]});score=next}});
+return Object.keys(score).sort(function(a,b){return score[b]-score[a]}).slice(0,20)})
+.then(function(ids){return Promise.all(ids.map(function(i){return doc(+i)}))})}
+if(!box||!out)return;
+box.addEventListener("input",function(){var mine=++seq,q=box.value;
+(meta?Promise.resolve(meta):get("meta.json").then(function(m){return meta=m})).then(function(){return search(q,true)})
+.then(function(rs){if(mine!=seq)return;out.innerHTML=rs.map(function(d){return '<div class="card"><a href="'+
+esc(d[1])+'">'+esc(d[0])+"</a><br><small>"+esc(d[2])+"</small></div>"}).join("")})})})();
+"""
+
+
+def stem(word: str) -> str:
+    """Strip a few common English suffixes ("stemming-lite"); mirrored in ``SEARCH_JS``."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 5 and word.endswith("ing"):
+        return word[:-3]
+    if len(word) > 4 and word.endswith("ed") and not word.endswith("eed"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    return [stem(word) for word in _TOKEN.findall(text.lower()) if len(word) > 1 and word not in STOPWORDS]
+
+
+def shard_key(term: str) -> str:
+    """Index shard of a term: its first two characters, or ``u<hex>`` for non-ASCII."""
+    head = term[:2]
+    if len(head) == 2 and head.isascii() and head.isalnum():
+        return head
+    return f"u{ord(term[0]):x}"
+
+
+def _flatten(value: object) -> Iterable[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, list):
+        for entry in value:
+            yield from _flatten(entry)
+    elif isinstance(value, dict):
+        for key, entry in value.items():
+            if key != "sources":
+                yield from _flatten(entry)
+
+
+def _snippet(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= SNIPPET_CHARS else text[: SNIPPET_CHARS - 1].rstrip() + "…"
+
+
+def item_page(spec: "SiteSpec", section: str) -> str:
+    """Slug of the page that shows a knowledge section."""
+    for slug, keys in spec.page_keys.items():
+        if tuple(keys) == (section,):
+            return slug
+    slugs = [slug for slug, _label in spec.pages]
+    return section if section in slugs else slugs[0]
+
+
+def item_title(section: str, item: Mapping) -> tuple[str, tuple[str, ...]] | None:
+    """Display title of a knowledge item and the fields it was built from.
+
+    Uses the section's title field (see ``store.ENTITIES``), falling back to the
+    first non-empty string field, plus the date in parentheses when there is one.
+    """
+    columns = ENTITIES.get(section, {})
+    title_field = columns.get("title")
+    if not isinstance(item.get(title_field), str) or not item[title_field].strip():
+        title_field = next((k for k, v in item.items() if isinstance(v, str) and v.strip()), None)
+    if title_field is None:
+        return None
+    date_field = columns.get("date")
+    if date_field != title_field and isinstance(item.get(date_field), str) and item[date_field].strip():
+        return f"{item[title_field]} ({item[date_field]})", (title_field, date_field)
+    return item[title_field], (title_field,)
+
+
+class SearchIndex:
+    """Inverted index over pages and knowledge items, written as static JSON shards.
+
+    Terms are lower-cased, stop-word filtered and lightly stemmed; postings are
+    flat ``[doc, tf, doc, tf, ...]`` lists grouped into one file per two-letter
+    term prefix under ``search/``. Documents (title, URL, snippet) are split into
+    shards of ``DOC_SHARD_SIZE``, so a query downloads ``meta.json``, one shard per
+    query term and the document shards of the hits, never the whole index.
+    """
+
+    def __init__(self) -> None:
+        self.docs: list[tuple[str, str, str]] = []
+        self.postings: dict[str, list[int]] = defaultdict(list)
+
+    def add(self, title: str, url: str, text: str) -> int:
+        doc_id = len(self.docs)
+        self.docs.append((title, url, _snippet(text)))
+        for term, tf in Counter(tokenize(f"{title} {text}")).items():
+            self.postings[term] += (doc_id, tf)
+        return doc_id
+
+    def add_site(
+        self,
+        spec: "SiteSpec",
+        knowledge: Mapping,
+        pages: Mapping[str, str],
+        *,
+        scrub: Callable[[str], str] | None = None,
+    ) -> None:
+        """Index each page's Markdown and every list item of ``knowledge``."""
+        clean = scrub or (lambda text: text)
+        labels = dict(spec.pages)
+        for slug, md in pages.items():
+            text = clean(_MD_NOISE.sub(" ", _TAG.sub(" ", md)))
+            self.add(labels.get(slug, slug), f"{slug}.html", text)
+        for section, items in knowledge.items():
+            if not isinstance(items, list):
+                continue
+            url = f"{item_page(spec, section)}.html"
+            for item in items:
+                titled = item_title(section, item)
+                if titled is None:
+                    continue
+                title, used = clean(titled[0]), titled[1]
+                rest = [clean(s) for key, value in item.items() if key not in used for s in _flatten(value)]
+                self.add(title, url, " · ".join(s for s in rest if s.strip()) or section.replace("_", " "))
+
+    def shards(self) -> dict[str, dict[str, list[int]]]:
+        grouped: dict[str, dict[str, list[int]]] = defaultdict(dict)
+        for term in sorted(self.postings):
+            grouped[shard_key(term)][term] = self.postings[term]
+        return dict(grouped)
+
+    def write(self, writer: SiteWriter) -> dict:
+        """Write ``search/`` through ``writer`` (unchanged shards are skipped); return the meta."""
+
+        def dump(obj: object) -> str:
+            return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+        shards = self.shards()
+        for key, terms in shards.items():
+            writer.write_text(f"{INDEX_DIR}/{key}.json", dump(terms))
+        for start in range(0, len(self.docs), DOC_SHARD_SIZE):
+            writer.write_text(
+                f"{INDEX_DIR}/docs-{start // DOC_SHARD_SIZE}.json", dump(self.docs[start : start + DOC_SHARD_SIZE])
+            )
+        meta = {
+            "docs": len(self.docs),
+            "doc_shard_size": DOC_SHARD_SIZE,
+            "shards": sorted(shards),
+            "version": hashlib.sha256(dump([self.docs, shards]).encode("utf-8")).hexdigest()[:12],
+        }
+        writer.write_text(f"{INDEX_DIR}/meta.json", dump(meta))
+        return meta
+
+    def query(self, text: str, *, limit: int = 20) -> list[tuple[str, str, str]]:
+        """Server-side equivalent of the browser search (AND of terms, tf-idf ranked)."""
+        scores: dict[int, float] | None = None
+        for term in tokenize(text):
+            postings = self.postings.get(term, [])
+            idf = math.log(1 + len(self.docs) * 2 / len(postings)) if postings else 0.0
+            hits: dict[int, float] = defaultdict(float)
+            for i in range(0, len(postings), 2):
+                hits[postings[i]] += postings[i + 1] * idf
+            scores = dict(hits) if scores is None else {d: s + hits[d] for d, s in scores.items() if d in hits}
+        ranked = sorted((scores or {}).items(), key=lambda pair: -pair[1])[:limit]
+        return [self.docs[doc_id] for doc_id, _score in ranked]
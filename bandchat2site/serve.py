@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import json
+import mimetypes
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+from urllib.parse import unquote, urlparse
+
+from .cache import LLMCache
+from .creative import build_creative_site
+from .html import escape
+from .llm import call_llm_json, call_llm_text
+from .ops import build_ops_site
+from .output import SiteWriter
+from .public import build_public_site
+from .whatsapp import follow_export, load_messages_jsonl
+
+BUILDERS = {
+    "ops": build_ops_site,
+    "creative": build_creative_site,
+    "public": build_public_site,
+}
+
+LIVE_RELOAD_SNIPPET = (
+    "<script>(function(){var v=null;setInterval(function(){fetch('/__livereload')"
+    ".then(function(r){return r.json()}).then(function(d){if(v!==null&&d.version!==v)location.reload();"
+    "v=d.version}).catch(function(){})},1000)})();</script>"
+)
+
+
+class SiteWatcher:
+    """Keeps generated sites in sync with a growing chat export.
+
+    WhatsApp ``.txt`` exports are followed with :func:`follow_export` (checkpoint and
+    ``messages.jsonl`` in ``state_dir``), so only the appended tail is parsed.
+    Extraction and page prompts go through an on-disk :class:`LLMCache`, so only
+    chunks and page slices that actually changed reach the model, and the
+    :class:`SiteWriter` manifest means only changed pages are rewritten.
+    ``messages.json``/``.jsonl`` inputs are reloaded whole.
+    """
+
+    def __init__(
+        self,
+        input_path: str | Path,
+        sites: dict[str, Path],
+        *,
+        state_dir: str | Path = ".bandchat2site",
+        model: str | None = None,
+        options_for: Callable[[str, Path], dict] | None = None,
+        llm_text=call_llm_text,
+        llm_json=call_llm_json,
+    ):
+        unknown = sorted(set(sites) - set(BUILDERS))
+        if unknown:
+            raise ValueError(f"Unknown pipeline(s) {unknown}; expected some of {sorted(BUILDERS)}")
+        self.input_path = Path(input_path)
+        self.sites = sites
+        self.state_dir = Path(state_dir)
+        self.model = model
+        self.options_for = options_for or (lambda _pipeline, out: {"writer": SiteWriter(out)})
+        self.llm_text = llm_text
+        self.llm_json = llm_json
+        self.cache = LLMCache(self.state_dir / "llm-cache")
+        self.version = 0
+        self.lock = threading.Lock()
+        self._signature: tuple[int, int] | None = None
+        self._closed: list[dict] | None = None
+
+    # -- ingestion ---------------------------------------------------------
+
+    def load_messages(self) -> list[dict]:
+        if self.input_path.suffix == ".json":
+            return json.loads(self.input_path.read_text(encoding="utf-8"))
+        if self.input_path.suffix == ".jsonl":
+            return load_messages_jsonl(self.input_path)
+
+        jsonl = self.state_dir / "messages.jsonl"
+        result = follow_export(self.input_path, jsonl)
+        if result.reset or self._closed is None:
+            self._closed = load_messages_jsonl(jsonl, include_open=False)
+        else:
+            self._closed.extend(result.appended)
+        return self._closed + ([result.open_message] if result.open_message else [])
+
+    # -- building ----------------------------------------------------------
+
+    def rebuild(self) -> list[str]:
+        """Rebuild every site; return the files that changed and bump ``version`` if any did."""
+        with self.lock:
+            messages = self.load_messages()
+            changed: list[str] = []
+            for pipeline, out in self.sites.items():
+                options = self.options_for(pipeline, out)
+                options.setdefault("writer", SiteWriter(out))
+                try:
+                    BUILDERS[pipeline](
+                        messages,
+                        out,
+                        model=self.model,
+                        llm_text=self.llm_text,
+                        llm_json=self.llm_json,
+                        cache=self.cache,
+                        **options,
+                    )
+                finally:
+                    if options.get("store") is not None:
+                        options["store"].close()
+                changed += [f"{pipeline}/{name}" for name in options["writer"].written]
+            if changed:
+                self.version += 1
+            return changed
+
+    def _stat_signature(self) -> tuple[int, int]:
+        stat = self.input_path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self) -> list[str] | None:
+        """Rebuild if the input changed since the last poll; ``None`` when it did not."""
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return None
+        self._signature = signature
+        return self.rebuild()
+
+    def watch(self, stop: threading.Event, *, interval: float = 1.0, log: Callable[[str], None] = print) -> None:
+        while not stop.is_set():
+            try:
+                started = time.perf_counter()
+                changed = self.poll()
+                if changed is not None:
+                    elapsed = time.perf_counter() - started
+                    log(f"🔁 Rebuilt in {elapsed:.1f}s: {len(changed)} file(s) changed ({self.cache.summary()})")
+            except Exception as exc:  # keep watching; the next save usually fixes it
+                log(f"⚠️  Rebuild failed: {exc}")
+            stop.wait(interval)
+
+
+def _make_handler(watcher: SiteWatcher):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format: str, *args) -> None:  # noqa: A002 - BaseHTTPRequestHandler API
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:  # noqa: N802 - BaseHTTPRequestHandler API
+            path = unquote(urlparse(self.path).path)
+            if path == "/__livereload":
+                self._send(200, json.dumps({"version": watcher.version}).encode(), "application/json")
+                return
+            if path == "/":
+                links = "".join(f'<li><a href="/{name}/">{escape(name)}</a></li>' for name in watcher.sites)
+                page = f"<!doctype html><title>bandchat2site</title><ul>{links}</ul>{LIVE_RELOAD_SNIPPET}"
+                self._send(200, page.encode(), "text/html; charset=utf-8")
+                return
+
+            pipeline, _, rest = path.lstrip("/").partition("/")
+            root = watcher.sites.get(pipeline)
+            if root is None:
+                self._send(404, b"Not found", "text/plain")
+                return
+            root = root.resolve()
+            target = (root / (rest or "index.html")).resolve()
+            if target.is_dir():
+                target = target / "index.html"
+            if root not in target.parents or not target.is_file():
+                self._send(404, b"Not found", "text/plain")
+                return
+            body = target.read_bytes()
+            content_type = mimetypes.guess_type(target.name)[0] or "application/octet-stream"
+            if content_type == "text/html":
+                body = body.replace(b"</body>", LIVE_RELOAD_SNIPPET.encode() + b"</body>", 1)
+                content_type += "; charset=utf-8"
+            self._send(200, body, content_type)
+
+    return Handler
+
+
+def serve(
+    watcher: SiteWatcher,
+    *,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    watch: bool = True,
+    interval: float = 1.0,
+) -> None:
+    """Build once, then serve the sites (and rebuild on input changes when ``watch``)."""
+    watcher.poll()
+    stop = threading.Event()
+    if watch:
+        threading.Thread(target=watcher.watch, args=(stop,), kwargs={"interval": interval}, daemon=True).start()
+    server = ThreadingHTTPServer((host, port), _make_handler(watcher))
+    print(f"🌐 Serving {', '.join(watcher.sites)} at http://{host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
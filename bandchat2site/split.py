@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from typing import Callable
+
+from .llm import TruncatedResponseError
+
+
+def _chars(chunk: list[dict]) -> int:
+    return sum(len(str(m.get("text", ""))) for m in chunk)
+
+
+def bisect_chunk(chunk: list[dict]) -> tuple[list[dict], list[dict]]:
+    """Split a chunk of two or more messages in two halves of about equal text length."""
+    if len(chunk) < 2:
+        raise ValueError("a chunk needs at least two messages to be split")
+    half, total = _chars(chunk) / 2, 0
+    for cut, m in enumerate(chunk[:-1], start=1):
+        total += len(str(m.get("text", "")))
+        if total >= half:
+            break
+    return chunk[:cut], chunk[cut:]
+
+
+class ChunkSplitter:
+    """Extracts chunks, bisecting any whose answer is cut off (see ``TruncatedResponseError``).
+
+    A truncated chunk is split at a message boundary into halves of similar
+    length, each half extracted (and split again if needed) and the results
+    merged, so a dense chunk costs a few extra calls instead of the whole chunk.
+    A single message that still does not fit is skipped and counted. The stats
+    show how often this happens and at what size, to tune ``max_chars``.
+    """
+
+    def __init__(self) -> None:
+        self.chunks = 0
+        self.split = 0
+        self.bisections = 0
+        self.skipped: list[object] = []
+        self.truncated_sizes: list[int] = []
+        self.largest_whole = 0
+
+    def extract(
+        self,
+        chunk: list[dict],
+        extract: Callable[[list[dict]], dict],
+        merge: Callable[[dict, dict], dict],
+        empty: Callable[[], dict],
+    ) -> dict:
+        """Extraction of ``chunk``; ``merge(a, b)`` combines halves and ``empty()`` stands in for skipped messages."""
+        self.chunks += 1
+        bisections = self.bisections
+        result = self._extract(chunk, extract, merge, empty)
+        self.split += self.bisections > bisections
+        return result
+
+    def _extract(self, chunk, extract, merge, empty) -> dict:
+        try:
+            part = extract(chunk)
+        except TruncatedResponseError:
+            self.truncated_sizes.append(_chars(chunk))
+            if len(chunk) < 2:
+                self.skipped.append(chunk[0].get("id") if chunk else None)
+                return empty()
+            self.bisections += 1
+            left, right = bisect_chunk(chunk)
+            return merge(self._extract(left, extract, merge, empty), self._extract(right, extract, merge, empty))
+        self.largest_whole = max(self.largest_whole, _chars(chunk))
+        return part
+
+    def summary(self) -> str:
+        text = f"{self.split} of {self.chunks} chunk(s) split ({self.bisections} bisection(s))"
+        if self.truncated_sizes:
+            text += f", smallest truncated input {min(self.truncated_sizes):,} chars"
+        text += f", largest whole input {self.largest_whole:,} chars"
+        if self.skipped:
+            text += f", {len(self.skipped)} message(s) too long to extract: {self.skipped[:10]}"
+        return text
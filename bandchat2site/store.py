@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Mapping
+
+from .dates import DateResolver
+from .reduce import identity_key, merge_items, recency
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .pipeline import SiteSpec
+
+# Knowledge section -> which item fields fill the indexed columns of its table.
+ENTITIES: dict[str, Mapping[str, str]] = {
+    "gigs": {"date": "date", "title": "venue"},
+    "rehearsals": {"date": "date", "title": "location"},
+    "tasks": {"date": "due", "owner": "owner", "status": "status", "title": "task"},
+    "songs": {"status": "status", "title": "title"},
+    "setlists": {"title": "name"},
+    "recordings": {"title": "title"},
+    "shows": {"date": "date", "title": "venue"},
+    "media": {"title": "label"},
+    "decisions": {"date": "date", "title": "decision"},
+    "gear": {"owner": "who", "title": "item"},
+    "links": {"title": "label"},
+    "press": {"title": "blurb"},
+    "contact": {"title": "public_contact_text"},
+    "open_questions": {"title": "question"},
+}
+SCHEMA_VERSION = 2
+_ISO_DAY = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+_TABLE = """
+CREATE TABLE IF NOT EXISTS {table} (
+    id INTEGER PRIMARY KEY,
+    band TEXT NOT NULL,
+    pipeline TEXT NOT NULL,
+    ident TEXT NOT NULL,
+    date TEXT,
+    date_text TEXT,
+    owner TEXT COLLATE NOCASE,
+    status TEXT,
+    title TEXT,
+    newest INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    UNIQUE (band, pipeline, ident)
+);
+CREATE INDEX IF NOT EXISTS {table}_date ON {table} (band, date);
+CREATE INDEX IF NOT EXISTS {table}_owner ON {table} (band, owner);
+CREATE INDEX IF NOT EXISTS {table}_status ON {table} (band, status);
+"""
+_COMMON = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS band_info (
+    band TEXT NOT NULL,
+    pipeline TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (band, pipeline)
+);
+CREATE TABLE IF NOT EXISTS sources (
+    entity TEXT NOT NULL,
+    item_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    PRIMARY KEY (entity, item_id, message_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sources_message ON sources (message_id);
+"""
+
+
+class KnowledgeStore:
+    """SQLite store of extracted knowledge, one indexed table per entity.
+
+    Items are upserted under the pipeline's identity key (see ``SiteSpec.identity``),
+    merged with the stored version so newer facts win and ``sources`` accumulate;
+    each item's message ids are also linked in the ``sources`` table. ``date``,
+    ``owner`` and ``status`` are indexed per band, so :meth:`query` can answer "open
+    tasks for Ada" or "gigs after 2024-06-01" without loading everything. The
+    ``date`` column only holds ``YYYY-MM-DD`` dates; a date as written in the chat
+    ("next Fri") that could not be resolved is kept in ``date_text`` instead.
+    :meth:`export` rebuilds the ``knowledge.json`` shape for a band and pipeline.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_COMMON)
+        self._migrate()
+        script = "".join(_TABLE.format(table=table) for table in ENTITIES)
+        self.db.executescript(script)
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+        self.db.commit()
+        self.upserted = 0
+
+    def __enter__(self) -> "KnowledgeStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def _migrate(self) -> None:
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        if row is None or int(row["value"]) >= 2:
+            return
+        # Version 1 kept free-text dates in the indexed column.
+        for table in ENTITIES:
+            columns = {info["name"] for info in self.db.execute(f"PRAGMA table_info({table})")}
+            if not columns or "date_text" in columns:
+                continue
+            self.db.execute(f"ALTER TABLE {table} ADD COLUMN date_text TEXT")
+            self.db.execute(
+                f"UPDATE {table} SET date_text = date, date = NULL "
+                "WHERE date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'"
+            )
+
+    @staticmethod
+    def _table(entity: str) -> str:
+        if entity not in ENTITIES:
+            raise ValueError(f"Unknown entity {entity!r}; expected one of {sorted(ENTITIES)}")
+        return entity
+
+    def upsert(
+        self, band: str, spec: "SiteSpec", knowledge: Mapping[str, Any], messages: Iterable[Mapping] = ()
+    ) -> None:
+        """Merge one extraction result (or a whole knowledge object) into the store.
+
+        Given the ``messages`` it was extracted from, event dates still written as in
+        the chat are first resolved against their source message (see
+        :meth:`DateResolver.anchor`), so events are stored and keyed by their day.
+        """
+        messages = list(messages)
+        if messages and spec.event_sections:
+            knowledge = json.loads(json.dumps(knowledge))
+            DateResolver().anchor(knowledge, spec.event_sections, messages)
+        with self.db:
+            for section, items in knowledge.items():
+                if section == "band" and isinstance(items, dict):
+                    self._upsert_band(band, spec.name, items)
+                elif section in ENTITIES and isinstance(items, list):
+                    fields = spec.identity.get(section, ())
+                    for item in items:
+                        self._upsert_item(band, spec.name, section, identity_key(item, fields), item)
+
+    def _upsert_band(self, band: str, pipeline: str, info: dict) -> None:
+        row = self.db.execute(
+            "SELECT data FROM band_info WHERE band = ? AND pipeline = ?", (band, pipeline)
+        ).fetchone()
+        if row is not None:
+            info = merge_items([json.loads(row["data"]), info])
+        self.db.execute(
+            "INSERT OR REPLACE INTO band_info VALUES (?, ?, ?)", (band, pipeline, json.dumps(info, ensure_ascii=False))
+        )
+
+    def _upsert_item(self, band: str, pipeline: str, table: str, ident: str, item: dict) -> None:
+        row = self.db.execute(
+            f"SELECT id, data FROM {table} WHERE band = ? AND pipeline = ? AND ident = ?", (band, pipeline, ident)
+        ).fetchone()
+        if row is not None:
+            item = merge_items([json.loads(row["data"]), item])
+        columns = {column: item.get(field) for column, field in ENTITIES[table].items()}
+        day = columns.get("date")
+        day_text = item.get("date_text") if "date" in ENTITIES[table] else None
+        if day is not None and not _ISO_DAY.match(str(day)):
+            day, day_text = None, str(day)
+        values = (
+            day,
+            day_text,
+            columns.get("owner"),
+            columns.get("status"),
+            columns.get("title"),
+            recency(item),
+            json.dumps(item, ensure_ascii=False),
+        )
+        if row is None:
+            item_id = self.db.execute(
+                f"INSERT INTO {table} (band, pipeline, ident, date, date_text, owner, status, title, newest, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (band, pipeline, ident, *values),
+            ).lastrowid
+        else:
+            item_id = row["id"]
+            self.db.execute(
+                f"UPDATE {table} SET date = ?, date_text = ?, owner = ?, status = ?, title = ?, newest = ?, data = ? "
+                "WHERE id = ?",
+                (*values, item_id),
+            )
+        self.db.executemany(
+            "INSERT OR IGNORE INTO sources VALUES (?, ?, ?)",
+            [(table, item_id, source) for source in item.get("sources", []) if isinstance(source, int)],
+        )
+        self.upserted += 1
+
+    def query(
+        self,
+        entity: str,
+        *,
+        band: str | None = None,
+        pipeline: str | None = None,
+        owner: str | None = None,
+        status: str | None = None,
+        after: str | None = None,
+        before: str | None = None,
+        message_id: int | None = None,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """Items of ``entity`` matching every given filter, oldest date (then newest source) first.
+
+        ``owner`` matches case-insensitively; ``after``/``before`` are inclusive bounds
+        on the item date; ``message_id`` returns the items citing that message.
+        """
+        table = self._table(entity)
+        where, params = [], []
+        for column, value in (("band", band), ("pipeline", pipeline), ("status", status)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if owner is not None:
+            where.append("owner = ?")
+            params.append(owner)
+        if after is not None:
+            where.append("date >= ?")
+            params.append(after)
+        if before is not None:
+            where.append("date <= ?")
+            params.append(before)
+        if message_id is not None:
+            where.append("id IN (SELECT item_id FROM sources WHERE entity = ? AND message_id = ?)")
+            params += [table, message_id]
+        sql = f"SELECT band, pipeline, data FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY date IS NULL, date, newest"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [json.loads(row["data"]) for row in self.db.execute(sql, params)]
+
+    def bands(self) -> list[str]:
+        return [row[0] for row in self.db.execute("SELECT DISTINCT band FROM band_info ORDER BY band")]
+
+    def export(self, band: str, spec: "SiteSpec") -> dict:
+        """The stored knowledge for ``band`` in the pipeline's ``knowledge.json`` shape."""
+        knowledge = json.loads(json.dumps(spec.empty))
+        row = self.db.execute(
+            "SELECT data FROM band_info WHERE band = ? AND pipeline = ?", (band, spec.name)
+        ).fetchone()
+        if row is not None and isinstance(knowledge.get("band"), dict):
+            knowledge["band"].update(json.loads(row["data"]))
+        for section, value in knowledge.items():
+            if section in ENTITIES and isinstance(value, list):
+                rows = self.db.execute(
+                    f"SELECT data FROM {section} WHERE band = ? AND pipeline = ? ORDER BY newest, id",
+                    (band, spec.name),
+                )
+                knowledge[section] = [json.loads(r["data"]) for r in rows]
+        return knowledge
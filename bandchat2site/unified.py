@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import json
+from dataclasses import replace
+from typing import Collection, Iterable, Mapping
+
+from .creative import CREATIVE_EMPTY, CREATIVE_EXTRACT_KEYS, CREATIVE_EXTRACT_RULES, CREATIVE_SCHEMA, CREATIVE_SITE
+from .llm import call_llm_json
+from .messages import CONTACT_REDACTOR
+from .ops import OPS_EMPTY, OPS_EXTRACT_KEYS, OPS_EXTRACT_RULES, OPS_SCHEMA, OPS_SITE
+from .pipeline import SiteSpec, extract_system, omit_sections
+from .public import PUBLIC_EMPTY, PUBLIC_EXTRACT_SYSTEM, PUBLIC_SCHEMA, PUBLIC_SITE
+from .redact import Redactor
+from .scrub import SecretScrubber
+
+SPECS = {"ops": OPS_SITE, "creative": CREATIVE_SITE, "public": PUBLIC_SITE}
+
+UNIFIED_SCHEMA = {
+    "type": "object",
+    "properties": {"ops": OPS_SCHEMA, "creative": CREATIVE_SCHEMA, "public": PUBLIC_SCHEMA},
+    "required": ["ops", "creative", "public"],
+    "additionalProperties": False,
+}
+
+UNIFIED_EMPTY = {"ops": OPS_EMPTY, "creative": CREATIVE_EMPTY, "public": PUBLIC_EMPTY}
+
+# Sections each pipeline leaves to a LinkExtractor (see SiteSpec.without_link_extraction).
+LINK_SECTIONS = {name: tuple(spec.link_sections) for name, spec in SPECS.items() if not spec.curated_links}
+
+
+def _unified_system(omit: Mapping[str, Collection[str]]) -> str:
+    return f"""You extract band information from chat for three websites in one pass.
+Return STRICT JSON with exactly the keys "ops", "creative" and "public"; fill each by its own rules below
+and never copy anything into "public" that its rules exclude.
+
+"ops": {extract_system(OPS_EXTRACT_RULES, OPS_EXTRACT_KEYS, omit.get("ops", ()))}
+"creative": {extract_system(CREATIVE_EXTRACT_RULES, CREATIVE_EXTRACT_KEYS, omit.get("creative", ()))}
+"public": {PUBLIC_EXTRACT_SYSTEM}"""
+
+
+UNIFIED_EXTRACT_SYSTEM = _unified_system({})
+
+
+def extract_unified(
+    chunk: list[dict],
+    *,
+    model: str | None = None,
+    llm_json=call_llm_json,
+    redactor: Redactor | None = None,
+    scrubber: SecretScrubber | None = None,
+    omit: Mapping[str, Collection[str]] | None = None,
+) -> dict:
+    """Extract ops, creative and public knowledge from a chunk with one model call.
+
+    ``omit`` maps a pipeline to the sections left out of its share of the prompt and schema.
+    """
+    omit = omit or {}
+    empty = {
+        name: {key: value for key, value in section.items() if key not in omit.get(name, ())}
+        for name, section in UNIFIED_EMPTY.items()
+    }
+    schema = {
+        **UNIFIED_SCHEMA,
+        "properties": {
+            name: omit_sections(section, omit.get(name, ())) for name, section in UNIFIED_SCHEMA["properties"].items()
+        },
+    }
+    texts = (redactor or CONTACT_REDACTOR).redact_many([m["text"] for m in chunk])
+    if scrubber is not None:
+        texts = scrubber.scrub_many(texts)
+    transcript = "\n".join(
+        f"[{m['id']}] {m['ts']} {m['author']}: {text}" for m, text in zip(chunk, texts)
+    )
+    user = f"""Extract ops, creative and public-safe band info from these messages.
+
+MESSAGES:
+{transcript}
+
+Return STRICT JSON only. If nothing found, return:
+{json.dumps(empty)}
+"""
+    return llm_json(_unified_system(omit), user, schema, model=model, name="unified_extract")
+
+
+def _key(chunk: list[dict]) -> tuple:
+    return tuple(m["id"] for m in chunk)
+
+
+def _clean(value: object, public: Redactor, whole: set[str]) -> object:
+    """``value`` with every string redacted by ``public``; ``None`` if a private-topic rule blanked one."""
+    if isinstance(value, str):
+        redacted = public.redact(value)
+        return None if redacted in whole and redacted != value else redacted
+    if isinstance(value, list):
+        cleaned = [_clean(entry, public, whole) for entry in value]
+        return None if any(entry is None for entry in cleaned) else cleaned
+    if isinstance(value, dict):
+        cleaned = {key: _clean(entry, public, whole) for key, entry in value.items()}
+        return None if any(entry is None for entry in cleaned.values()) else cleaned
+    return value
+
+
+def _visible(chunk: list[dict], *, public: Redactor, prompt: Redactor) -> set:
+    """Ids of the messages ``public`` redacts no further than ``prompt``."""
+    return {m["id"] for m in chunk if public.redact(m["text"]) == prompt.redact(m["text"])}
+
+
+def public_safe(part: Mapping, chunk: list[dict], *, public: Redactor, prompt: Redactor) -> dict:
+    """Restrict a public extraction made from a ``prompt``-redacted chunk to what the public pipeline allows.
+
+    The public pipeline never shows the model messages its ``public`` redactor
+    changes beyond ``prompt`` (private topics, custom public rules), so only items
+    citing at least one message and nothing but such visible messages are kept.
+    The band fields cite nothing, so they are kept only when every message of
+    the chunk is visible and blanked otherwise. Every remaining string is
+    redacted with ``public``; an item with a string a whole-message rule would
+    blank is dropped, and so is such a band field or keyword.
+    """
+    visible = _visible(chunk, public=public, prompt=prompt)
+    all_visible = len(visible) == len(chunk)
+    whole = {rule.replacement for rule in public.rules if rule.whole}
+    safe: dict = {}
+    for key, value in part.items():
+        if isinstance(value, list):
+            items = [item for item in value if item.get("sources") and visible.issuperset(item["sources"])]
+            safe[key] = [cleaned for cleaned in (_clean(item, public, whole) for item in items) if cleaned is not None]
+        elif isinstance(value, dict):
+            band = {}
+            for field, entry in value.items():
+                if isinstance(entry, list):
+                    band[field] = [e for e in (_clean(e, public, whole) for e in entry) if e is not None]
+                    band[field] = band[field] if all_visible else []
+                else:
+                    cleaned = _clean(entry, public, whole) if all_visible else None
+                    band[field] = "" if cleaned is None else cleaned
+            safe[key] = band
+        else:
+            safe[key] = value
+    return safe
+
+
+class UnifiedExtractor:
+    """Shares one extraction call per chunk between the ops, creative and public builds.
+
+    :meth:`spec` returns a pipeline's ``SiteSpec`` whose ``extract`` looks the chunk
+    up (by its message ids) and only calls the model for a chunk no pipeline has
+    extracted yet; each result is kept until every pipeline has taken its share.
+    All specs chunk alike (``chunk_redactor``, ``max_chars``, ``min_gap_minutes``),
+    so each chunk is sent once. The prompt is redacted with ``prompt`` (the ops
+    rules by default); the public share is passed through :func:`public_safe`.
+    A chunk with messages the public rules would hide from the model gets a
+    regular public extraction instead, so the public site never draws on them.
+    When a build fills its links locally (``extract`` gets ``omit``), the shared
+    call leaves out every pipeline's :data:`LINK_SECTIONS`; all builds sharing an
+    extractor are expected to agree on that.
+    """
+
+    def __init__(
+        self,
+        *,
+        prompt: Redactor = CONTACT_REDACTOR,
+        pipelines: Iterable[str] = tuple(SPECS),
+        max_chars: int | None = None,
+        min_gap_minutes: int | None = None,
+    ):
+        self.prompt = prompt
+        self.pipelines = tuple(pipelines)
+        unknown = sorted(set(self.pipelines) - set(SPECS))
+        if unknown:
+            raise ValueError(f"Unknown pipeline(s) {unknown}; expected some of {sorted(SPECS)}")
+        self.max_chars = max_chars or max(SPECS[name].max_chars for name in self.pipelines)
+        self.min_gap_minutes = (
+            min(SPECS[name].min_gap_minutes for name in self.pipelines) if min_gap_minutes is None else min_gap_minutes
+        )
+        self.calls = 0
+        self.shared = 0
+        self.public_calls = 0
+        self._parts: dict[tuple, tuple[dict, set[str]]] = {}
+        self._skipped: dict[tuple, set[str]] = {}
+
+    def spec(self, pipeline: str) -> SiteSpec:
+        base = SPECS[pipeline]
+
+        def extract(  # noqa: ANN001
+            chunk, *, model=None, llm_json=call_llm_json, redactor=None, scrubber=None, omit=()
+        ):
+            key = _key(chunk)
+            public = redactor or base.redactor
+            if pipeline == "public" and len(_visible(chunk, public=public, prompt=self.prompt)) < len(chunk):
+                self._take(key, pipeline)
+                self.public_calls += 1
+                return base.extract(chunk, model=model, llm_json=llm_json, redactor=public, scrubber=scrubber)
+            entry = self._parts.get(key)
+            if entry is None:
+                part = extract_unified(
+                    chunk,
+                    model=model,
+                    llm_json=llm_json,
+                    redactor=self.prompt,
+                    scrubber=scrubber,
+                    omit=LINK_SECTIONS if omit else None,
+                )
+                entry = self._parts[key] = (part, set(self.pipelines) - self._skipped.pop(key, set()))
+                self.calls += 1
+            else:
+                self.shared += 1
+            part = self._take(key, pipeline)
+            share = json.loads(json.dumps(part.get(pipeline) or base.empty))
+            if pipeline == "public":
+                share = public_safe(share, chunk, public=public, prompt=self.prompt)
+            return share
+
+        return replace(
+            base,
+            extract=extract,
+            max_chars=self.max_chars,
+            min_gap_minutes=self.min_gap_minutes,
+            chunk_redactor=self.prompt,
+            skip_chunk=lambda chunk: self._take(_key(chunk), pipeline),
+            prompts=base.prompts + (UNIFIED_EXTRACT_SYSTEM, json.dumps(UNIFIED_SCHEMA, sort_keys=True)),
+        )
+
+    def _take(self, key: tuple, pipeline: str) -> dict:
+        """The shared result for ``key``, released once every pipeline took its share.
+
+        A pipeline that does not need the result (it skipped the chunk, or took the
+        public-only path) releases its share the same way; one that does so before
+        the result exists is remembered, so the result is not kept waiting for it.
+        """
+        if key not in self._parts:
+            skipped = self._skipped.setdefault(key, set())
+            skipped.add(pipeline)
+            if skipped.issuperset(self.pipelines):
+                del self._skipped[key]
+            return {}
+        part, waiting = self._parts[key]
+        waiting.discard(pipeline)
+        if not waiting:
+            self._parts.pop(key, None)
+        return part
+
+    def summary(self) -> str:
+        text = f"{self.calls} extraction call(s) shared by {len(self.pipelines)} site(s), {self.shared} reused"
+        if self.public_calls:
+            text += f", {self.public_calls} public-only call(s) for chunks with hidden messages"
+        return text
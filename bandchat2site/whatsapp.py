@@ -1,21 +1,38 @@
 from __future__ import annotations
 
+import hashlib
+import io
 import json
+import os
 import re
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List
+from typing import IO, TYPE_CHECKING, Iterable, Iterator, List
 
+from .output import write_atomic
+
+if TYPE_CHECKING:  # pragma: no cover
+    import zipfile
+
+# Android: "1/5/24, 20:01 - Ada: hi"; iOS: "[1/5/24, 20:01:33] Ada: hi", attachment lines led by U+200E.
 WHATSAPP_LINE = re.compile(
-    r"^(?P<date>\d{1,2}/\d{1,2}/\d{2,4}),\s(?P<time>\d{1,2}:\d{2})(?:\s?(?P<ampm>[APap][Mm]))?\s-\s(?P<author>[^:]+):\s(?P<text>.*)$"
+    r"^\u200e?(?P<ios>\[)?(?P<date>\d{1,2}/\d{1,2}/\d{2,4}),\s(?P<time>\d{1,2}:\d{2}(?::\d{2})?)"
+    r"(?:\s?(?P<ampm>[APap][Mm]))?(?(ios)\]\s|\s-\s)(?P<author>[^:]+):\s(?P<text>.*)$"
 )
 
+CHECKPOINT_VERSION = 1
+_HEAD_BYTES = 4096
 
 DT_PATTERNS = [
     "%m/%d/%y, %I:%M %p",
     "%m/%d/%y, %H:%M",
     "%m/%d/%Y, %I:%M %p",
     "%m/%d/%Y, %H:%M",
+    "%m/%d/%y, %I:%M:%S %p",
+    "%m/%d/%y, %H:%M:%S",
+    "%m/%d/%Y, %I:%M:%S %p",
+    "%m/%d/%Y, %H:%M:%S",
 ]
 
 
@@ -29,31 +46,192 @@ def _parse_datetime(date_part: str, time_part: str, ampm: str | None) -> datetim
     raise ValueError(f"Unrecognized WhatsApp timestamp: {base}")
 
 
+def _message_from_match(match: re.Match[str]) -> dict:
+    dt = _parse_datetime(match.group("date"), match.group("time"), match.group("ampm"))
+    return {
+        "ts": dt.isoformat(),
+        "author": match.group("author").strip(),
+        "text": match.group("text").strip().lstrip("\u200e"),
+    }
+
+
+def _feed(line: str, current: dict | None, done: List[dict]) -> dict | None:
+    """Consume one export line; return the message that is now open (still collecting lines)."""
+    match = WHATSAPP_LINE.match(line)
+    if match:
+        if current:
+            done.append(current)
+        return _message_from_match(match)
+    if current:
+        current["text"] += "\n" + line.strip()
+    return current
+
+
 def parse_export_lines(lines: Iterable[str]) -> List[dict]:
     messages: List[dict] = []
     current: dict | None = None
 
     for raw in lines:
-        line = raw.rstrip("\n")
-        match = WHATSAPP_LINE.match(line)
-        if match:
-            if current:
-                messages.append(current)
-            dt = _parse_datetime(match.group("date"), match.group("time"), match.group("ampm"))
-            current = {
-                "ts": dt.isoformat(),
-                "author": match.group("author").strip(),
-                "text": match.group("text").strip(),
-            }
-        elif current:
-            current["text"] += "\n" + line.strip()
+        current = _feed(raw.rstrip("\n"), current, messages)
     if current:
         messages.append(current)
     return messages
 
 
+def chat_entry(archive: zipfile.ZipFile) -> zipfile.ZipInfo:
+    """The chat text of an "export with media" zip.
+
+    That is ``_chat.txt`` (iOS), else ``WhatsApp Chat with <name>.txt`` (Android,
+    whose zips may also carry ``.txt`` documents), else the zip's only ``.txt``.
+    """
+    texts = [info for info in archive.infolist() if info.filename.lower().endswith(".txt") and not info.is_dir()]
+    names = [info.filename.rsplit("/", 1)[-1] for info in texts]
+    for prefix in ("_chat.txt", "WhatsApp Chat with "):
+        found = [info for info, name in zip(texts, names) if name.startswith(prefix)]
+        if len(found) == 1:
+            return found[0]
+    if len(texts) == 1:
+        return texts[0]
+    raise ValueError(f"{archive.filename}: no _chat.txt in the export ({len(texts)} .txt entries)")
+
+
+def _stream_lines(fh: IO[str]) -> Iterator[str]:
+    # Same line breaks as str.splitlines() on the whole text, one line in memory at a time.
+    for line in fh:
+        yield from line.splitlines()
+
+
 def parse_export_file(path: str | Path) -> List[dict]:
-    return parse_export_lines(Path(path).read_text(encoding="utf-8").splitlines())
+    """Messages of a WhatsApp ``.txt`` export, or of the chat inside an "export with media" ``.zip``.
+
+    The text is streamed line by line; a zip's attachments are never extracted
+    (see :mod:`bandchat2site.media` for indexing them).
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".zip":
+        import zipfile  # only zip exports pay for it (and its compression modules)
+
+        with zipfile.ZipFile(path) as archive:
+            entry = chat_entry(archive)
+            with archive.open(entry) as raw:
+                messages = parse_export_lines(_stream_lines(io.TextIOWrapper(raw, encoding="utf-8-sig")))
+        if not messages and entry.file_size:
+            raise ValueError(f"{path}: no WhatsApp messages found in {entry.filename} (unknown line format)")
+        return messages
+    with path.open(encoding="utf-8") as fh:
+        return parse_export_lines(_stream_lines(fh))
+
+
+def default_checkpoint_path(jsonl_path: str | Path) -> Path:
+    path = Path(jsonl_path)
+    return path.with_name(f"{path.stem}.checkpoint.json")
+
+
+def _head_digest(path: Path, length: int) -> str:
+    with path.open("rb") as fh:
+        return hashlib.sha256(fh.read(length)).hexdigest()
+
+
+@dataclass
+class FollowResult:
+    appended: List[dict]
+    open_message: dict | None
+    reset: bool
+
+
+def follow_export(
+    export_path: str | Path,
+    jsonl_path: str | Path,
+    checkpoint_path: str | Path | None = None,
+) -> FollowResult:
+    """Append messages completed since the last call to ``messages.jsonl``.
+
+    The checkpoint records the byte offset after the last complete line, the message
+    still open at that point (continuation lines may follow), the next message ID and
+    the size of the JSONL file. Only bytes past the offset are read, so following a
+    multi-year export costs time proportional to what was appended. IDs are assigned
+    sequentially from 1, matching :func:`bandchat2site.messages.ensure_ids` on the full
+    export. If the export shrank or its first bytes changed, it was replaced and is
+    re-ingested from scratch (``reset`` is then ``True``).
+    """
+    export_path = Path(export_path)
+    jsonl_path = Path(jsonl_path)
+    checkpoint_path = Path(checkpoint_path) if checkpoint_path else default_checkpoint_path(jsonl_path)
+    size = export_path.stat().st_size
+
+    try:
+        checkpoint = json.loads(checkpoint_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        checkpoint = None
+    reset = (
+        checkpoint is None
+        or checkpoint.get("version") != CHECKPOINT_VERSION
+        or size < checkpoint["offset"]
+        or checkpoint["head"] != _head_digest(export_path, checkpoint["head_len"])
+        or not jsonl_path.exists()
+        or jsonl_path.stat().st_size < checkpoint["jsonl_size"]
+    )
+    if reset:
+        checkpoint = {"offset": 0, "current": None, "next_id": 1, "jsonl_size": 0}
+
+    with export_path.open("rb") as fh:
+        fh.seek(checkpoint["offset"])
+        data = fh.read()
+    complete = data[: data.rfind(b"\n") + 1]  # leave a half-written last line for next time
+
+    done: List[dict] = []
+    current = checkpoint["current"]
+    for line in complete.decode("utf-8").splitlines():
+        current = _feed(line, current, done)
+
+    next_id = checkpoint["next_id"]
+    for message in done:
+        message["id"] = next_id
+        next_id += 1
+
+    jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+    with jsonl_path.open("ab") as fh:
+        # Drop anything written after the last checkpoint (an interrupted previous run).
+        fh.truncate(checkpoint["jsonl_size"])
+        fh.write("".join(json.dumps(m, ensure_ascii=False) + "\n" for m in done).encode("utf-8"))
+        fh.flush()
+        os.fsync(fh.fileno())
+        jsonl_size = fh.tell()
+
+    new_checkpoint = {
+        "version": CHECKPOINT_VERSION,
+        "export": str(export_path.resolve()),
+        "head_len": min(size, _HEAD_BYTES),
+        "head": _head_digest(export_path, min(size, _HEAD_BYTES)),
+        "offset": checkpoint["offset"] + len(complete),
+        "current": current,
+        "next_id": next_id,
+        "jsonl_size": jsonl_size,
+    }
+    write_atomic(checkpoint_path, json.dumps(new_checkpoint, ensure_ascii=False).encode("utf-8"))
+    open_message = dict(current, id=next_id) if current else None
+    return FollowResult(appended=done, open_message=open_message, reset=reset)
+
+
+def load_messages_jsonl(
+    jsonl_path: str | Path,
+    checkpoint_path: str | Path | None = None,
+    *,
+    include_open: bool = True,
+) -> List[dict]:
+    """Messages from a followed ``messages.jsonl`` plus, by default, the still-open last message."""
+    jsonl_path = Path(jsonl_path)
+    with jsonl_path.open(encoding="utf-8") as fh:
+        messages = [json.loads(line) for line in fh if line.strip()]
+    if include_open:
+        checkpoint_path = Path(checkpoint_path) if checkpoint_path else default_checkpoint_path(jsonl_path)
+        try:
+            checkpoint = json.loads(checkpoint_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            checkpoint = {}
+        if checkpoint.get("current"):
+            messages.append(dict(checkpoint["current"], id=checkpoint["next_id"]))
+    return messages
 
 
 def export_messages_json(input_path: str | Path, output_path: str | Path) -> Path:
@@ -61,3 +239,13 @@ def export_messages_json(input_path: str | Path, output_path: str | Path) -> Pat
     out_path = Path(output_path)
     out_path.write_text(json.dumps(messages, ensure_ascii=False, indent=2), encoding="utf-8")
     return out_path
+
+
+def load_messages(path: str | Path) -> List[dict]:
+    """Messages from ``messages.json``, a followed ``messages.jsonl`` or a WhatsApp ``.txt``/``.zip`` export."""
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        return load_messages_jsonl(path)
+    if path.suffix.lower() in (".txt", ".zip"):
+        return parse_export_file(path)
+    return json.loads(path.read_text(encoding="utf-8"))
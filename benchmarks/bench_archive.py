@@ -0,0 +1,45 @@
+"""Time and peak memory of writing the month-sharded message archive.
+
+Run with ``python -m benchmarks.bench_archive [n_messages]``. Messages come from
+a generator, so the peak shows what the archive itself holds in memory (timings
+include tracemalloc overhead).
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from bandchat2site.archive import ArchiveWriter
+from bandchat2site.messages import CONTACT_REDACTOR
+from bandchat2site.output import SiteWriter
+
+
+def synthetic_chat(n: int):  # noqa: ANN201
+    ts = datetime(2019, 1, 1, 9)
+    for i in range(1, n + 1):
+        ts += timedelta(minutes=7)
+        text = f"message {i}, call me on 07700 900{i % 1000:03d}"
+        yield {"id": i, "ts": ts.isoformat(), "author": "Ada", "text": text}
+
+
+def main(n: int = 200_000) -> None:
+    out = tempfile.mkdtemp()
+    for run in ("first build", "rebuild"):
+        writer = SiteWriter(out)
+        archiver = ArchiveWriter(writer, sanitize=CONTACT_REDACTOR.redact_many, wanted=range(1, n, 1000))
+        tracemalloc.start()
+        start = time.perf_counter()
+        archiver.write(synthetic_chat(n))
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        writer.close()
+        print(f"{run}: {archiver.summary()} in {elapsed:.1f}s, peak {peak / 1e6:.1f} MB; {writer.summary()}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
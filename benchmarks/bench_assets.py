@@ -0,0 +1,59 @@
+"""Bytes transferred for one visit to every page of a generated site.
+
+Compares the default output (inline CSS, uncompressed) with ``optimize`` (shared
+fingerprinted stylesheet, minified HTML) and ``precompress`` (gzip/brotli served as is).
+Run with ``python -m benchmarks.bench_assets``.
+"""
+
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+
+from bandchat2site.ops import OPS_EMPTY, build_ops_site
+from bandchat2site.output import SiteWriter
+
+MESSAGES = [{"ts": f"2024-01-{d:02d}T19:00:00", "author": "Ada", "text": "Rehearsal tonight"} for d in range(1, 29)]
+
+
+def fake_llm_text(_system: str, user: str, *, model=None):  # noqa: ANN001
+    slug = user.split("slug: ", 1)[1].split("\n", 1)[0]
+    items = "\n".join(f"- **Item {i}** for {slug}: bring cables, check [chart](charts/{i}.pdf)" for i in range(15))
+    return f"## {slug.title()}\n\nNext up: rehearsal on Friday at 19:00.\n\n{items}\n"
+
+
+def fake_llm_json(_system: str, _user: str, _schema, *, model=None, name="response"):  # noqa: ANN001
+    return OPS_EMPTY
+
+
+def _visit_bytes(out: Path, *, compressed: bool) -> int:
+    total = 0
+    for page in out.glob("*.html"):
+        candidate = page.with_name(page.name + ".gz")
+        total += (candidate if compressed and candidate.exists() else page).stat().st_size
+    for css in (out / "assets").glob("*.css"):
+        candidate = css.with_name(css.name + ".gz")
+        total += (candidate if compressed and candidate.exists() else css).stat().st_size
+    return total
+
+
+def main() -> None:
+    root = Path(tempfile.mkdtemp())
+    variants = {
+        "default": {},
+        "optimize": {"optimize": True},
+        "optimize+precompress": {"optimize": True, "precompress": True},
+    }
+    baseline = None
+    for label, flags in variants.items():
+        out = root / label
+        build_ops_site(
+            MESSAGES, out, llm_text=fake_llm_text, llm_json=fake_llm_json, writer=SiteWriter(out, **flags)
+        )
+        size = _visit_bytes(out, compressed=flags.get("precompress", False))
+        baseline = baseline or size
+        print(f"{label:<22} {size:>8,} bytes  ({size / baseline:6.1%} of default)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Wall time for many bands: one build after another vs. the batch process pool.
+
+Run with ``python -m benchmarks.bench_batch [n_bands] [workers]``. The fake model
+sleeps 20 ms per call, standing in for API latency; nothing is cached between
+runs, so the difference is scheduling alone.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from bandchat2site.batch import load_manifest, run_batch, run_job
+from bandchat2site.ops import OPS_EMPTY
+from bandchat2site.output import SiteWriter
+
+LATENCY = 0.02
+
+
+def slow_text(_system, _user, *, model=None):  # noqa: ANN001, ANN201
+    time.sleep(LATENCY)
+    return "# Page\n- stub"
+
+
+def slow_json(_system, _user, _schema, *, model=None, name="response"):  # noqa: ANN001, ANN201
+    time.sleep(LATENCY)
+    return json.loads(json.dumps(OPS_EMPTY))
+
+
+def writer_options(job) -> dict:  # noqa: ANN001
+    return {"writer": SiteWriter(job.out), "journal": False}
+
+
+def write_manifest(root: Path, n: int) -> Path:
+    rng = random.Random(7)
+    bands = []
+    for b in range(n):
+        ts = datetime(2024, 1, 1)
+        messages = []
+        for i in range(rng.randint(20, 120)):
+            ts += timedelta(hours=rng.choice([1, 5, 30]))
+            messages.append({"ts": ts.isoformat(), "author": "Ada", "text": f"band {b} message {i} " * 20})
+        (root / f"band{b}.json").write_text(json.dumps(messages))
+        bands.append({"name": f"Band {b}", "messages": f"band{b}.json", "pipelines": ["ops"]})
+    path = root / "bands.json"
+    path.write_text(json.dumps(bands))
+    return path
+
+
+def main(n: int = 50, workers: int = 8) -> None:
+    root = Path(tempfile.mkdtemp())
+    jobs = load_manifest(write_manifest(root, n), out_root=root / "sites")
+
+    start = time.perf_counter()
+    for job in jobs:
+        run_job(
+            job, writer_options, model=None, cache_dir=root / "cache-serial", llm_text=slow_text, llm_json=slow_json
+        )
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = run_batch(
+        jobs, writer_options, cache_dir=root / "cache-pool", workers=workers, llm_text=slow_text, llm_json=slow_json
+    )
+    pooled = time.perf_counter() - start
+    assert all(result.ok for result in results)
+    print(f"{n} bands: serial {serial:.1f}s, batch with {workers} workers {pooled:.1f}s ({serial / pooled:.1f}x)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,50 @@
+"""Full re-parse vs. checkpointed tail-follow of a large WhatsApp export.
+
+Run with ``python -m benchmarks.bench_ingest [n_messages]``.
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from bandchat2site.whatsapp import follow_export, parse_export_file
+
+
+def _lines(start: datetime, n: int) -> str:
+    out = []
+    for i in range(n):
+        ts = start + timedelta(minutes=7 * i)
+        out.append(f"{ts.month}/{ts.day}/{ts:%y}, {ts:%H:%M} - {'Ada' if i % 2 else 'Lin'}: message {i} about the gig\n")
+        if i % 10 == 0:
+            out.append("a continuation line\n")
+    return "".join(out)
+
+
+def main(n: int = 300_000) -> None:
+    root = Path(tempfile.mkdtemp())
+    export, jsonl = root / "chat.txt", root / "messages.jsonl"
+    start = datetime(2020, 1, 1)
+    export.write_text(_lines(start, n), encoding="utf-8")
+    print(f"{n:,} messages, {export.stat().st_size / 1e6:.1f} MB")
+
+    t = time.perf_counter()
+    parse_export_file(export)
+    print(f"full parse:        {time.perf_counter() - t:8.3f}s")
+
+    t = time.perf_counter()
+    follow_export(export, jsonl)
+    print(f"initial follow:    {time.perf_counter() - t:8.3f}s")
+
+    with export.open("a", encoding="utf-8") as fh:
+        fh.write(_lines(start + timedelta(minutes=7 * n), 200))
+    t = time.perf_counter()
+    result = follow_export(export, jsonl)
+    print(f"follow +200 msgs:  {(time.perf_counter() - t) * 1000:8.1f} ms ({len(result.appended)} appended)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300_000)
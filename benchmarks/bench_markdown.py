@@ -0,0 +1,100 @@
+"""Markdown renderer throughput on large generated pages.
+
+Run with ``python -m benchmarks.bench_markdown [n_items]``.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+from bandchat2site.html import escape, md_to_html_basic
+
+
+def legacy_md_to_html_basic(md: str) -> str:
+    """The original line-by-line renderer (##/###/-/paragraphs only)."""
+
+    def esc(s: str) -> str:
+        return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+    html, in_ul = [], False
+    for line in md.splitlines():
+        if line.startswith("### "):
+            if in_ul:
+                html.append("</ul>")
+                in_ul = False
+            html.append(f"<h3>{esc(line[4:])}</h3>")
+        elif line.startswith("## "):
+            if in_ul:
+                html.append("</ul>")
+                in_ul = False
+            html.append(f"<h2>{esc(line[3:])}</h2>")
+        elif line.startswith("- "):
+            if not in_ul:
+                html.append("<ul>")
+                in_ul = True
+            html.append(f"<li>{esc(line[2:])}</li>")
+        elif line.strip() == "":
+            if in_ul:
+                html.append("</ul>")
+                in_ul = False
+        else:
+            if in_ul:
+                html.append("</ul>")
+                in_ul = False
+            html.append(f"<p>{esc(line)}</p>")
+    if in_ul:
+        html.append("</ul>")
+    return "\n".join(html)
+
+
+def _page(n: int) -> str:
+    parts = ["# Songs", ""]
+    for i in range(n):
+        parts += [
+            f"## Song {i}",
+            f"Key **E minor**, tempo *92 bpm* & rising <fast>. Demo: https://soundcloud.com/band/song-{i}",
+            "- Intro riff tightened",
+            "  - bass doubles the hook",
+            f"- [Chart](charts/song-{i}.pdf) updated",
+            "1. Verse",
+            "2. Chorus",
+            "",
+            "| Part | Who |",
+            "|---|---|",
+            "| Lead | Ada |",
+            "",
+        ]
+    return "\n".join(parts)
+
+
+def _plain_page(n: int) -> str:
+    """Only the constructs the legacy renderer understood."""
+    return "\n".join(f"## Gig {i}\nVenue Town Hall & friends, load in 6pm\n- bring DI\n- merch table\n" for i in range(n))
+
+
+def _time(label: str, fn, md: str, repeat: int = 3) -> float:
+    best = min(_once(fn, md) for _ in range(repeat))
+    print(f"{label:<10} {best * 1000:8.1f} ms  {len(md) / best / 1e6:6.1f} MB/s")
+    return best
+
+
+def _once(fn, md: str) -> float:
+    start = time.perf_counter()
+    fn(md)
+    return time.perf_counter() - start
+
+
+def main(n: int = 5_000) -> None:
+    for name, md in (("rich", _page(n)), ("plain", _plain_page(n * 4))):
+        print(f"{name}: {len(md):,} chars of Markdown")
+        _time("legacy", legacy_md_to_html_basic, md)
+        _time("current", md_to_html_basic, md)
+    text = md * 2
+    start = time.perf_counter()
+    escape(text)
+    print(f"escape     {(time.perf_counter() - start) * 1000:8.1f} ms for {len(text):,} chars")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000)
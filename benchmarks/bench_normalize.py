@@ -0,0 +1,58 @@
+"""Prompt characters and chunks saved by noise collapsing before chunking.
+
+Run with ``python -m benchmarks.bench_normalize [n_messages]``.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bandchat2site.messages import chunk_messages, ensure_ids
+from bandchat2site.normalize import Normalizer
+from bandchat2site.ops import OPS_SITE
+
+CONTENT = [
+    "Rehearsal moved to Friday 8pm, bring the new strings ({i})",
+    "Setlist draft {i}: Opener, Blue Room, Night Drive, encore TBD",
+    "who has the spare DI box? need it for take {i}",
+]
+NOISE = [
+    "<Media omitted>",
+    "This message was deleted",
+    "👍",
+    "ok",
+    "😂😂😂",
+    "yes!",
+    "Forwarded: the venue needs our stage plot and input list by Friday",
+]
+
+
+def main(n: int = 200_000) -> None:
+    rng = random.Random(7)
+    ts = datetime(2024, 1, 1, 9)
+    messages = []
+    for i in range(n):
+        ts += timedelta(minutes=rng.choice([1, 2, 5, 30]))
+        text = rng.choice(NOISE) if rng.random() < 0.4 else rng.choice(CONTENT).format(i=i)
+        messages.append({"ts": ts.isoformat(), "author": rng.choice(["Ada", "Lin", "Sam"]), "text": text})
+    messages = ensure_ids(messages)
+
+    def chunks(msgs: list[dict]) -> int:
+        return len(
+            chunk_messages(msgs, max_chars=OPS_SITE.max_chars, min_gap_minutes=OPS_SITE.min_gap_minutes, sanitize=str)
+        )
+
+    normalizer = Normalizer()
+    start = time.perf_counter()
+    kept = normalizer.normalize(messages)
+    elapsed = time.perf_counter() - start
+    print(f"{n:,} messages -> {len(kept):,} kept in {elapsed:.2f}s")
+    print(normalizer.summary())
+    print(f"chunks: {chunks(messages):,} -> {chunks(kept):,}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,57 @@
+"""Share of chunks the local prefilter keeps away from the LLM, and its scan cost.
+
+Run with ``python -m benchmarks.bench_prefilter [n_messages]``. The synthetic chat
+is mostly banter with occasional bursts of planning, like a real band chat.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bandchat2site.messages import chunk_messages, ensure_ids
+from bandchat2site.ops import OPS_SITE
+from bandchat2site.prefilter import build_prefilter
+
+BANTER = [
+    "lol", "haha", "same", "did you see the match", "😂😂", "good night all", "ok", "nice one", "who's hungry"
+]
+SIGNAL = [
+    "Rehearsal moved to Friday 8pm",
+    "gig at the Town Hall on 12 May, call time 6:30",
+    "can you bring the spare DI box",
+    "new demo https://example.com/demo.mp3",
+    "we agreed to drop Night Drive from the setlist",
+]
+
+
+def synthetic_chat(n: int, rng: random.Random) -> list[dict]:
+    ts = datetime(2024, 1, 1, 9)
+    messages = []
+    planning = False
+    for _ in range(n):
+        ts += timedelta(minutes=rng.choice([1, 2, 5, 30, 240, 600]))
+        if rng.random() < 0.05:
+            planning = not planning
+        pool = SIGNAL if planning and rng.random() < 0.6 else BANTER
+        messages.append({"ts": ts.isoformat(), "author": rng.choice(["Ada", "Lin", "Sam"]), "text": rng.choice(pool)})
+    return ensure_ids(messages)
+
+
+def main(n: int = 100_000) -> None:
+    messages = synthetic_chat(n, random.Random(7))
+    chunks = chunk_messages(
+        messages, max_chars=OPS_SITE.max_chars, min_gap_minutes=OPS_SITE.min_gap_minutes, sanitize=str
+    )
+    prefilter = build_prefilter("ops")
+    start = time.perf_counter()
+    kept = [ch for i, ch in enumerate(chunks) if prefilter.keep(i, ch)]
+    elapsed = time.perf_counter() - start
+    print(f"{n:,} messages in {len(chunks):,} chunks; prefilter scan {elapsed * 1000:.1f} ms")
+    print(f"LLM calls: {len(kept):,} instead of {len(chunks):,} ({prefilter.summary()})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
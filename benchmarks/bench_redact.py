@@ -0,0 +1,63 @@
+"""Throughput of the combined redaction engine vs. the original multi-pass functions.
+
+Run with ``python -m benchmarks.bench_redact [n_messages]``.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+
+from bandchat2site.messages import EMAIL_RE, PHONE_RE, PRIVATE_TOPICS, build_redactor
+
+SAMPLES = [
+    "Rehearsal moved to 8pm, bring the new strings",
+    "call me on +44 7700 900123 if the van is late",
+    "Setlist draft: Opener, Blue Room, Night Drive",
+    "send the rider to booking@venue.example.com please",
+    "lol",
+    "The invoice from the studio is still not paid",
+    "https://youtu.be/dQw4w9WgXcQ new demo is up",
+    "Who has the spare DI box?",
+]
+
+
+def legacy_redact_contacts(text: str) -> str:
+    text = PHONE_RE.sub("[REDACTED_PHONE]", text)
+    text = EMAIL_RE.sub("[REDACTED_EMAIL]", text)
+    return text
+
+
+def legacy_sanitize_public(text: str) -> str:
+    text = legacy_redact_contacts(text)
+    if PRIVATE_TOPICS.search(text):
+        return "[REDACTED_PRIVATE_CONTEXT]"
+    return text
+
+
+def _time(label: str, fn, texts: list[str]) -> float:
+    start = time.perf_counter()
+    fn(texts)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}s  {len(texts) / elapsed:12,.0f} msg/s")
+    return elapsed
+
+
+def main(n: int = 200_000) -> None:
+    rng = random.Random(7)
+    texts = [rng.choice(SAMPLES) for _ in range(n)]
+    contacts = build_redactor("ops")
+    public = build_redactor("public")
+
+    print(f"{n:,} messages")
+    legacy_ops = _time("legacy redact_contacts", lambda ts: [legacy_redact_contacts(t) for t in ts], texts)
+    engine_ops = _time("engine ops redact_many", contacts.redact_many, texts)
+    legacy_pub = _time("legacy sanitize_public", lambda ts: [legacy_sanitize_public(t) for t in ts], texts)
+    engine_pub = _time("engine public redact_many", public.redact_many, texts)
+    print(f"speedup ops {legacy_ops / engine_ops:.2f}x, public {legacy_pub / engine_pub:.2f}x")
+    print(f"hits ops={contacts.stats()} public={public.stats()}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,55 @@
+"""Size of the final ops knowledge with flat merging vs. tree reduction.
+
+Run with ``python -m benchmarks.bench_reduce [n_chunks]``. Each synthetic chunk
+extraction repeats a few recurring facts (weekly rehearsal, standing tasks) with
+changing details, as a multi-year chat does.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from bandchat2site.ops import OPS_EMPTY, OPS_SITE
+from bandchat2site.reduce import local_combiner, tree_reduce
+
+
+def synthetic_part(n: int, rng: random.Random) -> dict:
+    part = json.loads(json.dumps(OPS_EMPTY))
+    part["band"] = {"name": "Test Band", "members": ["Ada", "Lin", "Sam"]}
+    week = n // 3
+    day = (date(2024, 1, 5) + timedelta(weeks=week)).isoformat()
+    part["rehearsals"] = [
+        {"date": day, "location": "Studio", "time": rng.choice(["19:00", "20:00"]), "sources": [n]}
+    ]
+    task = rng.choice(["book van", "update EPK", "restring bass"])
+    part["tasks"] = [{"task": task, "status": "open", "sources": [n]}]
+    part["decisions"] = [{"decision": f"decision {n % 50}", "sources": [n]}]
+    part["gigs"] = [{"date": f"2024-{1 + n % 12:02d}-{1 + n % 28:02d}", "venue": "Town Hall", "sources": [n]}]
+    return part
+
+
+def main(n: int = 5_000) -> None:
+    rng = random.Random(7)
+    parts = [synthetic_part(i, rng) for i in range(1, n + 1)]
+
+    flat = json.loads(json.dumps(OPS_EMPTY))
+    for part in json.loads(json.dumps(parts)):
+        flat = OPS_SITE.merge(flat, part)
+
+    combine = local_combiner(OPS_SITE.empty, OPS_SITE.merge, OPS_SITE.identity, max_items=200)
+    start = time.perf_counter()
+    tree = tree_reduce(parts, combine, fanout=8, workers=4)
+    elapsed = time.perf_counter() - start
+
+    size = lambda obj: len(json.dumps(obj, ensure_ascii=False))  # noqa: E731
+    print(f"{n:,} chunk extractions")
+    print(f"flat merge : {size(flat):>10,} chars of knowledge JSON")
+    print(f"tree reduce: {size(tree):>10,} chars ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000)
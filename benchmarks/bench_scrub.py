@@ -0,0 +1,33 @@
+"""Aho-Corasick secret scrubbing: scan time vs. number of secrets.
+
+Run with ``python -m benchmarks.bench_scrub``.
+"""
+
+from __future__ import annotations
+
+import random
+import string
+import time
+
+from bandchat2site.scrub import SecretScrubber
+
+TEXT = "Rehearsal at the usual place, Lin brings the van and Ada sorts the merch table. " * 2000
+
+
+def _secrets(n: int, rng: random.Random) -> list[str]:
+    return ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(6, 14))) for _ in range(n)]
+
+
+def main() -> None:
+    rng = random.Random(3)
+    print(f"text: {len(TEXT):,} chars")
+    for n in (1, 10, 100, 1_000, 10_000):
+        scrubber = SecretScrubber(_secrets(n, rng) + ["Lovelace"])
+        start = time.perf_counter()
+        scrubber.scrub(TEXT)
+        elapsed = time.perf_counter() - start
+        print(f"{n:>6} secrets ({scrubber.pattern_count:>6} patterns): {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Size of the prebuilt search index and the bytes a browser fetches per query.
+
+Run with ``python -m benchmarks.bench_search [n_items]``. Items are synthetic
+tasks, gigs and decisions spread over the ops pages.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bandchat2site.ops import OPS_SITE
+from bandchat2site.output import SiteWriter
+from bandchat2site.search import DOC_SHARD_SIZE, INDEX_DIR, SearchIndex, shard_key, tokenize
+
+WORDS = (
+    "book van rehearsal studio demo mix master setlist poster venue soundcheck cables amp drum bass vocals "
+    "merch flyer ticket door fee support slot festival radio press photo video upload release single album"
+).split()
+VENUES = ["Town Hall", "Pier", "Bunker", "Roundhouse", "Cellar Bar", "Harbour Club"]
+NAMES = ["Ada", "Lin", "Sam", "Zoë"]
+
+
+def synthetic_knowledge(n: int, rng: random.Random) -> dict:
+    phrase = lambda k: " ".join(rng.choice(WORDS) for _ in range(k))  # noqa: E731
+    third = n // 3
+    return {
+        "band": {"name": "Test Band", "members": NAMES},
+        "tasks": [
+            {"task": phrase(4), "owner": rng.choice(NAMES), "status": "open", "sources": [i]} for i in range(third)
+        ],
+        "gigs": [
+            {"date": f"202{i % 5}-{1 + i % 12:02d}-{1 + i % 28:02d}", "venue": rng.choice(VENUES), "notes": [phrase(6)]}
+            for i in range(third)
+        ],
+        "decisions": [{"decision": phrase(8), "sources": [i]} for i in range(n - 2 * third)],
+    }
+
+
+def main(n: int = 30_000) -> None:
+    knowledge = synthetic_knowledge(n, random.Random(7))
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.add_site(OPS_SITE, knowledge, {"index": "# Home"})
+    built = time.perf_counter() - start
+
+    out = Path(tempfile.mkdtemp())
+    writer = SiteWriter(out)
+    meta = index.write(writer)
+    writer.close()
+    files = {p.relative_to(out / INDEX_DIR).as_posix(): p.stat().st_size for p in (out / INDEX_DIR).iterdir()}
+
+    queries = ["van", "town hall", "soundcheck cables", "zoë demo"]
+    start = time.perf_counter()
+    fetched = []
+    for query in queries:
+        hits = index.query(query)
+        keys = {shard_key(term) for term in tokenize(query)}
+        doc_shards = {index.docs.index(doc) // DOC_SHARD_SIZE for doc in hits}
+        fetched.append(
+            files["meta.json"]
+            + sum(files.get(f"{key}.json", 0) for key in keys)
+            + sum(files[f"docs-{k}.json"] for k in doc_shards)
+        )
+    per_query = (time.perf_counter() - start) / len(queries)
+
+    print(f"{meta['docs']:,} documents indexed in {built:.2f}s")
+    print(f"index: {sum(files.values()) / 1e6:.1f} MB in {len(files)} files ({len(meta['shards'])} term shards)")
+    print(f"bytes fetched per query: {min(fetched) / 1e3:.0f}-{max(fetched) / 1e3:.0f} kB; ", end="")
+    print(f"server-side query {per_query * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 30_000)
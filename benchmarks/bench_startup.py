@@ -0,0 +1,66 @@
+"""Import cost of CLI start-up, per subcommand, measured with ``-X importtime``.
+
+Run with ``python -m benchmarks.bench_startup [runs]``. Each command runs in a fresh
+interpreter; the report shows the median wall time, the summed import time and
+the slowest imports. It exits non-zero if a command imports a module it must not
+need (``FORBIDDEN``), so it can guard start-up in CI.
+"""
+
+from __future__ import annotations
+
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CHAT = "12/05/2024, 18:30 - Ada: Rehearsal moved to Friday 8pm\n12/05/2024, 18:31 - Lin: 👍\n"
+# Modules that pull in the pipelines, the HTTP server, process pools or the OpenAI SDK.
+HEAVY = ("openai", "bandchat2site.llm", "bandchat2site.pipeline", "http.server", "multiprocessing")
+FORBIDDEN = {"--help": HEAVY, "parse-whatsapp": HEAVY, "ops --help": HEAVY}
+
+
+def importtime(args: list[str]) -> tuple[float, dict[str, int]]:
+    """Wall seconds of ``python -X importtime -m bandchat2site <args>`` and self-µs per imported module."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "bandchat2site", *args], capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "self [us]" not in line:
+            self_us, _cumulative, name = line[len("import time:") :].split("|")
+            modules[name.strip()] = int(self_us)
+    return elapsed, modules
+
+
+def main(runs: int = 5) -> None:
+    tmp = Path(tempfile.mkdtemp())
+    (tmp / "chat.txt").write_text(CHAT, encoding="utf-8")
+    commands = {
+        "--help": ["--help"],
+        "parse-whatsapp": ["parse-whatsapp", "--input", str(tmp / "chat.txt"), "--output", str(tmp / "m.json")],
+        "ops --help": ["ops", "--help"],
+    }
+    failed = False
+    for label, args in commands.items():
+        samples = [importtime(args) for _ in range(runs)]
+        wall = statistics.median(elapsed for elapsed, _ in samples)
+        modules = samples[-1][1]
+        slowest = sorted(modules.items(), key=lambda kv: -kv[1])[:3]
+        print(
+            f"{label:<15} {wall * 1000:6.1f} ms wall, {sum(modules.values()) / 1000:5.1f} ms imports "
+            f"({len(modules)} modules); slowest: " + ", ".join(f"{name} {us / 1000:.1f}" for name, us in slowest)
+        )
+        heavy = sorted(name for name in modules if name.startswith(FORBIDDEN.get(label, ())))
+        if heavy:
+            failed = True
+            print(f"  ❌ {label} imports {', '.join(heavy)}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from bandchat2site.batch import BandJob, format_summary, load_manifest, run_batch, run_job
+from bandchat2site.cli import _batch_options
+from bandchat2site.output import SiteWriter, state_dir
+from bandchat2site.resilience import RateLimiter
+from bandchat2site.store import KnowledgeStore
+
+from test_smoke import FAKE_MESSAGES, fake_creative_json, fake_llm_text, fake_ops_json, fake_public_json
+
+FAKES = {"ops": fake_ops_json, "creative": fake_creative_json, "public": fake_public_json}
+
+
+def fake_json(system, user, schema, *, model=None, name="response"):  # noqa: ANN001
+    return FAKES[name.split("_")[0]](system, user, schema, model=model, name=name)
+
+
+def writer_options(job) -> dict:  # noqa: ANN001
+    return {"writer": SiteWriter(job.out)}
+
+
+class BatchTests(unittest.TestCase):
+    def test_manifest_runs_on_pool_and_isolates_failures(self) -> None:
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root, True)
+        (root / "a.json").write_text(json.dumps(FAKE_MESSAGES))
+        (root / "big.json").write_text(json.dumps(FAKE_MESSAGES * 20))
+        manifest = {
+            "defaults": {"pipelines": ["ops"]},
+            "bands": [
+                {"name": "Alpha Band", "messages": "a.json", "pipelines": ["ops", "public"], "secrets": "s.txt"},
+                {"name": "Big", "messages": "big.json", "out": "custom", "titles": {"ops": "Big HQ"}},
+                {"name": "Missing", "messages": "nope.json"},
+            ],
+        }
+        (root / "bands.json").write_text(json.dumps(manifest))
+        jobs = load_manifest(root / "bands.json", out_root=root / "sites")
+        self.assertEqual([(j.band, j.pipeline) for j in jobs][0], ("Big", "ops"))
+        self.assertEqual(jobs[0].out, root / "custom" / "ops")
+        self.assertEqual(jobs[0].title, "Big HQ")
+        alpha = [j for j in jobs if j.band == "Alpha Band"]
+        self.assertEqual([j.out for j in alpha], [root / "sites" / "alpha-band" / p for p in ("ops", "public")])
+        self.assertEqual(alpha[0].settings, {"secrets": str(root / "s.txt")})
+
+        results = run_batch(
+            jobs,
+            writer_options,
+            cache_dir=root / "cache",
+            workers=2,
+            per_minute=6000,
+            llm_text=fake_llm_text,
+            llm_json=fake_json,
+        )
+        status = {(r.band, r.pipeline): r.ok for r in results}
+        expected = {("Big", "ops"), ("Alpha Band", "ops"), ("Alpha Band", "public")}
+        self.assertEqual(status, {key: key in expected for key in [*expected, ("Missing", "ops")]})
+        self.assertTrue((root / "sites" / "alpha-band" / "public" / "index.html").exists())
+        self.assertIn("FileNotFoundError", next(r.error for r in results if not r.ok))
+        missing = next(j.out for j in jobs if j.band == "Missing")
+        self.assertIn("FileNotFoundError", (state_dir(missing) / "batch-error.log").read_text(encoding="utf-8"))
+        self.assertFalse((missing / ".batch-error.log").exists())
+        self.assertIn("3 of 4 site(s) built, 1 failed", format_summary(results))
+
+        again = run_batch(
+            jobs[:1], writer_options, cache_dir=root / "cache", llm_text=fake_llm_text, llm_json=fake_json
+        )
+        self.assertGreater(again[0].cached, 0)
+        self.assertEqual(again[0].written, 0)
+
+    def test_job_closes_its_knowledge_store(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        (root / "a.json").write_text(json.dumps(FAKE_MESSAGES))
+        stores = []
+
+        def options_for(job) -> dict:  # noqa: ANN001
+            stores.append(KnowledgeStore(root / "knowledge.sqlite"))
+            return {"writer": SiteWriter(job.out), "store": stores[-1]}
+
+        job = BandJob("Alpha Band", "ops", root / "a.json", root / "ops", "Alpha Ops")
+        result = run_job(
+            job, options_for, model=None, cache_dir=root / "cache", llm_text=fake_llm_text, llm_json=fake_json
+        )
+        self.assertTrue(result.ok, result.error)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            stores[0].bands()
+
+    def test_settings_must_be_per_band_build_flags(self) -> None:
+        args = argparse.Namespace(workers=8, model=None, manifest="bands.json")
+        for key in ("workers", "model", "manifest", "func"):
+            job = BandJob("Alpha Band", "ops", Path("a.json"), Path("ops"), "Alpha Ops", {key: 1, "secrets": "s.txt"})
+            with self.assertRaisesRegex(ValueError, f"Unknown setting\\(s\\) {key} for 'Alpha Band'"):
+                _batch_options(args, job)
+
+    def test_rate_limiter_spaces_calls(self) -> None:
+        now = [100.0]
+        slept = []
+        limiter = RateLimiter(120, clock=lambda: now[0], sleep=slept.append)
+        self.assertEqual([limiter.acquire() for _ in range(3)], [0.0, 0.5, 1.0])
+        now[0] = 200.0
+        self.assertEqual(limiter.acquire(), 0.0)
+        self.assertEqual(slept, [0.5, 1.0])
+        with self.assertRaises(ValueError):
+            RateLimiter(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
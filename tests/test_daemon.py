@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+import shutil
+import tempfile
+import time
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+from threading import Thread
+
+from bandchat2site.batch import BandJob, JobResult
+from bandchat2site.daemon import BuildDaemon, JobQueue, make_server
+
+from test_batch import fake_json, writer_options
+from test_smoke import FAKE_MESSAGES, fake_llm_text
+
+
+def job(band: str, pipeline: str = "ops") -> BandJob:
+    return BandJob(band, pipeline, Path("m.json"), Path("out") / band / pipeline, band)
+
+
+class JobQueueTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.now = [1000.0]
+        self.path = Path(self.tmp.name) / "queue.sqlite"
+        self.queue = JobQueue(self.path, clock=lambda: self.now[0])
+
+    def tearDown(self) -> None:
+        self.queue.close()
+        self.tmp.cleanup()
+
+    def test_priority_fairness_and_coalescing(self) -> None:
+        for n in range(3):
+            self.queue.enqueue(job("Big", ["ops", "creative", "public"][n]), priority="bulk")
+        self.queue.enqueue(job("Small"), priority="bulk")
+        first, _ = self.queue.enqueue(job("Urgent"), priority="bulk")
+        self.assertEqual(self.queue.enqueue(job("Urgent"), priority="interactive"), (first, True))
+
+        order = []
+        while (claimed := self.queue.claim()) is not None:
+            job_id, claimed_job = claimed
+            order.append((claimed_job.band, claimed_job.pipeline))
+            self.now[0] += 1
+            self.queue.finish(job_id, JobResult(claimed_job.band, claimed_job.pipeline, "", ok=True, seconds=1.0))
+        self.assertEqual(
+            order,
+            [("Urgent", "ops"), ("Big", "ops"), ("Small", "ops"), ("Big", "creative"), ("Big", "public")],
+        )
+        stats = self.queue.stats()
+        self.assertEqual((stats["pending"], stats["done"], stats["coalesced"]), (0, 5, 1))
+        self.assertEqual(stats["latency_seconds"]["p50"], 1.0)
+        self.assertGreater(stats["wait_seconds"]["p95"], 0)
+
+    def test_one_build_per_band_and_crash_recovery(self) -> None:
+        self.queue.enqueue(job("A"))
+        self.queue.enqueue(job("A", "public"))
+        self.assertIsNotNone(self.queue.claim())
+        self.assertIsNone(self.queue.claim())
+        self.queue.close()
+
+        self.queue = JobQueue(self.path, clock=lambda: self.now[0])
+        self.assertEqual(self.queue.stats()["pending"], 2)
+        with self.assertRaises(ValueError):
+            self.queue.enqueue(job("A"), priority="asap")
+
+
+class DaemonTests(unittest.TestCase):
+    def test_http_jobs_run_on_warm_workers(self) -> None:
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root, True)
+        (root / "m.json").write_text(json.dumps(FAKE_MESSAGES))
+        daemon = BuildDaemon(
+            JobQueue(root / "queue.sqlite"),
+            writer_options,
+            cache_dir=root / "cache",
+            workers=2,
+            llm_text=fake_llm_text,
+            llm_json=fake_json,
+            poll=0.05,
+        ).start()
+        server = make_server(daemon, port=0)
+        Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            body = {"band": "Alpha", "messages": str(root / "m.json"), "out": str(root / "alpha"), "pipelines": ["ops"]}
+            request = urllib.request.Request(f"{base}/jobs", data=json.dumps(body).encode(), method="POST")
+            with urllib.request.urlopen(request) as response:
+                [queued] = json.load(response)["jobs"]
+            deadline = time.time() + 30
+            while time.time() < deadline:
+                with urllib.request.urlopen(f"{base}/jobs/{queued['id']}") as response:
+                    status = json.load(response)
+                if status["state"] in ("done", "failed"):
+                    break
+                time.sleep(0.05)
+            self.assertEqual(status["state"], "done", status)
+            self.assertTrue((root / "alpha" / "ops" / "index.html").exists())
+            for bad in ([body], {"messages": body["messages"], "out": body["out"]}, {**body, "pipelines": "ops"}):
+                request = urllib.request.Request(f"{base}/jobs", data=json.dumps(bad).encode(), method="POST")
+                with self.assertRaises(urllib.error.HTTPError) as caught:
+                    urllib.request.urlopen(request)
+                self.assertEqual(caught.exception.code, 400)
+                self.assertIn("error", json.load(caught.exception))
+                caught.exception.close()
+            with urllib.request.urlopen(f"{base}/metrics") as response:
+                self.assertEqual(json.load(response)["done"], 1)
+        finally:
+            server.shutdown()
+            server.server_close()
+            daemon.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
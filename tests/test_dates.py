@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import date, time
+from pathlib import Path
+
+from bandchat2site.dates import DateResolver, Event, EventIndex, resolve_date, resolve_time
+from bandchat2site.ops import build_ops_site
+
+MONDAY = date(2024, 5, 6)
+
+
+class ResolveTests(unittest.TestCase):
+    def test_dates_relative_to_the_message(self) -> None:
+        self.assertEqual(resolve_date("next Fri", MONDAY), date(2024, 5, 10))
+        self.assertEqual(resolve_date("mon", MONDAY), date(2024, 5, 13))
+        self.assertEqual(resolve_date("this mon", MONDAY), MONDAY)
+        self.assertEqual(resolve_date("tomorrow 7ish", MONDAY), date(2024, 5, 7))
+        self.assertEqual(resolve_date("in two weeks", MONDAY), date(2024, 5, 20))
+        self.assertEqual(resolve_date("12/5", MONDAY), date(2024, 12, 5))
+        self.assertEqual(resolve_date("12/5", MONDAY, dayfirst=True), date(2024, 5, 12))
+        self.assertEqual(resolve_date("3rd of June", MONDAY), date(2024, 6, 3))
+        self.assertEqual(resolve_date("Jan 3", date(2024, 12, 20)), date(2025, 1, 3))
+        self.assertEqual(resolve_date("Dec 28", date(2025, 1, 2)), date(2024, 12, 28))
+        self.assertIsNone(resolve_date("31/2", MONDAY))
+        self.assertIsNone(resolve_date("sometime soon", MONDAY))
+
+    def test_times(self) -> None:
+        self.assertEqual(resolve_time("tomorrow 7ish"), time(19, 0))
+        self.assertEqual(resolve_time("7-10pm"), time(19, 0))
+        self.assertEqual(resolve_time("half 7"), time(19, 30))
+        self.assertEqual(resolve_time("10am"), time(10, 0))
+        self.assertEqual(resolve_time("doors 20.00"), time(20, 0))
+        self.assertEqual(resolve_time("7", bare=True), time(19, 0))
+        self.assertIsNone(resolve_time("Fri 12/5"))
+
+
+class EventIndexTests(unittest.TestCase):
+    def test_next_upcoming_and_past(self) -> None:
+        events = [
+            Event("gigs", date(2024, 6, 1), None, False, {"venue": "B"}),
+            Event("gigs", date(2024, 4, 1), None, False, {"venue": "A"}),
+            Event("rehearsals", date(2024, 5, 7), time(19), False, {"location": "Studio"}),
+            Event("gigs", None, None, False, {"venue": "?"}),
+        ]
+        index = EventIndex(events)
+        self.assertEqual(index.next(MONDAY, "gigs").item["venue"], "B")
+        self.assertEqual(index.next(MONDAY).kind, "rehearsals")
+        self.assertEqual([e.item["venue"] for e in index.past(date(2024, 7, 1), "gigs")], ["B", "A"])
+        self.assertEqual(index.upcoming(date(2024, 7, 1)), [])
+        self.assertEqual(len(index), 4)
+
+
+class BuildTests(unittest.TestCase):
+    def test_pages_get_events_split_and_events_json_is_written(self) -> None:
+        out = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, out, True)
+        messages = [
+            {"id": 1, "ts": "2024-05-06T10:00:00", "author": "Ada", "text": "Rehearsal next Fri 7ish?"},
+            {"id": 2, "ts": "2024-05-06T11:00:00", "author": "Lin", "text": "Gig at Town Hall tomorrow, doors 8pm"},
+            {"id": 3, "ts": "2024-05-06T12:00:00", "author": "Sam", "text": "Rehearsal on the 1st of June"},
+        ]
+
+        def llm_json(*_args, **_kwargs):  # noqa: ANN002, ANN003
+            return {
+                "band": {"name": "", "members": []}, "tasks": [], "decisions": [], "gear": [], "links": [],
+                "open_questions": [],
+                "rehearsals": [
+                    {"date": "1st of June", "sources": [3]},
+                    {"date": "next Fri", "time": "7ish", "sources": [1]},
+                ],
+                "gigs": [{"date": "tomorrow", "time": "8pm", "venue": "Town Hall", "sources": [2]}],
+            }
+
+        prompts = {}
+
+        def llm_text(_system, user, *, model=None):  # noqa: ANN001
+            prompts[user.split("slug: ", 1)[1].split("\n", 1)[0]] = json.loads(
+                user.split("KNOWLEDGE_JSON:\n", 1)[1].split("\n\nPages:", 1)[0]
+            )
+            return "# Stub"
+
+        dates = DateResolver(today=date(2024, 5, 9))
+        build_ops_site(messages, out, llm_json=llm_json, llm_text=llm_text, dates=dates, journal=False)
+
+        events = json.loads((out / "events.json").read_text(encoding="utf-8"))["events"]
+        self.assertEqual(
+            [(e["kind"], e["date"], e["time"], e["upcoming"]) for e in events],
+            [
+                ("gigs", "2024-05-07", "20:00", False),
+                ("rehearsals", "2024-05-10", "19:00", True),
+                ("rehearsals", "2024-06-01", None, True),
+            ],
+        )
+        self.assertTrue(events[1]["approximate"])
+        self.assertEqual(prompts["index"]["rehearsals"]["next"]["date"], "2024-05-10")
+        self.assertIsNone(prompts["index"]["gigs"]["next"])
+        self.assertEqual(prompts["gigs"]["gigs"]["past"][0]["venue"], "Town Hall")
+        upcoming = prompts["rehearsals"]["rehearsals"]["upcoming"]
+        self.assertEqual([r["date"] for r in upcoming], ["2024-05-10", "2024-06-01"])
+        knowledge = json.loads((out / "knowledge.json").read_text(encoding="utf-8"))
+        self.assertEqual(knowledge["gigs"][0]["date"], "2024-05-07")
+
+
+if __name__ == "__main__":
+    unittest.main()
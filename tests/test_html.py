@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from bandchat2site.archive import ArchiveWriter
+from bandchat2site.assets import minify_html
+from bandchat2site.html import escape, md_to_html_basic, write_html_page
+from bandchat2site.ops import OPS_SITE
+from bandchat2site.output import SiteWriter
+from bandchat2site.scrub import SecretScrubber
+from bandchat2site.search import SearchIndex, shard_key, tokenize
+
+
+class MarkdownTests(unittest.TestCase):
+    def test_escape(self) -> None:
+        self.assertEqual(escape('<a href="x">&</a>'), "&lt;a href=&quot;x&quot;&gt;&amp;&lt;/a&gt;")
+
+    def test_headings_and_inline(self) -> None:
+        html = md_to_html_basic("# Gigs\n#### Details\nBring **cables** and *picks*, see `setlist`")
+        self.assertEqual(
+            html,
+            "<h1>Gigs</h1>\n<h4>Details</h4>\n"
+            "<p>Bring <strong>cables</strong> and <em>picks</em>, see <code>setlist</code></p>",
+        )
+
+    def test_links_are_sanitized(self) -> None:
+        html = md_to_html_basic("[demo](https://x.test/a?b=1&c=2) [bad](javascript:alert) https://y.test/z.")
+        self.assertIn('<a href="https://x.test/a?b=1&amp;c=2">demo</a>', html)
+        self.assertNotIn('href="javascript', html)
+        self.assertIn('<a href="https://y.test/z">https://y.test/z</a>.', html)
+
+    def test_nested_and_ordered_lists(self) -> None:
+        html = md_to_html_basic("- a\n  1. x\n  2. y\n- b")
+        self.assertEqual(
+            html,
+            "<ul>\n<li>a\n<ol>\n<li>x</li>\n<li>y</li></ol>\n</li>\n<li>b</li></ul>",
+        )
+
+    def test_table(self) -> None:
+        html = md_to_html_basic("| Song | Key |\n|---|---|\n| Blue | E |")
+        self.assertIn("<thead><tr><th>Song</th><th>Key</th></tr></thead>", html)
+        self.assertIn("<tr><td>Blue</td><td>E</td></tr>", html)
+
+
+class AssetTests(unittest.TestCase):
+    def test_minify_keeps_inline_spacing(self) -> None:
+        page = "<main>\n  <p>x <strong>y</strong>\n z</p>\n<pre>a\n  b</pre>\n</main>"
+        self.assertEqual(minify_html(page), "<main><p>x <strong>y</strong> z</p><pre>a\n  b</pre></main>")
+
+    def test_shared_stylesheet_and_precompression(self) -> None:
+        out = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, out, True)
+        writer = SiteWriter(out, optimize=True, precompress=True)
+        write_html_page(out, "T", [("Home", "index.html")], "index", "<p>hi</p>", writer=writer)
+        write_html_page(out, "T", [("Home", "index.html")], "other", "<p>yo</p>", writer=writer)
+        writer.close()
+        css = [name for name in writer.current if name.startswith("assets/") and name.endswith(".css")]
+        self.assertEqual(len(css), 1)
+        page = (out / "index.html").read_text()
+        self.assertIn(f'href="{css[0]}"', page)
+        self.assertNotIn("<style>", page)
+        self.assertEqual(gzip.decompress((out / "index.html.gz").read_bytes()).decode(), page)
+
+
+    def test_scrubbing_leaves_markup_alone(self) -> None:
+        out = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, out, True)
+        scrubber = SecretScrubber(["Strong", "Head", "Lovelace"])
+        body = md_to_html_basic(scrubber.scrub("Ada **Lovelace** booked the strong room"))
+        write_html_page(out, "Lovelace Head", [("Head", "index.html")], "index", body, scrub=scrubber)
+        page = (out / "index.html").read_text()
+        self.assertIn("<html><head>", page)
+        self.assertIn("<strong>[REDACTED]</strong>", page)
+        self.assertIn("<title>[REDACTED] [REDACTED]</title>", page)
+        self.assertIn('<a href="index.html">[REDACTED]</a>', page)
+        self.assertNotIn("<[REDACTED]", page)
+        self.assertNotIn("Lovelace", page)
+
+class SearchTests(unittest.TestCase):
+    def test_tokenize_and_shards(self) -> None:
+        self.assertEqual(tokenize("The gigs are Booked, recording tonight!"), ["gig", "book", "record", "tonight"])
+        self.assertEqual([shard_key(t) for t in ("gig", "zoë", "élan")], ["gi", "zo", "ue9"])
+
+    def test_index_items_and_write_shards(self) -> None:
+        knowledge = {
+            "band": {"name": "Test Band", "members": []},
+            "tasks": [{"task": "Recording the demo", "owner": "Zoë", "sources": [1]}],
+            "gigs": [{"date": "2024-05-01", "venue": "Town Hall", "notes": ["bring cables"], "sources": [2]}],
+        }
+        index = SearchIndex()
+        index.add_site(OPS_SITE, knowledge, {"index": "# Home\n- Next gig at **Town Hall**"})
+        self.assertEqual(index.query("recorded demos"), [("Recording the demo", "tasks.html", "Zoë")])
+        self.assertEqual([d[0] for d in index.query("town hall")], ["Home", "Town Hall (2024-05-01)"])
+        self.assertEqual(index.query("town piano"), [])
+
+        out = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, out, True)
+        writer = SiteWriter(out)
+        meta = index.write(writer)
+        writer.close()
+        self.assertEqual(meta["docs"], 3)
+        self.assertIn("to", meta["shards"])
+        self.assertEqual(json.loads((out / "search" / "meta.json").read_text()), meta)
+        self.assertIn("town", json.loads((out / "search" / "to.json").read_text()))
+
+
+class ArchiveTests(unittest.TestCase):
+    def test_month_shards_are_paginated_sanitized_and_linked(self) -> None:
+        messages = [
+            {"id": i, "ts": f"2024-0{1 + (i > 3)}-0{i}T10:00:00", "author": "Ada", "text": f"note {i} secret"}
+            for i in range(1, 6)
+        ]
+        out = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, out, True)
+        writer = SiteWriter(out)
+        sanitize = lambda texts: [t.replace("secret", "[x]") for t in texts]  # noqa: E731
+        archiver = ArchiveWriter(writer, sanitize=sanitize, wanted={2, 5}, page_size=2)
+        meta = archiver.write(iter(messages))
+        writer.close()
+        self.assertEqual(
+            meta["shards"], [["2024-01-0", "2024-01", 2], ["2024-01-1", "2024-01", 1], ["2024-02-0", "2024-02", 2]]
+        )
+        rows = json.loads((out / "archive" / "2024-01-1.json").read_text())
+        self.assertEqual(rows, [[3, "2024-01-03T10:00:00", "Ada", "note 3 [x]"]])
+        self.assertEqual(archiver.link(5), "archive.html#2024-02-0/5")
+        self.assertIsNone(archiver.link(3))
+        md = archiver.sources_markdown({"tasks": [{"task": "Book van", "sources": [2, 9]}], "band": {}})
+        self.assertEqual(md, "\n\n## Sources\n- Book van: [#2](archive.html#2024-01-0/2)\n")
+
+        writer = SiteWriter(out)
+        ArchiveWriter(writer, sanitize=sanitize, page_size=2).write(messages[:3] + [dict(messages[3], text="edited")])
+        self.assertEqual(writer.written, ["archive/2024-02-0.json", "archive/meta.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
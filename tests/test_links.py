@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from bandchat2site.creative import build_creative_site
+from bandchat2site.links import LinkExtractor, canonical_url, classify
+from bandchat2site.messages import CONTACT_REDACTOR
+from bandchat2site.ops import OPS_SCHEMA, build_ops_site
+from bandchat2site.public import build_public_site
+
+MESSAGES = [
+    {"id": 1, "ts": "2024-01-01T10:00:00", "author": "Ada", "text": "New mix of Night Drive"},
+    {"id": 2, "ts": "2024-01-01T10:01:00", "author": "Ada", "text": "https://soundcloud.com/band/night-drive?si=1"},
+    {"id": 3, "ts": "2024-01-02T18:00:00", "author": "Lin", "text": "Rehearsal clip https://youtu.be/abcDEF12345?t=3"},
+    {"id": 4, "ts": "2024-01-03T09:00:00", "author": "Sam", "text": "also: https://m.soundcloud.com/band/night-drive/"},
+    {"id": 5, "ts": "2024-01-03T09:05:00", "author": "Sam", "text": "Stems https://drive.google.com/open?id=1AbC_x"},
+    {"id": 6, "ts": "2024-01-03T09:06:00", "author": "Sam", "text": "call 0612345678 https://example.org/0612345678"},
+]
+
+
+class CanonicalUrlTests(unittest.TestCase):
+    def test_share_variants_fold_to_one_url(self) -> None:
+        for url in (
+            "https://youtu.be/dQw4w9WgXcQ?si=abc",
+            "https://m.youtube.com/watch?v=dQw4w9WgXcQ&t=42&feature=share",
+            "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+        ):
+            self.assertEqual(canonical_url(url), "https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        self.assertEqual(
+            canonical_url("https://drive.google.com/file/d/1AbC_x/view?usp=sharing"),
+            canonical_url("https://drive.google.com/open?id=1AbC_x"),
+        )
+        self.assertEqual(
+            canonical_url("https://docs.google.com/document/d/XyZ/edit#h"), "https://docs.google.com/document/d/XyZ"
+        )
+
+    def test_tracking_params_and_fragments_are_dropped(self) -> None:
+        url = "www.Example.org/epk?utm_campaign=a&page=2#top"
+        self.assertEqual(canonical_url(url), "https://example.org/epk?page=2")
+        self.assertEqual(classify("https://band.bandcamp.com/track/x"), ("audio", "Bandcamp"))
+        self.assertEqual(classify("https://example.org/demo.mp3"), ("audio", "example.org"))
+
+
+class LinkExtractorTests(unittest.TestCase):
+    def test_scan_dedupes_labels_and_skips_redacted_urls(self) -> None:
+        links = LinkExtractor().scan(MESSAGES, CONTACT_REDACTOR.redact_many)
+        self.assertEqual(
+            [(link.url, link.kind, link.label, link.sources) for link in links],
+            [
+                ("https://soundcloud.com/band/night-drive", "audio", "New mix of Night Drive", [2, 4]),
+                ("https://www.youtube.com/watch?v=abcDEF12345", "video", "Rehearsal clip", [3]),
+                ("https://drive.google.com/file/d/1AbC_x/view", "storage", "Stems", [5]),
+            ],
+        )
+
+    def test_apply_keeps_model_labels_and_drops_mangled_urls(self) -> None:
+        links = LinkExtractor()
+        links.scan(MESSAGES, CONTACT_REDACTOR.redact_many)
+        knowledge = {
+            "links": [
+                {"url": "https://youtu.be/abcDEF12345", "label": "Rehearsal video, 2 Jan", "sources": [3]},
+                {"url": "https://soundcloud.com/band/nite-drive", "label": "Night Drive", "sources": [2]},
+            ]
+        }
+        links.apply(knowledge, {"links": ()}, OPS_SCHEMA)
+        self.assertEqual(
+            [(item["url"], item["label"]) for item in knowledge["links"]],
+            [
+                ("https://soundcloud.com/band/night-drive", "New mix of Night Drive"),
+                ("https://www.youtube.com/watch?v=abcDEF12345", "Rehearsal video, 2 Jan"),
+                ("https://drive.google.com/file/d/1AbC_x/view", "Stems"),
+            ],
+        )
+        self.assertEqual((links.labelled, links.dropped), (1, 1))
+
+    def test_build_leaves_link_sections_out_of_extraction(self) -> None:
+        out = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, out, True)
+        asked = []
+
+        def ops_json(system, _user, schema, **_kwargs):  # noqa: ANN001, ANN003
+            asked.append((system, schema))
+            return {
+                "band": {"name": "", "members": []}, "rehearsals": [], "gigs": [], "tasks": [], "decisions": [],
+                "gear": [], "open_questions": [],
+            }
+
+        build_ops_site(
+            MESSAGES, out, llm_json=ops_json, llm_text=lambda *a, **k: "# Stub", links=LinkExtractor(), journal=False
+        )
+        system, schema = asked[0]
+        self.assertNotIn("links[", system)
+        self.assertNotIn("links", schema["properties"])
+        self.assertIn("gear[", system)
+        knowledge = json.loads((out / "knowledge.json").read_text(encoding="utf-8"))
+        self.assertEqual(
+            [item["label"] for item in knowledge["links"]], ["New mix of Night Drive", "Rehearsal clip", "Stems"]
+        )
+
+        def creative_json(_system, _user, schema, **_kwargs):  # noqa: ANN001, ANN003
+            self.assertNotIn("recordings", schema["properties"])
+            return {"songs": [], "setlists": [], "decisions": [], "open_questions": []}
+
+        build_creative_site(
+            MESSAGES, out, llm_json=creative_json, llm_text=lambda *a, **k: "# Stub", links=LinkExtractor(),
+            journal=False,
+        )
+        recordings = json.loads((out / "knowledge.json").read_text(encoding="utf-8"))["recordings"]
+        self.assertEqual([item["notes"] for item in recordings], ["SoundCloud", "YouTube", "Google Drive"])
+
+    def test_public_media_keeps_the_models_selection(self) -> None:
+        out = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, out, True)
+        messages = MESSAGES + [
+            {"id": 7, "ts": "2024-01-03T10:00:00", "author": "Ada",
+             "text": "rough take, DO NOT SHARE https://soundcloud.com/ada/untitled/s-AbC123"},
+        ]
+
+        def public_json(*_args, **_kwargs):  # noqa: ANN002, ANN003
+            return {
+                "band": {"name": "", "tagline": "", "genre_keywords": [], "city": "", "members_public": [],
+                         "short_bio": ""},
+                "shows": [], "press": [], "contact": [], "open_questions": [],
+                "media": [
+                    {"label": "Night Drive", "url": "https://m.soundcloud.com/band/night-drive/", "sources": [2]},
+                    {"label": "Live video", "url": "https://youtu.be/typo", "sources": [3]},
+                ],
+            }
+
+        links = LinkExtractor()
+        build_public_site(
+            messages, out, llm_json=public_json, llm_text=lambda *a, **k: "# Stub", links=links, journal=False
+        )
+        media = json.loads((out / "knowledge.json").read_text(encoding="utf-8"))["media"]
+        self.assertEqual(
+            media, [{"label": "Night Drive", "url": "https://soundcloud.com/band/night-drive", "sources": [2, 4]}]
+        )
+        self.assertEqual(links.dropped, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import re
+import unittest
+
+from bandchat2site.llm import TruncatedResponseError
+from bandchat2site.messages import EMAIL_RE, PHONE_RE, build_redactor, redact_contacts, sanitize_public
+from bandchat2site.normalize import Normalizer
+from bandchat2site.prefilter import build_prefilter, calibrate
+from bandchat2site.redact import RedactionRule, rules_from_config
+from bandchat2site.scrub import SecretScrubber
+from bandchat2site.split import ChunkSplitter, bisect_chunk
+
+
+class RedactionTests(unittest.TestCase):
+    def test_redact_contacts_single_pass(self) -> None:
+        text = "Call +44 7700 900123 or mail ada@example.com"
+        self.assertEqual(redact_contacts(text), "Call [REDACTED_PHONE] or mail [REDACTED_EMAIL]")
+
+    def test_digits_inside_email_redacted_as_email(self) -> None:
+        self.assertEqual(redact_contacts("ada.0612345678@example.com"), "[REDACTED_EMAIL]")
+
+    def test_phone_numbers_after_digits_or_plus_match_the_baseline(self) -> None:
+        def baseline(text: str) -> str:  # the original two-pass redact_contacts
+            return EMAIL_RE.sub("[REDACTED_EMAIL]", PHONE_RE.sub("[REDACTED_PHONE]", text))
+
+        for text in ("call 1+2345678901", "x++33612345678", "ext.5+44 20 7946 0958"):
+            self.assertEqual(redact_contacts(text), baseline(text))
+            self.assertNotIn("2345678", redact_contacts(text).replace("[REDACTED_PHONE]", ""))
+        self.assertEqual(redact_contacts("ext.5+44 20 7946 0958"), "ext.5[REDACTED_PHONE]")
+
+    def test_sanitize_public_whole_message(self) -> None:
+        self.assertEqual(sanitize_public("Who paid the rent?"), "[REDACTED_PRIVATE_CONTEXT]")
+        self.assertEqual(sanitize_public("Gig at Town Hall"), "Gig at Town Hall")
+
+    def test_custom_rules_and_hit_counts(self) -> None:
+        extra = rules_from_config([{"name": "van", "pattern": r"\bAB12 ?CDE\b", "ignore_case": True}])
+        redactor = build_redactor("public", extra)
+        out = redactor.redact_many(["van ab12cde outside", "ping 0612345678 and 0698765432"])
+        self.assertEqual(out, ["van [REDACTED_VAN] outside", "ping [REDACTED_PHONE] and [REDACTED_PHONE]"])
+        self.assertEqual(redactor.stats(), {"email": 0, "phone": 2, "private_topic": 0, "van": 1})
+
+    def test_duplicate_rule_names_rejected(self) -> None:
+        rule = RedactionRule("x", re.compile("a"), "b")
+        with self.assertRaises(ValueError):
+            build_redactor("ops", [rule, rule])
+
+
+class SecretScrubberTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.scrubber = SecretScrubber(["Lovelace", "ada@example.com", "0612345678", "Lee"])
+
+    def test_spaced_and_obfuscated_variants(self) -> None:
+        text = "Ada LOVELACE: 06 12 34-56 78, ada (at) example (dot) com"
+        self.assertEqual(self.scrubber.scrub(text), "Ada [REDACTED]: [REDACTED], [REDACTED]")
+
+    def test_word_boundaries(self) -> None:
+        self.assertEqual(self.scrubber.scrub("sleepy Lee"), "sleepy [REDACTED]")
+        self.assertEqual(self.scrubber.leaks("asleep"), [])
+
+    def test_scrub_obj(self) -> None:
+        self.assertEqual(self.scrubber.scrub_obj({"a": ["Lee", 3]}), {"a": ["[REDACTED]", 3]})
+
+
+class PrefilterTests(unittest.TestCase):
+    def test_scores_signals_and_skips_banter(self) -> None:
+        prefilter = build_prefilter("ops")
+        banter = [{"id": 1, "text": "lol"}, {"id": 2, "text": "haha same"}]
+        plans = [{"id": 3, "text": "Rehearsal Friday at 8pm?"}, {"id": 4, "text": "yes"}]
+        score, signals = prefilter.score(m["text"] for m in plans)
+        self.assertEqual(signals, {"keyword": 1, "date": 1, "time": 1})
+        self.assertEqual(score, 5.0)
+        self.assertTrue(prefilter.keep(0, plans))
+        self.assertFalse(prefilter.keep(1, banter))
+        self.assertEqual(prefilter.skipped[0]["first_id"], 1)
+        self.assertEqual(prefilter.summary(), "1 of 2 chunk(s) skipped")
+
+    def test_calibrate_reports_precision_and_recall(self) -> None:
+        samples = [(["gig at the Town Hall 9pm"], True), (["new riff idea"], True), (["lol"], False)]
+        rows = calibrate(build_prefilter("ops"), samples, [0.5, 3.0])
+        self.assertEqual(rows[0]["recall"], 0.5)
+        self.assertEqual(rows[1]["precision"], 1.0)
+        self.assertAlmostEqual(rows[1]["skipped"], 2 / 3)
+
+
+class NormalizerTests(unittest.TestCase):
+    def test_collapses_noise_and_keeps_ids_mapped(self) -> None:
+        forward = "Forwarded: the venue needs our stage plot by Friday, please send asap"
+        msgs = [
+            {"id": 1, "ts": "2024-01-01T10:00:00", "author": "Ada", "text": "Rehearsal Friday 8pm?"},
+            {"id": 2, "ts": "2024-01-01T10:01:00", "author": "Lin", "text": "👍"},
+            {"id": 3, "ts": "2024-01-01T10:02:00", "author": "Sam", "text": "ok!"},
+            {"id": 4, "ts": "2024-01-01T10:03:00", "author": "Sam", "text": "<Media omitted>"},
+            {"id": 5, "ts": "2024-01-01T10:04:00", "author": "Lin", "text": "This message was deleted"},
+            {"id": 6, "ts": "2024-01-01T10:05:00", "author": "Ada", "text": forward},
+            {"id": 7, "ts": "2024-01-01T10:06:00", "author": "Ada", "text": "👍"},
+            {"id": 8, "ts": "2024-01-02T09:00:00", "author": "Lin", "text": forward.upper()},
+            {"id": 9, "ts": "2024-01-02T09:01:00", "author": "Sam", "text": "yes"},
+            {"id": 10, "ts": "2024-01-20T09:00:00", "author": "Ada", "text": forward},
+        ]
+        normalizer = Normalizer()
+        out = normalizer.normalize(msgs)
+        # Ada's own 👍 and Sam's "yes" a day later answer nothing before them, so they stay;
+        # the forward repeated next day is dropped, the same text weeks later is a new announcement.
+        self.assertEqual([m["id"] for m in out], [1, 6, 7, 9, 10])
+        self.assertEqual(out[0]["text"], "Rehearsal Friday 8pm? [Lin: 👍] [Sam: ok!]")
+        self.assertEqual(out[0]["folded"], [2, 3])
+        self.assertEqual(out[1]["duplicates"], [8])
+        self.assertNotIn("duplicates", out[4])
+        self.assertEqual(msgs[0]["text"], "Rehearsal Friday 8pm?")
+        self.assertEqual(normalizer.counts, {"ack": 2, "media": 1, "deleted": 1, "duplicate": 1})
+        self.assertGreater(normalizer.chars_before, normalizer.chars_after)
+
+
+class ChunkSplitterTests(unittest.TestCase):
+    def test_bisects_truncated_chunks_at_message_boundaries(self) -> None:
+        chunk = [{"id": i, "text": "x" * 100} for i in range(1, 9)]
+        self.assertEqual([len(half) for half in bisect_chunk(chunk)], [4, 4])
+        seen = []
+
+        def extract(piece):
+            seen.append([m["id"] for m in piece])
+            if len(piece) > 2:
+                raise TruncatedResponseError("cut off")
+            return {"ids": [m["id"] for m in piece]}
+
+        splitter = ChunkSplitter()
+        result = splitter.extract(chunk, extract, lambda a, b: {"ids": a["ids"] + b["ids"]}, lambda: {"ids": []})
+        self.assertEqual(result["ids"], list(range(1, 9)))
+        self.assertEqual((splitter.chunks, splitter.split, splitter.bisections), (1, 1, 3))
+        self.assertEqual(min(splitter.truncated_sizes), 400)
+        self.assertEqual(splitter.largest_whole, 200)
+
+    def test_single_message_that_never_fits_is_skipped(self) -> None:
+        def extract(piece):
+            raise TruncatedResponseError("cut off")
+
+        splitter = ChunkSplitter()
+        result = splitter.extract([{"id": 7, "text": "long"}], extract, lambda a, b: a, lambda: {"ids": []})
+        self.assertEqual(result, {"ids": []})
+        self.assertEqual(splitter.skipped, [7])
+
+
+if __name__ == "__main__":
+    unittest.main()
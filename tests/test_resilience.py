@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import threading
+import unittest
+from types import SimpleNamespace
+
+from bandchat2site import llm
+from bandchat2site.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Hedger,
+    ResilientCaller,
+    RetryPolicy,
+    is_retryable,
+    retry_after,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: dict | None = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code: int, headers: dict | None = None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = FakeResponse(status_code, headers)
+
+
+class Flaky:
+    def __init__(self, *errors: Exception, result="ok"):
+        self.errors = list(errors)
+        self.result = result
+        self.calls = 0
+
+    def __call__(self, **_kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+
+class ResilienceTests(unittest.TestCase):
+    def test_classifies_transient_errors(self) -> None:
+        self.assertTrue(is_retryable(FakeAPIError(429)))
+        self.assertTrue(is_retryable(FakeAPIError(503)))
+        self.assertTrue(is_retryable(TimeoutError()))
+        self.assertFalse(is_retryable(FakeAPIError(400)))
+        self.assertFalse(is_retryable(ValueError("bad json")))
+
+    def test_backoff_honours_retry_after(self) -> None:
+        policy = RetryPolicy(base=1.0, cap=30.0)
+        self.assertEqual(retry_after(FakeAPIError(429, {"retry-after": "7"})), 7.0)
+        self.assertEqual(policy.delay(1, FakeAPIError(429, {"retry-after-ms": "250"})), 0.25)
+        self.assertEqual(policy.delay(4, FakeAPIError(503), rng=lambda: 1.0), 8.0)
+        self.assertEqual(policy.delay(10, rng=lambda: 1.0), 30.0)
+
+    def test_retries_transient_errors_then_succeeds(self) -> None:
+        sleeps: list[float] = []
+        caller = ResilientCaller(RetryPolicy(attempts=3), sleep=sleeps.append)
+        fn = Flaky(FakeAPIError(429, {"retry-after": "2"}), FakeAPIError(500))
+        self.assertEqual(caller.call(fn, model="m"), "ok")
+        self.assertEqual(fn.calls, 3)
+        self.assertEqual(sleeps[0], 2.0)
+        self.assertEqual(caller.retries, 2)
+
+        bad_request = Flaky(FakeAPIError(400))
+        with self.assertRaises(FakeAPIError):
+            caller.call(bad_request)
+        self.assertEqual(bad_request.calls, 1)
+
+    def test_circuit_opens_and_recovers_after_cooldown(self) -> None:
+        now = [0.0]
+        breaker = CircuitBreaker(threshold=0.5, window=4, min_calls=4, cooldown=10, clock=lambda: now[0])
+        caller = ResilientCaller(RetryPolicy(attempts=1), breaker=breaker, sleep=lambda _s: None)
+        for _ in range(4):
+            with self.assertRaises(FakeAPIError):
+                caller.call(Flaky(FakeAPIError(503)))
+        healthy = Flaky()
+        with self.assertRaises(CircuitOpenError):
+            caller.call(healthy)
+        self.assertEqual(healthy.calls, 0)
+
+        now[0] = 11.0
+        self.assertEqual(breaker.state, "half-open")
+        self.assertEqual(caller.call(healthy), "ok")
+        self.assertEqual(breaker.state, "closed")
+
+    def test_non_retryable_error_on_the_probe_does_not_wedge_the_circuit(self) -> None:
+        now = [0.0]
+        breaker = CircuitBreaker(threshold=0.5, window=4, min_calls=4, cooldown=10, clock=lambda: now[0])
+        caller = ResilientCaller(RetryPolicy(attempts=1), breaker=breaker, sleep=lambda _s: None)
+        for _ in range(4):
+            with self.assertRaises(ConnectionError):
+                caller.call(Flaky(ConnectionError()))
+        now[0] = 11.0
+        with self.assertRaises(FakeAPIError):
+            caller.call(Flaky(FakeAPIError(400)))  # the probe: e.g. context_length_exceeded
+
+        now[0] = 500.0
+        self.assertEqual(caller.call(Flaky()), "ok")
+        self.assertEqual(breaker.state, "closed")
+
+    def test_call_started_before_the_circuit_opened_leaves_the_probe_alone(self) -> None:
+        now = [0.0]
+        breaker = CircuitBreaker(threshold=0.5, window=4, min_calls=4, cooldown=10, clock=lambda: now[0])
+        caller = ResilientCaller(RetryPolicy(attempts=1), breaker=breaker, sleep=lambda _s: None)
+
+        def straggler() -> str:
+            # While this call runs, other threads trip the circuit and one claims the probe.
+            for _ in range(4):
+                breaker.record(False)
+            now[0] = 11.0
+            self.assertTrue(breaker.before_call())
+            return "late"
+
+        self.assertEqual(caller.call(straggler), "late")
+        self.assertEqual(breaker.state, "half-open")
+        with self.assertRaises(CircuitOpenError):
+            caller.call(Flaky())  # the other thread's probe is still in flight
+        breaker.record(True, probe=True)
+        self.assertEqual(breaker.state, "closed")
+
+    def test_hedges_stragglers(self) -> None:
+        hedger = Hedger(percentile=50, min_samples=3)
+        for _ in range(3):
+            hedger.run(lambda: None)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        calls = []
+
+        def sometimes_slow():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(10)  # the primary hangs until the test is done
+                return "slow"
+            return "fast"
+
+        self.assertEqual(hedger.run(sometimes_slow), "fast")
+        self.assertEqual((hedger.hedged, hedger.won), (1, 1))
+
+
+class TruncationTests(unittest.TestCase):
+    def _call(self, response=None, error=None):
+        def create(**kwargs):
+            if error is not None:
+                raise error
+            return response
+
+        previous = llm._client
+        llm._client = SimpleNamespace(responses=SimpleNamespace(create=create))
+        self.addCleanup(setattr, llm, "_client", previous)
+        return llm.call_llm_json("sys", "user", {"type": "object"})
+
+    def test_incomplete_and_cut_off_answers_raise_truncated(self) -> None:
+        details = SimpleNamespace(reason="max_output_tokens")
+        with self.assertRaises(llm.TruncatedResponseError):
+            self._call(SimpleNamespace(status="incomplete", incomplete_details=details, output_text='{"a": ['))
+        with self.assertRaises(llm.TruncatedResponseError):
+            self._call(SimpleNamespace(status="completed", output_text='{"tasks": [{"task": "Bo'))
+        too_long = FakeAPIError(400)
+        too_long.code = "context_length_exceeded"
+        with self.assertRaises(llm.TruncatedResponseError):
+            self._call(error=too_long)
+
+    def test_malformed_json_is_still_a_value_error(self) -> None:
+        with self.assertRaises(ValueError) as caught:
+            self._call(SimpleNamespace(status="completed", output_text='{"a": 1} trailing'))
+        self.assertNotIsInstance(caught.exception, llm.TruncatedResponseError)
+        self.assertEqual(self._call(SimpleNamespace(status="completed", output_text='{"a": 1}')), {"a": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from bandchat2site.ops import OPS_SCHEMA, build_ops_site
+from bandchat2site.schema import SchemaGuard, validator_for
+
+VALID = {
+    "band": {"name": "Test Band", "members": ["Ada"]},
+    "rehearsals": [],
+    "gigs": [],
+    "tasks": [{"task": "Book studio", "status": "open", "sources": [1]}],
+    "decisions": [],
+    "gear": [],
+    "links": [],
+    "open_questions": [],
+}
+
+
+class ValidatorTests(unittest.TestCase):
+    def test_valid_result_has_no_errors_and_validator_is_reused(self) -> None:
+        self.assertEqual(validator_for(OPS_SCHEMA).errors(VALID), [])
+        self.assertIs(validator_for(OPS_SCHEMA), validator_for(OPS_SCHEMA))
+
+    def test_errors_name_the_json_path(self) -> None:
+        bad = json.loads(json.dumps(VALID))
+        bad["tasks"][0]["status"] = "todo"
+        bad["tasks"][0]["sources"] = ["1"]
+        del bad["gear"]
+        errors = validator_for(OPS_SCHEMA).errors(bad)
+        self.assertIn("$: missing required 'gear'", errors)
+        self.assertTrue(any(e.startswith("$.tasks[0].status: expected one of") for e in errors))
+        self.assertTrue(any(e.startswith("$.tasks[0].sources[0]: expected integer") for e in errors))
+
+    def test_salvage_keeps_good_items_and_coerces_near_misses(self) -> None:
+        bad = json.loads(json.dumps(VALID))
+        bad["tasks"] = [
+            {"task": "Book studio", "status": "Done", "sources": ["#3", 4.0], "extra": 1},
+            {"status": "open", "sources": [2]},  # no task: dropped
+        ]
+        bad["links"] = "not a list"
+        fixed, dropped = validator_for(OPS_SCHEMA).salvage(bad)
+        self.assertEqual(fixed["tasks"], [{"task": "Book studio", "status": "done", "sources": [3, 4]}])
+        self.assertEqual(fixed["links"], [])
+        self.assertEqual(validator_for(OPS_SCHEMA).errors(fixed), [])
+        self.assertTrue(dropped)
+
+
+class GuardTests(unittest.TestCase):
+    def test_invalid_result_is_re_asked_with_errors(self) -> None:
+        prompts = []
+
+        def llm_json(_system, user, _schema, *, model=None, name="response"):  # noqa: ANN001
+            prompts.append(user)
+            return VALID if len(prompts) > 1 else {"tasks": "oops"}
+
+        guard = SchemaGuard()
+        self.assertEqual(guard.wrap(llm_json)("sys", "chunk", OPS_SCHEMA, name="ops_extract"), VALID)
+        self.assertEqual(len(prompts), 2)
+        self.assertTrue(prompts[1].startswith("chunk"))
+        self.assertIn("$.tasks: expected array", prompts[1])
+        self.assertEqual((guard.checked, guard.invalid, guard.repaired, guard.salvaged), (1, 1, 1, 0))
+
+    def test_bad_chunk_is_salvaged_without_failing_the_build(self) -> None:
+        calls = []
+
+        def llm_json(_system, user, _schema, *, model=None, name="response"):  # noqa: ANN001
+            calls.append(user)
+            if "Town Hall" in user:
+                raise json.JSONDecodeError("Expecting value", "", 0)
+            return VALID
+
+        out = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, out, True)
+        messages = [
+            {"ts": "2024-01-01T12:00:00", "author": "Ada", "text": "Book studio?"},
+            {"ts": "2024-03-02T09:00:00", "author": "Lin", "text": "We have a gig at Town Hall"},
+        ]
+        guard = SchemaGuard()
+        build_ops_site(
+            messages, out, title="T", llm_json=llm_json, llm_text=lambda *a, **k: "# Stub", guard=guard,
+            journal=False,
+        )
+        knowledge = json.loads((out / "knowledge.json").read_text(encoding="utf-8"))
+        self.assertEqual([t["task"] for t in knowledge["tasks"]], ["Book studio"])
+        self.assertEqual(len(calls), 3)  # good chunk once, bad chunk plus one repair
+        self.assertEqual((guard.checked, guard.salvaged), (2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,23 @@
 from __future__ import annotations
 
 import json
+import shutil
 from pathlib import Path
 import unittest
 
+from bandchat2site.cache import LLMCache
+from bandchat2site.messages import CONTACT_REDACTOR, PUBLIC_REDACTOR
 from bandchat2site.creative import build_creative_site
-from bandchat2site.ops import build_ops_site
+from bandchat2site.dates import DateResolver
+from bandchat2site.journal import JOURNAL_NAME, JournalMismatchError
+from bandchat2site.ops import OPS_SITE, build_ops_site
+from bandchat2site.output import MANIFEST_NAME, SiteWriter, state_dir
+from bandchat2site.plan import format_plans, plan_build
+from bandchat2site.prefilter import AUDIT_NAME, build_prefilter
 from bandchat2site.public import build_public_site
+from bandchat2site.pipeline import build_site
+from bandchat2site.reduce import consolidate, tree_reduce
+from bandchat2site.unified import UnifiedExtractor, public_safe
 
 
 FAKE_MESSAGES = [
@@ -63,26 +74,11 @@ def fake_public_json(_system: str, _user: str, _schema, *, model=None, name="res
 class SmokeBuildTests(unittest.TestCase):
     def setUp(self) -> None:
         self.tmp = Path(self._testMethodName)
-        if self.tmp.exists():
-            for child in self.tmp.iterdir():
-                if child.is_file():
-                    child.unlink()
-                else:
-                    for inner in child.iterdir():
-                        inner.unlink()
-                    child.rmdir()
-            self.tmp.rmdir()
+        shutil.rmtree(self.tmp, ignore_errors=True)
         self.tmp.mkdir()
 
     def tearDown(self) -> None:
-        for child in self.tmp.iterdir():
-            if child.is_file():
-                child.unlink()
-            else:
-                for inner in child.iterdir():
-                    inner.unlink()
-                child.rmdir()
-        self.tmp.rmdir()
+        shutil.rmtree(self.tmp)
 
     def test_ops_build(self) -> None:
         out = self.tmp / "ops"
@@ -105,6 +101,243 @@ class SmokeBuildTests(unittest.TestCase):
         payload = json.loads((out / "knowledge.json").read_text())
         self.assertEqual(payload["band"]["name"], "Test Band")
 
+    def test_rebuild_skips_unchanged_files(self) -> None:
+        out = self.tmp / "ops"
+        build_ops_site(FAKE_MESSAGES, out, llm_text=fake_llm_text, llm_json=fake_ops_json)
+        writer = SiteWriter(out)
+        build_ops_site(FAKE_MESSAGES, out, llm_text=fake_llm_text, llm_json=fake_ops_json, writer=writer)
+        self.assertEqual(writer.written, [])
+        self.assertIn("index.html", writer.skipped)
+
+        (out / "old.html").write_text("stale")
+        manifest = json.loads((out / MANIFEST_NAME).read_text())
+        manifest["files"]["old.html"] = "0"
+        (out / MANIFEST_NAME).write_text(json.dumps(manifest))
+        build_ops_site(FAKE_MESSAGES, out, llm_text=fake_llm_text, llm_json=fake_ops_json, prune=True)
+        self.assertFalse((out / "old.html").exists())
+
+    def test_search_index_is_shipped(self) -> None:
+        out = self.tmp / "ops"
+        build_ops_site(FAKE_MESSAGES, out, llm_text=fake_llm_text, llm_json=fake_ops_json, search=True)
+        page = (out / "index.html").read_text()
+        self.assertIn('id="site-search"', page)
+        self.assertIn('data-index="search/"', page)
+        meta = json.loads((out / "search" / "meta.json").read_text())
+        self.assertGreater(meta["docs"], 0)
+
+    def test_archive_links_items_to_sources(self) -> None:
+        def ops_json_with_task(*args, **kwargs):  # noqa: ANN002, ANN003
+            part = fake_ops_json(*args, **kwargs)
+            part["tasks"] = [{"task": "Book studio", "owner": "Ada", "status": "open", "sources": [1]}]
+            return part
+
+        out = self.tmp / "ops"
+        build_ops_site(FAKE_MESSAGES, out, llm_text=fake_llm_text, llm_json=ops_json_with_task, archive=True)
+        self.assertIn('href="archive.html#2024-01-0/1"', (out / "tasks.html").read_text())
+        self.assertIn('data-archive="archive/"', (out / "archive.html").read_text())
+        rows = json.loads((out / "archive" / "2024-01-0.json").read_text())
+        self.assertEqual([row[0] for row in rows], [1, 2])
+
+    def test_dry_run_plan_matches_build_and_counts_cache_hits(self) -> None:
+        calls = []
+
+        def counting_json(*args, **kwargs):  # noqa: ANN002, ANN003
+            calls.append(kwargs["name"])
+            return fake_ops_json(*args, **kwargs)
+
+        cache = LLMCache(self.tmp / "cache")
+        plan = plan_build(OPS_SITE, FAKE_MESSAGES, cache=cache)
+        self.assertEqual((plan.count("extract"), plan.count("page"), plan.cache_hits), (2, 8, 0))
+        self.assertEqual(list(self.tmp.iterdir()), [])  # nothing written
+
+        build_ops_site(FAKE_MESSAGES, self.tmp / "ops", llm_text=fake_llm_text, llm_json=counting_json, cache=cache)
+        self.assertEqual(calls.count("ops_extract"), plan.count("extract"))
+        self.assertEqual(plan_build(OPS_SITE, FAKE_MESSAGES, cache=cache).cache_hits, 2)
+
+        joined = plan_build(OPS_SITE, FAKE_MESSAGES, min_gap_minutes=24 * 60)
+        self.assertEqual((joined.min_gap_minutes, joined.count("extract")), (1440, 1))
+        self.assertIn("cost $", format_plans([plan, joined], concurrency=4, per_minute=60))
+
+    def test_unified_extraction_feeds_all_sites_with_one_call_per_chunk(self) -> None:
+        messages = FAKE_MESSAGES + [
+            {"ts": "2024-01-02T09:05:00", "author": "Sam", "text": "Venue still owes us money for the last show"},
+        ]
+        calls = []
+
+        def unified_json(system, user, schema, *, model=None, name="response"):  # noqa: ANN001
+            calls.append(name)
+            if name == "public_extract":
+                self.assertIn("[REDACTED_PRIVATE_CONTEXT]", user)
+                return fake_public_json(system, user, schema)
+            public = fake_public_json(system, user, schema)
+            public["shows"] = [
+                {"date": "2024-02-01", "venue": "Town Hall", "sources": [2]},
+                {"date": "2024-03-01", "venue": "Back Room", "sources": [2, 3]},  # cites a private message
+            ]
+            public["contact"] = [{"public_contact_text": "mail ada@example.com", "sources": [2]}]
+            return {
+                "ops": fake_ops_json(system, user, schema),
+                "creative": fake_creative_json(system, user, schema),
+                "public": public,
+            }
+
+        extractor = UnifiedExtractor()
+        for pipeline in ("ops", "creative", "public"):
+            build_site(
+                extractor.spec(pipeline), messages, self.tmp / pipeline, title="T", llm_text=fake_llm_text,
+                llm_json=unified_json,
+            )
+        # one per chunk, shared by three sites; the chunk with a private message gets its own public call
+        self.assertEqual(calls, ["unified_extract"] * 2 + ["public_extract"])
+        self.assertEqual((extractor.shared, extractor.public_calls), (3, 1))
+        self.assertEqual(extractor._parts, {})
+        self.assertEqual(json.loads((self.tmp / "ops" / "knowledge.json").read_text())["band"]["name"], "Test Band")
+        public = json.loads((self.tmp / "public" / "knowledge.json").read_text())
+        self.assertEqual(public["shows"], [])  # the shared chunk's shows cite message 2, which is in chunk 2
+        self.assertEqual(public["contact"], [])
+
+    def test_unified_results_are_released_for_chunks_a_site_skips(self) -> None:
+        def unified_json(system, user, schema, *, model=None, name="response"):  # noqa: ANN001
+            return {
+                "ops": fake_ops_json(system, user, schema),
+                "creative": fake_creative_json(system, user, schema),
+                "public": fake_public_json(system, user, schema),
+            }
+
+        extractor = UnifiedExtractor()
+        skip_all = build_prefilter("ops", threshold=1e9)
+        for pipeline in ("creative", "ops", "public"):
+            build_site(
+                extractor.spec(pipeline), FAKE_MESSAGES, self.tmp / pipeline, title="T", llm_text=fake_llm_text,
+                llm_json=unified_json, prefilter=skip_all if pipeline == "ops" else None,
+            )
+        self.assertEqual((extractor._parts, extractor._skipped), ({}, {}))
+
+        # A resumed build replays the journal instead of extracting, and skips too.
+        calls = extractor.calls
+        for pipeline in ("ops", "creative", "public"):
+            build_site(
+                extractor.spec(pipeline), FAKE_MESSAGES, self.tmp / pipeline, title="T", llm_text=fake_llm_text,
+                llm_json=unified_json, resume=pipeline != "public",
+            )
+        self.assertEqual(extractor.calls - calls, 2)
+        self.assertEqual((extractor._parts, extractor._skipped), ({}, {}))
+
+    def test_public_share_never_draws_on_hidden_messages(self) -> None:
+        chunk = [
+            {"id": 1, "ts": "2024-01-01T12:00:00", "author": "Ada", "text": "Gig at Town Hall, mail ada@example.com"},
+            {"id": 2, "ts": "2024-01-01T12:05:00", "author": "Lin", "text": "Sam owes rent, broke after the divorce"},
+        ]
+        part = {
+            "band": {"name": "Test Band", "tagline": "", "genre_keywords": ["indie"], "city": "",
+                     "members_public": ["Sam"], "short_bio": "Sam is going through a divorce"},
+            "shows": [
+                {"venue": "Town Hall", "notes": "mail ada@example.com", "sources": [1]},
+                {"venue": "Back Room", "notes": "Sam needs the cash", "sources": []},
+                {"venue": "Cellar", "sources": [1, 2]},
+            ],
+            "media": [{"url": "https://example.org", "notes": "no sources given"}],
+        }
+        safe = public_safe(part, chunk, public=PUBLIC_REDACTOR, prompt=CONTACT_REDACTOR)
+        self.assertEqual(safe["shows"], [{"venue": "Town Hall", "notes": "mail [REDACTED_EMAIL]", "sources": [1]}])
+        self.assertEqual(safe["media"], [])
+        self.assertEqual(safe["band"]["short_bio"], "")
+        self.assertEqual(safe["band"]["members_public"], [])
+
+        visible_only = public_safe(part, chunk[:1], public=PUBLIC_REDACTOR, prompt=CONTACT_REDACTOR)
+        self.assertEqual(visible_only["band"]["name"], "Test Band")
+
+    def test_resume_replays_journal_after_crash(self) -> None:
+        out = self.tmp / "ops"
+        calls = []
+
+        def crashing_json(*args, **kwargs):  # noqa: ANN002, ANN003
+            calls.append(1)
+            if len(calls) == 2:
+                raise ConnectionError("network blip")
+            return fake_ops_json(*args, **kwargs)
+
+        with self.assertRaises(ConnectionError):
+            build_ops_site(FAKE_MESSAGES, out, llm_text=fake_llm_text, llm_json=crashing_json)
+        self.assertTrue((state_dir(out) / JOURNAL_NAME).exists())
+        self.assertFalse((out / JOURNAL_NAME).exists())
+
+        calls.clear()
+        build_ops_site(FAKE_MESSAGES, out, llm_text=fake_llm_text, llm_json=crashing_json, resume=True)
+        self.assertEqual(len(calls), 1)  # only the chunk that was in flight
+        self.assertEqual(json.loads((out / "knowledge.json").read_text())["band"]["name"], "Test Band")
+
+        with self.assertRaises(JournalMismatchError):
+            build_ops_site(
+                FAKE_MESSAGES, out, model="other", llm_text=fake_llm_text, llm_json=fake_ops_json, resume=True
+            )
+
+    def test_build_state_stays_out_of_the_site(self) -> None:
+        out = self.tmp / "ops"
+        build_ops_site(
+            FAKE_MESSAGES, out, llm_text=fake_llm_text, llm_json=fake_ops_json, prefilter=build_prefilter("ops", 99)
+        )
+        state = state_dir(out)
+        self.assertEqual(state, self.tmp.resolve() / ".ops.build")
+        self.assertTrue((state / JOURNAL_NAME).exists())
+        self.assertTrue((state / AUDIT_NAME).read_text().strip())
+        self.assertEqual(sorted(p.name for p in out.glob(".*")), [MANIFEST_NAME])
+
+    def test_events_merge_only_on_the_same_resolved_day_and_place(self) -> None:
+        def rehearsal(day: str, place: str, topic: str, source: int) -> dict:
+            return {"date": day, "location": place, "agenda": [topic], "notes": [], "sources": [source]}
+
+        parts = [
+            ([{"id": 3, "ts": "2024-05-06T10:00:00"}], rehearsal("Friday", "Studio A", "intro", 3)),
+            ([{"id": 5, "ts": "2024-05-08T10:00:00"}], rehearsal("10 May", "studio a", "outro", 5)),
+            ([{"id": 900, "ts": "2024-06-03T10:00:00"}], rehearsal("Friday", "Bob's garage", "bridge", 900)),
+        ]
+        unresolved = consolidate({"rehearsals": [item for _, item in parts]}, OPS_SITE.identity)
+        self.assertEqual(len(unresolved["rehearsals"]), 3)
+
+        dates = DateResolver()
+        for messages, item in parts:
+            dates.anchor({"rehearsals": [item]}, OPS_SITE.event_sections, messages)
+        merged = consolidate({"rehearsals": [item for _, item in parts]}, OPS_SITE.identity)["rehearsals"]
+        self.assertEqual(
+            [(r["date"], r["location"], r["agenda"], r["sources"]) for r in merged],
+            [
+                ("2024-05-10", "studio a", ["intro", "outro"], [3, 5]),
+                ("2024-06-07", "Bob's garage", ["bridge"], [900]),
+            ],
+        )
+        self.assertEqual(merged[1]["date_text"], "Friday")
+
+    def test_tree_reduce_keeps_newest_facts(self) -> None:
+        def part(n: int, time: str) -> dict:
+            knowledge = fake_ops_json("", "", {})
+            knowledge["rehearsals"] = [{"date": "2024-05-03", "time": time, "notes": [f"n{n}"], "sources": [n]}]
+            knowledge["tasks"] = [{"task": f"Task {n % 3}", "sources": [n]}]
+            return knowledge
+
+        parts = [part(n, f"{18 + n % 4}:00") for n in range(1, 21)]
+        combine_calls = []
+
+        def combine(group):  # noqa: ANN001
+            combine_calls.append(len(group))
+            merged = {key: sum((p[key] for p in group), []) for key in ("rehearsals", "tasks")}
+            return consolidate(
+                merged,
+                {"rehearsals": ("date",), "tasks": ("task",)},
+                max_items=2,
+            )
+
+        result = tree_reduce(parts, combine, fanout=4, workers=2)
+        self.assertEqual(sorted(combine_calls), [2, 4, 4, 4, 4, 4, 4])
+        [rehearsal] = result["rehearsals"]
+        self.assertEqual(rehearsal["time"], "18:00")  # from message 20, the newest
+        self.assertEqual(rehearsal["sources"], list(range(1, 21)))
+        self.assertEqual([t["task"] for t in result["tasks"]], ["Task 1", "Task 2"])
+
+        out = self.tmp / "ops"
+        build_ops_site(FAKE_MESSAGES, out, llm_text=fake_llm_text, llm_json=fake_ops_json, reduce_mode="tree")
+        self.assertEqual(json.loads((out / "knowledge.json").read_text())["band"]["name"], "Test Band")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from bandchat2site.ops import OPS_SITE
+from bandchat2site.store import ENTITIES, KnowledgeStore
+
+
+def part(**sections) -> dict:  # noqa: ANN003
+    knowledge = {key: [] for key in OPS_SITE.empty if key != "band"}
+    knowledge["band"] = {"name": "Test Band", "members": ["Ada"]}
+    knowledge.update(sections)
+    return knowledge
+
+
+class KnowledgeStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = KnowledgeStore(Path(self.tmp.name) / "knowledge.sqlite")
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_upsert_merges_by_identity_and_queries_indexes(self) -> None:
+        van = {"task": "Book van", "owner": "Ada", "status": "open", "sources": [3]}
+        self.store.upsert("Band A", OPS_SITE, part(tasks=[van]))
+        self.store.upsert(
+            "Band A",
+            OPS_SITE,
+            part(
+                tasks=[
+                    {"task": "book  VAN", "owner": "Ada", "status": "done", "sources": [9]},
+                    {"task": "Print posters", "owner": "ada", "status": "open", "sources": [5]},
+                ],
+                gigs=[
+                    {"date": "2024-03-01", "venue": "Town Hall", "sources": [4]},
+                    {"date": "2024-07-12", "venue": "Pier", "sources": [8]},
+                ],
+            ),
+        )
+        demo = {"task": "Mix demo", "owner": "Ada", "status": "open", "sources": [1]}
+        self.store.upsert("Band B", OPS_SITE, part(tasks=[demo]))
+
+        open_for_ada = self.store.query("tasks", band="Band A", owner="ADA", status="open")
+        self.assertEqual([t["task"] for t in open_for_ada], ["Print posters"])
+        [van] = self.store.query("tasks", band="Band A", status="done")
+        self.assertEqual(van["sources"], [3, 9])
+        self.assertEqual([g["venue"] for g in self.store.query("gigs", after="2024-06-01")], ["Pier"])
+        self.assertEqual([t["task"] for t in self.store.query("tasks", message_id=3)], ["book  VAN"])
+        self.assertEqual(len(self.store.query("tasks", owner="ada")), 3)
+
+        exported = self.store.export("Band A", OPS_SITE)
+        self.assertEqual(sorted(exported), sorted(OPS_SITE.empty))
+        self.assertEqual(exported["band"]["name"], "Test Band")
+        self.assertEqual([t["task"] for t in exported["tasks"]], ["Print posters", "book  VAN"])
+        self.assertEqual(self.store.bands(), ["Band A", "Band B"])
+
+    def test_events_are_stored_by_resolved_day_and_place(self) -> None:
+        messages = [
+            {"id": 3, "ts": "2024-05-06T10:00:00", "author": "Ada", "text": "Rehearsal Friday, Studio A"},
+            {"id": 900, "ts": "2024-06-03T10:00:00", "author": "Lin", "text": "Friday at Bob's garage"},
+        ]
+        rehearsals = [
+            {"date": "Friday", "location": "Studio A", "agenda": ["intro"], "sources": [3]},
+            {"date": "Friday", "location": "Bob's garage", "agenda": ["bridge"], "sources": [900]},
+        ]
+        gigs = [{"date": "sometime soon", "venue": "Pier", "sources": [3]}]
+        self.store.upsert("Band A", OPS_SITE, part(rehearsals=rehearsals, gigs=gigs), messages)
+
+        stored = self.store.query("rehearsals", band="Band A")
+        self.assertEqual(
+            [(r["date"], r["agenda"]) for r in stored], [("2024-05-10", ["intro"]), ("2024-06-07", ["bridge"])]
+        )
+        self.assertEqual([r["location"] for r in self.store.query("rehearsals", after="2024-06-01")], ["Bob's garage"])
+        self.assertEqual(self.store.query("gigs", after="2024-01-01"), [])
+        row = self.store.db.execute("SELECT date, date_text FROM rehearsals ORDER BY id").fetchone()
+        self.assertEqual((row["date"], row["date_text"]), ("2024-05-10", "Friday"))
+        row = self.store.db.execute("SELECT date, date_text FROM gigs").fetchone()
+        self.assertEqual((row["date"], row["date_text"]), (None, "sometime soon"))
+
+    def test_version_1_store_moves_free_text_dates_aside(self) -> None:
+        self.store.db.executescript(
+            "".join(f"ALTER TABLE {table} DROP COLUMN date_text;" for table in ENTITIES)
+            + "UPDATE meta SET value = '1' WHERE key = 'schema_version';"
+            "INSERT INTO gigs (band, pipeline, ident, date, newest, data)"
+            " VALUES ('B', 'ops', 'x', 'next Fri', 1, '{}');"
+        )
+        self.store.close()
+        self.store = KnowledgeStore(Path(self.tmp.name) / "knowledge.sqlite")
+        row = self.store.db.execute("SELECT date, date_text FROM gigs").fetchone()
+        self.assertEqual((row["date"], row["date_text"]), (None, "next Fri"))
+
+    def test_unknown_entity(self) -> None:
+        with self.assertRaises(ValueError):
+            self.store.query("invoices")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from bandchat2site.creative import build_creative_site
+from bandchat2site.media import MediaLibrary, index_media
+from bandchat2site.output import SiteWriter
+from bandchat2site.whatsapp import follow_export, load_messages_jsonl, parse_export_file, parse_export_lines
+
+EXPORT = "1/2/24, 10:00 - Ada: Book studio?\nfor Friday\n1/2/24, 11:30 PM - Lin: Done\n"
+
+
+class WhatsAppParserTests(unittest.TestCase):
+    def test_parse_lines_with_continuation(self) -> None:
+        messages = parse_export_lines(EXPORT.splitlines())
+        self.assertEqual(
+            messages,
+            [
+                {"ts": "2024-01-02T10:00:00", "author": "Ada", "text": "Book studio?\nfor Friday"},
+                {"ts": "2024-01-02T23:30:00", "author": "Lin", "text": "Done"},
+            ],
+        )
+
+    def test_follow_appends_only_new_messages(self) -> None:
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root, True)
+        export, jsonl = root / "chat.txt", root / "messages.jsonl"
+        export.write_text(EXPORT, encoding="utf-8")
+
+        first = follow_export(export, jsonl)
+        self.assertTrue(first.reset)
+        self.assertEqual([m["id"] for m in first.appended], [1])
+        self.assertEqual(first.open_message["text"], "Done")
+
+        with export.open("a", encoding="utf-8") as fh:
+            fh.write("and the van\n1/3/24, 09:00 - Ada: Thanks\n1/3/24, 09:05 - Lin: half-writ")
+        second = follow_export(export, jsonl)
+        self.assertFalse(second.reset)
+        self.assertEqual([(m["id"], m["text"]) for m in second.appended], [(2, "Done\nand the van")])
+        self.assertEqual(second.open_message, {"ts": "2024-01-03T09:00:00", "author": "Ada", "text": "Thanks", "id": 3})
+
+        messages = load_messages_jsonl(jsonl)
+        self.assertEqual([m["id"] for m in messages], [1, 2, 3])
+        full = parse_export_lines(export.read_text(encoding="utf-8").rsplit("\n", 1)[0].splitlines())
+        self.assertEqual([m["text"] for m in messages], [m["text"] for m in full])
+
+    def test_follow_restarts_when_export_replaced(self) -> None:
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root, True)
+        export, jsonl = root / "chat.txt", root / "messages.jsonl"
+        export.write_text(EXPORT + "1/3/24, 09:00 - Ada: Thanks\n", encoding="utf-8")
+        follow_export(export, jsonl)
+        export.write_text(EXPORT.replace("Ada", "Bea"), encoding="utf-8")
+        result = follow_export(export, jsonl)
+        self.assertTrue(result.reset)
+        self.assertEqual(load_messages_jsonl(jsonl)[0]["author"], "Bea")
+
+
+class ZipExportTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.export = self.root / "WhatsApp Chat with Band.zip"
+        chat = (
+            "\ufeff1/2/24, 10:00 - Ada: PTT-20240102-WA0001.opus (file attached)\n"
+            "1/2/24, 10:05 - Lin: IMG-20240102-WA0002.jpg (file attached)\nlook at this\n"
+            "1/3/24, 09:00 - Sam: 00000003-night-drive-demo.m4a (file attached)\n"
+        )
+        with zipfile.ZipFile(self.export, "w") as archive:
+            archive.writestr("WhatsApp Chat with Band.txt", chat)
+            archive.writestr("lyrics-draft.txt", "Night drive, verse 2")
+            archive.writestr("PTT-20240102-WA0001.opus", b"voice" * 100)
+            archive.writestr("IMG-20240102-WA0002.jpg", b"jpeg" * 100)
+            archive.writestr("00000003-night-drive-demo.m4a", b"demo" * 100)
+            archive.writestr("STK-unreferenced.webp", b"sticker")
+
+    def test_chat_is_read_from_the_zip_and_media_indexed(self) -> None:
+        messages = parse_export_file(self.export)
+        self.assertEqual([m["author"] for m in messages], ["Ada", "Lin", "Sam"])
+        self.assertEqual(messages[1]["text"], "IMG-20240102-WA0002.jpg (file attached)\nlook at this")
+        entries = {entry.name: entry for entry in index_media(self.export, messages)}
+        self.assertEqual(len(entries), 5)
+        voice = entries["PTT-20240102-WA0001.opus"]
+        self.assertEqual((voice.kind, voice.size), ("audio", 500))
+        self.assertEqual(entries["IMG-20240102-WA0002.jpg"].message_id, 2)
+        self.assertEqual(entries["00000003-night-drive-demo.m4a"].message_id, 3)
+        self.assertIsNone(entries["STK-unreferenced.webp"].message_id)
+        self.assertEqual(sorted(p.name for p in self.root.iterdir()), [self.export.name])  # nothing extracted
+
+    def test_ios_export(self) -> None:
+        export = self.root / "WhatsApp Chat - Band.zip"
+        chat = (
+            "[1/2/24, 10:00:12 AM] Band: \u200eMessages and calls are end-to-end encrypted.\n"
+            "\u200e[1/2/24, 10:00:40 AM] Ada: \u200e<attached: 00000002-AUDIO-2024-01-02-10-00-40.opus>\n"
+            "[1/2/24, 10:05:03\u202fAM] Lin: look at this\nsecond line\n"
+        )
+        with zipfile.ZipFile(export, "w") as archive:
+            archive.writestr("_chat.txt", chat)
+            archive.writestr("00000002-AUDIO-2024-01-02-10-00-40.opus", b"voice")
+        messages = parse_export_file(export)
+        self.assertEqual(
+            [(m["ts"], m["author"], m["text"]) for m in messages[1:]],
+            [
+                ("2024-01-02T10:00:40", "Ada", "<attached: 00000002-AUDIO-2024-01-02-10-00-40.opus>"),
+                ("2024-01-02T10:05:03", "Lin", "look at this\nsecond line"),
+            ],
+        )
+        [voice] = index_media(export, messages)
+        self.assertEqual((voice.kind, voice.message_id), ("audio", 2))
+
+    def test_zip_without_recognizable_lines_is_an_error(self) -> None:
+        export = self.root / "odd.zip"
+        with zipfile.ZipFile(export, "w") as archive:
+            archive.writestr("_chat.txt", "2024-01-02 10:00 Ada: hi\n")
+        with self.assertRaisesRegex(ValueError, "no WhatsApp messages found"):
+            parse_export_file(export)
+
+    def test_referenced_recordings_are_copied_into_the_creative_site(self) -> None:
+        def fake_json(*_args, **_kwargs):  # noqa: ANN002, ANN003
+            return {"songs": [], "setlists": [], "recordings": [], "decisions": [], "open_questions": []}
+
+        out = self.root / "creative"
+        messages = parse_export_file(self.export)
+        build_creative_site(
+            messages, out, llm_json=fake_json, llm_text=lambda *a, **k: "# Stub", media=MediaLibrary(self.export)
+        )
+        self.assertEqual(sorted(p.name for p in (out / "media").iterdir()), [
+            "00000003-night-drive-demo.m4a", "PTT-20240102-WA0001.opus"
+        ])
+        recordings = json.loads((out / "knowledge.json").read_text(encoding="utf-8"))["recordings"]
+        self.assertEqual([(r["url"], r["sources"]) for r in recordings], [
+            ("media/PTT-20240102-WA0001.opus", [1]), ("media/00000003-night-drive-demo.m4a", [3])
+        ])
+
+        writer = SiteWriter(out)
+        MediaLibrary(self.export).publish(writer, messages)
+        self.assertEqual(writer.written, [])  # unchanged media is neither read nor rewritten
+
+
+class StartupTests(unittest.TestCase):
+    def test_parse_whatsapp_skips_pipelines_and_sdk(self) -> None:
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root, True)
+        (root / "chat.txt").write_text(EXPORT, encoding="utf-8")
+        script = (
+            "import json, sys; from bandchat2site.cli import main; "
+            f"main(['parse-whatsapp', '--input', {str(root / 'chat.txt')!r}, '--output', {str(root / 'm.json')!r}]); "
+            "print(json.dumps(sorted(sys.modules)))"
+        )
+        proc = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+        modules = set(json.loads(proc.stdout.splitlines()[-1]))
+        self.assertIn("bandchat2site.whatsapp", modules)
+        for heavy in ("openai", "bandchat2site.llm", "bandchat2site.pipeline", "http.server", "multiprocessing"):
+            self.assertNotIn(heavy, modules)
+        self.assertEqual(len(json.loads((root / "m.json").read_text())), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()